@@ -0,0 +1,29 @@
+"""add evidence perceptual hash
+
+Revision ID: 0016_evidence_perceptual_hash
+Revises: 0015_fix_best_score_constraint
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0016_evidence_perceptual_hash"
+down_revision = "0015_fix_best_score_constraint"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("evidence_artifacts") as batch_op:
+        batch_op.add_column(sa.Column("perceptual_hash", sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column("near_duplicate_of", sa.Integer(), nullable=True))
+    op.create_index("idx_artifacts_near_duplicate", "evidence_artifacts", ["near_duplicate_of"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_artifacts_near_duplicate", table_name="evidence_artifacts")
+    with op.batch_alter_table("evidence_artifacts") as batch_op:
+        batch_op.drop_column("near_duplicate_of")
+        batch_op.drop_column("perceptual_hash")
@@ -0,0 +1,36 @@
+"""add student stats projection
+
+Revision ID: 0017_student_stats
+Revises: 0016_evidence_perceptual_hash
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0017_student_stats"
+down_revision = "0016_evidence_perceptual_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "student_stats",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("total_xp", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("quizzes_completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("quiz_score_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("tickets_completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ticket_score_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("week_progress", sa.JSON(), nullable=False, server_default=sa.text("'{}'")),
+        sa.Column("weak_areas", sa.JSON(), nullable=False, server_default=sa.text("'[]'")),
+        sa.Column("recent_activity", sa.JSON(), nullable=False, server_default=sa.text("'[]'")),
+        sa.Column("cert_readiness", sa.JSON(), nullable=False, server_default=sa.text("'{}'")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("student_stats")
@@ -0,0 +1,57 @@
+"""add daily xp rollups and weekly snapshots
+
+Revision ID: 0018_xp_rollups
+Revises: 0017_student_stats
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0018_xp_rollups"
+down_revision = "0017_student_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "xp_daily_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("xp", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("student_id", "day", name="uq_xp_daily_rollups_student_day"),
+    )
+    op.create_index("idx_xp_daily_rollups_student", "xp_daily_rollups", ["student_id"])
+    op.create_index("idx_xp_daily_rollups_day", "xp_daily_rollups", ["day"])
+
+    op.create_table(
+        "weekly_xp_snapshots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("week_key", sa.String(length=20), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("xp", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("week_key", "student_id", name="uq_weekly_xp_snapshots_week_student"),
+    )
+    op.create_index("idx_weekly_xp_snapshots_week", "weekly_xp_snapshots", ["week_key"])
+
+    op.execute(
+        """
+        INSERT INTO xp_daily_rollups (student_id, day, xp)
+        SELECT student_id, DATE(created_at), SUM(delta)
+        FROM xp_ledger
+        GROUP BY student_id, DATE(created_at)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_weekly_xp_snapshots_week", table_name="weekly_xp_snapshots")
+    op.drop_table("weekly_xp_snapshots")
+    op.drop_index("idx_xp_daily_rollups_day", table_name="xp_daily_rollups")
+    op.drop_index("idx_xp_daily_rollups_student", table_name="xp_daily_rollups")
+    op.drop_table("xp_daily_rollups")
@@ -0,0 +1,43 @@
+"""add submission listing indexes and counters
+
+Revision ID: 0020_submission_listing
+Revises: 0019_notification_outbox
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0020_submission_listing"
+down_revision = "0019_notification_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_ticket_submissions_submitted", "ticket_submissions", ["submitted_at", "id"])
+    op.create_index("idx_ticket_submissions_status_submitted", "ticket_submissions", ["status", "submitted_at", "id"])
+    op.create_index("idx_ticket_submissions_reviewed_submitted", "ticket_submissions", ["admin_reviewed", "submitted_at", "id"])
+    op.create_table(
+        "submission_counters",
+        sa.Column("status", sa.String(length=20), primary_key=True),
+        sa.Column("admin_reviewed", sa.Boolean(), primary_key=True),
+        sa.Column("graded", sa.Boolean(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        INSERT INTO submission_counters (status, admin_reviewed, graded, count)
+        SELECT COALESCE(status, 'pending'), admin_reviewed, (ai_score IS NOT NULL), COUNT(*)
+        FROM ticket_submissions
+        GROUP BY COALESCE(status, 'pending'), admin_reviewed, (ai_score IS NOT NULL)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("submission_counters")
+    op.drop_index("idx_ticket_submissions_reviewed_submitted", table_name="ticket_submissions")
+    op.drop_index("idx_ticket_submissions_status_submitted", table_name="ticket_submissions")
+    op.drop_index("idx_ticket_submissions_submitted", table_name="ticket_submissions")
@@ -0,0 +1,111 @@
+"""add mastery events and recency-weighted mastery sums
+
+Revision ID: 0021_mastery_events
+Revises: 0020_submission_listing
+Create Date: 2026-10-19
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0021_mastery_events"
+down_revision = "0020_submission_listing"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mastery_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("domain_id", sa.String(length=10), nullable=False),
+        sa.Column("source_type", sa.String(length=20), nullable=False),
+        sa.Column("source_id", sa.Integer(), nullable=True),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("idx_mastery_events_student_domain", "mastery_events", ["student_id", "domain_id", "created_at"])
+    with op.batch_alter_table("student_domain_mastery") as batch_op:
+        batch_op.add_column(sa.Column("quiz_weighted_score", sa.Float(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("quiz_weight", sa.Float(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("ticket_weighted_score", sa.Float(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("ticket_weight", sa.Float(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("last_event_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Start the weighted sums at the existing plain totals, so current mastery is
+    # unchanged and the first new event decays history from the row's last update.
+    op.execute(
+        """
+        UPDATE student_domain_mastery
+        SET quiz_weighted_score = quiz_score_total,
+            quiz_weight = quiz_attempts,
+            ticket_weighted_score = ticket_score_total,
+            ticket_weight = ticket_attempts,
+            last_event_at = updated_at
+        """
+    )
+    _backfill_events()
+
+
+def _backfill_events() -> None:
+    """Seed the log from quiz attempts and verified tickets, as mastery_service.backfill_mastery_events does."""
+    op.execute(
+        """
+        INSERT INTO mastery_events (student_id, domain_id, source_type, source_id, score, created_at)
+        SELECT a.student_id, q.domain_id, 'quiz', a.id, a.score, COALESCE(a.completed_at, CURRENT_TIMESTAMP)
+        FROM quiz_attempts a
+        JOIN quizzes q ON q.id = a.quiz_id
+        """
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            """
+            SELECT s.id, s.student_id, s.collaborator_ids, s.final_score, s.ai_score, s.verified_at, s.submitted_at, t.domain_id
+            FROM ticket_submissions s
+            JOIN tickets t ON t.id = s.ticket_id
+            WHERE s.status = 'passed' AND s.xp_granted = :granted
+            """
+        ).bindparams(granted=True)
+    ).mappings()
+    events = []
+    for row in rows:
+        collaborators = row["collaborator_ids"] or []
+        if isinstance(collaborators, str):
+            collaborators = json.loads(collaborators or "[]")
+        score = row["final_score"] if row["final_score"] is not None else row["ai_score"] or 0
+        for student_id in dict.fromkeys([row["student_id"]] + [int(x) for x in collaborators]):
+            events.append(
+                {
+                    "student_id": student_id,
+                    "domain_id": row["domain_id"] or "1.0",
+                    "source_id": row["id"],
+                    "score": float(score),
+                    "created_at": row["verified_at"] or row["submitted_at"],
+                }
+            )
+    if events:
+        bind.execute(
+            sa.text(
+                """
+                INSERT INTO mastery_events (student_id, domain_id, source_type, source_id, score, created_at)
+                VALUES (:student_id, :domain_id, 'ticket', :source_id, :score, COALESCE(:created_at, CURRENT_TIMESTAMP))
+                """
+            ),
+            events,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("student_domain_mastery") as batch_op:
+        batch_op.drop_column("last_event_at")
+        batch_op.drop_column("ticket_weight")
+        batch_op.drop_column("ticket_weighted_score")
+        batch_op.drop_column("quiz_weight")
+        batch_op.drop_column("quiz_weighted_score")
+    op.drop_index("idx_mastery_events_student_domain", table_name="mastery_events")
+    op.drop_table("mastery_events")
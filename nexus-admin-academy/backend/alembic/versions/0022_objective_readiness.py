@@ -0,0 +1,54 @@
+"""add objective tags, objective attempt counts and the readiness summary
+
+Revision ID: 0022_objective_readiness
+Revises: 0021_mastery_events
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0022_objective_readiness"
+down_revision = "0021_mastery_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("quizzes") as batch_op:
+        batch_op.add_column(sa.Column("objective_ids", sa.JSON(), nullable=False, server_default="[]"))
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.add_column(sa.Column("objective_ids", sa.JSON(), nullable=False, server_default="[]"))
+    with op.batch_alter_table("student_objective_progress") as batch_op:
+        batch_op.add_column(sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "student_domain_readiness",
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("domain", sa.String(length=10), nullable=False),
+        sa.Column("mastery_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("objectives_practiced", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["student_id"], ["students.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("student_id", "domain"),
+    )
+    op.execute(
+        """
+        INSERT INTO student_domain_readiness (student_id, domain, mastery_total, objectives_practiced)
+        SELECT p.student_id, o.domain, SUM(p.mastery_level), COUNT(*)
+        FROM student_objective_progress p
+        JOIN comptia_objectives o ON o.id = p.objective_id
+        GROUP BY p.student_id, o.domain
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("student_domain_readiness")
+    with op.batch_alter_table("student_objective_progress") as batch_op:
+        batch_op.drop_column("attempts")
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.drop_column("objective_ids")
+    with op.batch_alter_table("quizzes") as batch_op:
+        batch_op.drop_column("objective_ids")
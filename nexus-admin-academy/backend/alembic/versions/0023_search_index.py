@@ -0,0 +1,84 @@
+"""add full-text search indexes for lessons and command reference
+
+Revision ID: 0023_search_index
+Revises: 0022_objective_readiness
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+
+revision = "0023_search_index"
+down_revision = "0022_objective_readiness"
+branch_labels = None
+depends_on = None
+
+# (table, index table, searchable columns); column order sets the bm25 weights in search_service.
+SQLITE_INDEXES = [
+    ("lessons", "lessons_fts", ["title", "summary"]),
+    ("command_reference", "command_reference_fts", ["command", "description", "syntax"]),
+]
+
+# Column weights for the Postgres tsvector: A ranks highest.
+POSTGRES_VECTORS = {
+    "lessons": [("title", "A"), ("summary", "B")],
+    "command_reference": [("command", "A"), ("description", "B"), ("syntax", "C")],
+}
+
+
+def _sqlite_upgrade() -> None:
+    # External-content FTS5 tables kept in step by triggers. A later batch_alter_table
+    # on the source table recreates it without these triggers, so it must re-add them.
+    for source, fts, columns in SQLITE_INDEXES:
+        names = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{source}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {source} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _postgres_upgrade() -> None:
+    # A stored generated column is maintained by Postgres on every write, like a trigger.
+    for source, columns in POSTGRES_VECTORS.items():
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({column}, '')), '{weight}')" for column, weight in columns
+        )
+        op.execute(f"ALTER TABLE {source} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED")
+        op.execute(f"CREATE INDEX idx_{source}_search ON {source} USING gin (search_vector)")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _sqlite_upgrade()
+    elif dialect == "postgresql":
+        _postgres_upgrade()
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for _, fts, _ in SQLITE_INDEXES:
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+    elif dialect == "postgresql":
+        for source in POSTGRES_VECTORS:
+            op.execute(f"DROP INDEX IF EXISTS idx_{source}_search")
+            op.execute(f"ALTER TABLE {source} DROP COLUMN IF EXISTS search_vector")
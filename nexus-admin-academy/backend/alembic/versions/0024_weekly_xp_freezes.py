@@ -0,0 +1,34 @@
+"""add weekly xp freeze markers
+
+Revision ID: 0024_weekly_xp_freezes
+Revises: 0023_search_index
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0024_weekly_xp_freezes"
+down_revision = "0023_search_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "weekly_xp_freezes",
+        sa.Column("week_key", sa.String(length=20), primary_key=True),
+        sa.Column("students", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("frozen_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.execute(
+        """
+        INSERT INTO weekly_xp_freezes (week_key, students)
+        SELECT week_key, COUNT(*) FROM weekly_xp_snapshots GROUP BY week_key
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("weekly_xp_freezes")
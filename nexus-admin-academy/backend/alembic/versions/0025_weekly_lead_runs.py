@@ -0,0 +1,34 @@
+"""add weekly domain lead run markers
+
+Revision ID: 0025_weekly_lead_runs
+Revises: 0024_weekly_xp_freezes
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0025_weekly_lead_runs"
+down_revision = "0024_weekly_xp_freezes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "weekly_domain_lead_runs",
+        sa.Column("week_key", sa.String(length=20), primary_key=True),
+        sa.Column("leads", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.execute(
+        """
+        INSERT INTO weekly_domain_lead_runs (week_key, leads)
+        SELECT week_key, COUNT(*) FROM weekly_domain_leads GROUP BY week_key
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("weekly_domain_lead_runs")
@@ -15,7 +15,13 @@ from app.database import SessionLocal
 from app.config import load_env
 from app.models import Student
 from app.routers import admin, admin_session, commands, evidence, quizzes, resources, search, students, submissions, tickets
-from app.services.squad_service import get_weekly_domain_leads, recompute_weekly_domain_leads
+from app.services.activity_service import activity_sink
+from app.services.discord_service import discord_dispatcher
+from app.services.evidence_worker import evidence_worker
+from app.services.presence_service import presence
+from app.services.stats_service import refresh_student_stats
+from app.services.upload_service import get_upload_dir
+from app.services.weekly_scheduler import weekly_scheduler
 
 load_env()
 LOG_PATH = os.getenv("APP_LOG_PATH", "/var/log/nexus/app.log")
@@ -56,8 +62,10 @@ def seed_students() -> None:
     db = SessionLocal()
     try:
         if db.query(Student).count() == 0:
-            for name, email in default_students:
-                db.add(Student(name=name, email=email, total_xp=0))
+            students = [Student(name=name, email=email, total_xp=0) for name, email in default_students]
+            db.add_all(students)
+            db.flush()
+            refresh_student_stats(db, [student.id for student in students])
             db.commit()
     finally:
         db.close()
@@ -75,13 +83,19 @@ def _cors_origins() -> list[str]:
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     seed_students()
-    db = SessionLocal()
+    await weekly_scheduler.start()
+    await evidence_worker.start()
+    await presence.start()
+    await activity_sink.start()
+    await discord_dispatcher.start()
     try:
-        if not get_weekly_domain_leads(db):
-            recompute_weekly_domain_leads(db)
+        yield
     finally:
-        db.close()
-    yield
+        await discord_dispatcher.stop()
+        await activity_sink.stop()
+        await presence.stop()
+        await evidence_worker.stop()
+        await weekly_scheduler.stop()
 
 
 def create_app() -> FastAPI:
@@ -145,10 +159,7 @@ def create_app() -> FastAPI:
     app.include_router(resources.router)
     app.include_router(students.router)
 
-    upload_dir = os.getenv("UPLOAD_DIR")
-    directory = Path(upload_dir) if upload_dir else (Path(__file__).resolve().parents[1] / "uploads" / "screenshots")
-    directory.mkdir(parents=True, exist_ok=True)
-    app.mount("/uploads/screenshots", StaticFiles(directory=str(directory)), name="screenshots")
+    app.mount("/uploads/screenshots", StaticFiles(directory=str(get_upload_dir())), name="screenshots")
 
     return app
 
@@ -7,9 +7,9 @@ from app.models.ai_usage_log import AIUsageLog
 from app.models.ai_rate_limit import AIRateLimit
 from app.models.login_streak import LoginStreak
 from app.models.command_reference import CommandReference
-from app.models.comptia import ComptiaObjective, StudentObjectiveProgress
-from app.models.mastery import StudentDomainMastery
-from app.models.weekly_lead import WeeklyDomainLead
+from app.models.comptia import ComptiaObjective, StudentDomainReadiness, StudentObjectiveProgress
+from app.models.mastery import MasteryEvent, StudentDomainMastery
+from app.models.weekly_lead import WeeklyDomainLead, WeeklyDomainLeadRun
 from app.models.squad_activity import SquadActivity
 from app.models.learning import Module, Lesson
 from app.models.evidence import EvidenceArtifact
@@ -17,6 +17,10 @@ from app.models.progression import Role, PromotionGate, StudentRole, Methodology
 from app.models.lab import LabTemplate, LabRun
 from app.models.incident import RootCause, Incident, IncidentTicket, IncidentParticipant, RCASubmission
 from app.models.capstone import CapstoneTemplate, CapstoneRun
+from app.models.student_stats import StudentStats
+from app.models.xp_rollup import WeeklyXPFreeze, WeeklyXPSnapshot, XPDailyRollup
+from app.models.notification_outbox import NotificationOutbox
+from app.models.submission_counter import SubmissionCounter
 
 __all__ = [
     "Student",
@@ -33,8 +37,11 @@ __all__ = [
     "CommandReference",
     "ComptiaObjective",
     "StudentObjectiveProgress",
+    "StudentDomainReadiness",
     "StudentDomainMastery",
+    "MasteryEvent",
     "WeeklyDomainLead",
+    "WeeklyDomainLeadRun",
     "SquadActivity",
     "Module",
     "Lesson",
@@ -53,4 +60,10 @@ __all__ = [
     "RCASubmission",
     "CapstoneTemplate",
     "CapstoneRun",
+    "StudentStats",
+    "XPDailyRollup",
+    "WeeklyXPSnapshot",
+    "WeeklyXPFreeze",
+    "NotificationOutbox",
+    "SubmissionCounter",
 ]
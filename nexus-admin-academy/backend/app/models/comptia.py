@@ -15,10 +15,25 @@ class ComptiaObjective(Base):
 
 
 class StudentObjectiveProgress(Base):
+    """Per-objective mastery (0-100), updated by objective_service as tagged quizzes and tickets are graded."""
+
     __tablename__ = "student_objective_progress"
 
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
     objective_id: Mapped[int] = mapped_column(ForeignKey("comptia_objectives.id", ondelete="CASCADE"), primary_key=True)
     mastery_level: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     last_practiced: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class StudentDomainReadiness(Base):
+    """Certification readiness summary: the sum and count of a student's objective mastery levels per domain."""
+
+    __tablename__ = "student_domain_readiness"
+
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    domain: Mapped[str] = mapped_column(String(10), primary_key=True)
+    mastery_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    objectives_practiced: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -18,6 +18,8 @@ class EvidenceArtifact(Base):
     file_size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
     mime_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
     checksum: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    perceptual_hash: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    near_duplicate_of: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
     metadata_json: Mapped[dict] = mapped_column("metadata", JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
     validation_status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
     validation_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -1,10 +1,12 @@
-from sqlalchemy import DateTime, Float, Integer, String, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
 
 
 class StudentDomainMastery(Base):
+    """Per-student, per-domain mastery derived from mastery_events by mastery_service."""
+
     __tablename__ = "student_domain_mastery"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -14,5 +16,26 @@ class StudentDomainMastery(Base):
     quiz_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     ticket_score_total: Mapped[float] = mapped_column(Float, nullable=False, default=0)
     ticket_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Recency-weighted sums, decayed to last_event_at (weight 1 = an event at that instant).
+    quiz_weighted_score: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    quiz_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    ticket_weighted_score: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    ticket_weight: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    last_event_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     mastery_percent: Mapped[float] = mapped_column(Float, nullable=False, default=0)
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class MasteryEvent(Base):
+    """Append-only scored work (a first quiz attempt or a verified ticket) behind domain mastery."""
+
+    __tablename__ = "mastery_events"
+    __table_args__ = (Index("idx_mastery_events_student_domain", "student_id", "domain_id", "created_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
+    domain_id: Mapped[str] = mapped_column(String(10), nullable=False)
+    source_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    source_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
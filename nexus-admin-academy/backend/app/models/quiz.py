@@ -16,6 +16,7 @@ class Quiz(Base):
     week_number: Mapped[int] = mapped_column(Integer, nullable=False)
     domain_id: Mapped[str] = mapped_column(String(10), nullable=False, default="1.0", index=True)
     lesson_id: Mapped[int | None] = mapped_column(ForeignKey("lessons.id", ondelete="SET NULL"), nullable=True, index=True)
+    objective_ids: Mapped[list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     questions = relationship("Question", back_populates="quiz", cascade="all, delete-orphan")
@@ -36,6 +37,7 @@ class Question(Base):
     correct_answer: Mapped[str] = mapped_column(CHAR(1), nullable=False)
     correct_answers: Mapped[str | None] = mapped_column(Text, nullable=True)
     explanation: Mapped[str] = mapped_column(Text, nullable=True)
+    objective_ids: Mapped[list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
 
     quiz = relationship("Quiz", back_populates="questions")
 
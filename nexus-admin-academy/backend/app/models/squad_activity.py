@@ -6,6 +6,8 @@ from app.database import Base
 
 class SquadActivity(Base):
     __tablename__ = "squad_activity"
+    # Fetch created_at on insert so the live feed can publish rows without reloading them.
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     student_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import JSON, DateTime, ForeignKey, Integer, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class StudentStats(Base):
+    """Per-student read model behind /api/students/{id}/stats, maintained by stats_service."""
+
+    __tablename__ = "student_stats"
+
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    total_xp: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quizzes_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quiz_score_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tickets_completed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ticket_score_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    week_progress: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
+    weak_areas: Mapped[list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
+    recent_activity: Mapped[list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
+    cert_readiness: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Boolean, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class SubmissionCounter(Base):
+    """Ticket submission counts per (status, admin_reviewed, graded), maintained by submission_count_service."""
+
+    __tablename__ = "submission_counters"
+
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    admin_reviewed: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+    graded: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Boolean, CheckConstraint, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import JSON, Boolean, CheckConstraint, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -34,6 +34,10 @@ class TicketSubmission(Base):
     __table_args__ = (
         CheckConstraint("ai_score IS NULL OR ai_score BETWEEN 0 AND 10", name="ck_ticket_submissions_ai_score"),
         CheckConstraint("override_score IS NULL OR override_score BETWEEN 0 AND 10", name="ck_ticket_submissions_override_score"),
+        # Keyset pagination of the admin listings: newest first, filtered by status or review state.
+        Index("idx_ticket_submissions_submitted", "submitted_at", "id"),
+        Index("idx_ticket_submissions_status_submitted", "status", "submitted_at", "id"),
+        Index("idx_ticket_submissions_reviewed_submitted", "admin_reviewed", "submitted_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -41,7 +45,7 @@ class TicketSubmission(Base):
     ticket_id: Mapped[int] = mapped_column(ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
     writeup: Mapped[str] = mapped_column(Text, nullable=False)
     commands_used: Mapped[str | None] = mapped_column(Text, nullable=True)
-    ai_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    ai_score: Mapped[int | None] = mapped_column(Integer, nullable=True, active_history=True)
     structure_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
     technical_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
     communication_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -49,7 +53,7 @@ class TicketSubmission(Base):
     ai_feedback: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
     xp_awarded: Mapped[int] = mapped_column(Integer, nullable=False)
     xp_granted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending", index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending", index=True, active_history=True)
     submitted_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     graded_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     verified_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -64,7 +68,7 @@ class TicketSubmission(Base):
     collaborator_ids: Mapped[list] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=list)
     methodology_steps_mentioned: Mapped[dict] = mapped_column(JSON().with_variant(JSONB, "postgresql"), nullable=False, default=dict)
     methodology_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    admin_reviewed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    admin_reviewed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, active_history=True)
     admin_comment: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     student = relationship("Student", back_populates="ticket_submissions")
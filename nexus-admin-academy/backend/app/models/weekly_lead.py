@@ -14,3 +14,13 @@ class WeeklyDomainLead(Base):
     xp_value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     badge_name: Mapped[str] = mapped_column(String(100), nullable=False)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class WeeklyDomainLeadRun(Base):
+    """Marks a week whose domain leads have been computed, including weeks with no leads."""
+
+    __tablename__ = "weekly_domain_lead_runs"
+
+    week_key: Mapped[str] = mapped_column(String(20), primary_key=True)
+    leads: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    computed_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,36 @@
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class XPDailyRollup(Base):
+    __tablename__ = "xp_daily_rollups"
+    __table_args__ = (UniqueConstraint("student_id", "day", name="uq_xp_daily_rollups_student_day"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), nullable=False, index=True)
+    day: Mapped[Date] = mapped_column(Date, nullable=False, index=True)
+    xp: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class WeeklyXPSnapshot(Base):
+    __tablename__ = "weekly_xp_snapshots"
+    __table_args__ = (UniqueConstraint("week_key", "student_id", name="uq_weekly_xp_snapshots_week_student"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    week_key: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
+    xp: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class WeeklyXPFreeze(Base):
+    """Marks a week whose snapshot rows are final, including weeks nobody earned XP in."""
+
+    __tablename__ = "weekly_xp_freezes"
+
+    week_key: Mapped[str] = mapped_column(String(20), primary_key=True)
+    students: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    frozen_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -20,6 +20,10 @@ from app.models.ticket import Ticket
 from app.schemas.resource import ResourceCreateRequest
 from app.services.admin_auth import verify_admin
 from app.services.ai_service import ai_health_test
+from app.services.blob_store import collect_garbage
+from app.services.evidence_worker import REVALIDATE_BATCH_SIZE, evidence_worker
+from app.services.progression_service import promotion_report
+from app.services.upload_service import get_upload_dir
 from app.utils.responses import ok
 
 router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin)])
@@ -265,10 +269,12 @@ def update_ticket_answer_key(ticket_id: int, payload: dict, db: Session = Depend
     return ok({"ticket_id": row.id})
 
 @router.get("/evidence")
-def list_evidence(status: str | None = None, db: Session = Depends(get_db)):
+def list_evidence(status: str | None = None, near_duplicates: bool = False, db: Session = Depends(get_db)):
     q = db.query(EvidenceArtifact)
     if status:
         q = q.filter(EvidenceArtifact.validation_status == status)
+    if near_duplicates:
+        q = q.filter(EvidenceArtifact.near_duplicate_of.isnot(None))
     rows = q.order_by(EvidenceArtifact.uploaded_at.desc()).limit(200).all()
     return ok(
         [
@@ -280,6 +286,7 @@ def list_evidence(status: str | None = None, db: Session = Depends(get_db)):
                 "storage_key": row.storage_key,
                 "validation_status": row.validation_status,
                 "validation_notes": row.validation_notes,
+                "near_duplicate_of": row.near_duplicate_of,
                 "uploaded_at": row.uploaded_at,
             }
             for row in rows
@@ -300,6 +307,18 @@ def review_evidence(artifact_id: int, payload: dict, db: Session = Depends(get_d
     db.commit()
     return ok({"artifact_id": row.id})
 
+@router.post("/evidence/gc")
+def evidence_garbage_collect(dry_run: bool = False, grace_hours: int = 24, db: Session = Depends(get_db)):
+    result = collect_garbage(db, get_upload_dir(), grace_seconds=max(0, grace_hours) * 3600, dry_run=dry_run)
+    return ok(result)
+
+@router.post("/evidence/revalidate")
+async def revalidate_evidence(batch_size: int = REVALIDATE_BATCH_SIZE, db: Session = Depends(get_db)):
+    batch_size = max(1, min(batch_size, 1000))
+    queued = db.query(func.count(EvidenceArtifact.id)).filter(EvidenceArtifact.validated_at.is_(None)).scalar() or 0
+    evidence_worker.schedule_revalidation(batch_size)
+    return ok({"queued": int(queued), "batch_size": batch_size})
+
 @router.get("/methodology/frameworks")
 def list_methodology_frameworks(db: Session = Depends(get_db)):
     rows = db.query(MethodologyFramework).order_by(MethodologyFramework.id.asc()).all()
@@ -341,6 +360,15 @@ def list_promotion_gates(role_id: int | None = None, db: Session = Depends(get_d
         ]
     )
 
+@router.get("/promotions/report")
+def get_promotion_report(role_id: int | None = None, eligible_only: bool = False, db: Session = Depends(get_db)):
+    if role_id is not None and not db.query(Role.id).filter(Role.id == role_id).first():
+        raise HTTPException(status_code=404, detail="Role not found")
+    rows = promotion_report(db, role_id)
+    if eligible_only:
+        rows = [row for row in rows if row["eligible"]]
+    return ok(rows, total=len(rows), page=1, per_page=len(rows) or 1)
+
 @router.get("/labs/templates")
 def list_lab_templates(lesson_id: int | None = None, db: Session = Depends(get_db)):
     q = db.query(LabTemplate)
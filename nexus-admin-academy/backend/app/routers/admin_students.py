@@ -1,17 +1,24 @@
-﻿import logging
-from statistics import mean
+﻿import csv
+import io
+import json
+import logging
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.quiz import Quiz, QuizAttempt
 from app.models.student import Student
 from app.models.ticket import Ticket, TicketSubmission
 from app.models.xp_ledger import XPLedger
 from app.services.activity_service import get_recent_activity
 from app.services.admin_auth import verify_admin
+from app.services.learning_path import cohort_mastery_matrix
+from app.services.stats_service import refresh_student_stats
 from app.utils.responses import ok
 
 router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin)])
@@ -29,33 +36,152 @@ class StudentUpdateRequest(BaseModel):
     admin_notes: str | None = None
 
 
-@router.get("/students/overview")
-def student_overview(db: Session = Depends(get_db)):
-    students = db.query(Student).order_by(Student.total_xp.desc(), Student.id.asc()).all()
-    total_quizzes = db.query(Quiz).count()
-    total_tickets = db.query(Ticket).count()
-
-    data = []
-    for rank, student in enumerate(students, start=1):
-        quiz_attempts = db.query(QuizAttempt).filter(QuizAttempt.student_id == student.id).all()
-        ticket_subs = db.query(TicketSubmission).filter(TicketSubmission.student_id == student.id, TicketSubmission.ai_score.isnot(None)).all()
-        data.append(
-            {
-                "rank": rank,
-                "student_id": student.id,
-                "name": student.name,
-                "email": student.email,
-                "admin_notes": student.admin_notes,
-                "xp": student.total_xp,
-                "quiz_done": len(quiz_attempts),
-                "quiz_total": total_quizzes,
-                "avg_quiz": round(mean([q.score for q in quiz_attempts]), 2) if quiz_attempts else 0,
-                "ticket_done": len(ticket_subs),
-                "ticket_total": total_tickets,
-                "avg_ticket": round(mean([t.ai_score for t in ticket_subs if t.ai_score is not None]), 2) if ticket_subs else 0,
-            }
+OVERVIEW_EXPORT_CHUNK = 500
+OverviewSort = Literal["rank", "name", "xp", "quiz_done", "avg_quiz", "ticket_done", "avg_ticket"]
+OVERVIEW_FIELDS = [
+    "rank",
+    "student_id",
+    "name",
+    "email",
+    "admin_notes",
+    "xp",
+    "quiz_done",
+    "quiz_total",
+    "avg_quiz",
+    "ticket_done",
+    "ticket_total",
+    "avg_ticket",
+]
+
+
+def _overview_query(db: Session, sort: str, order: str):
+    """One statement for every student's row: grouped quiz/ticket aggregates joined onto students.
+
+    rank is the XP ranking (XP desc, id asc) whatever the requested sort.
+    """
+    quizzes = (
+        db.query(
+            QuizAttempt.student_id.label("student_id"),
+            func.count(QuizAttempt.id).label("done"),
+            func.avg(QuizAttempt.score).label("avg"),
         )
-    return ok(data, total=len(data), page=1, per_page=len(data) or 1)
+        .group_by(QuizAttempt.student_id)
+        .subquery()
+    )
+    tickets = (
+        db.query(
+            TicketSubmission.student_id.label("student_id"),
+            func.count(TicketSubmission.id).label("done"),
+            func.avg(TicketSubmission.ai_score).label("avg"),
+        )
+        .filter(TicketSubmission.ai_score.isnot(None))
+        .group_by(TicketSubmission.student_id)
+        .subquery()
+    )
+    rank = func.row_number().over(order_by=(Student.total_xp.desc(), Student.id.asc()))
+    columns = {
+        "rank": rank,
+        "name": Student.name,
+        "xp": Student.total_xp,
+        "quiz_done": func.coalesce(quizzes.c.done, 0),
+        "avg_quiz": func.coalesce(quizzes.c.avg, 0),
+        "ticket_done": func.coalesce(tickets.c.done, 0),
+        "avg_ticket": func.coalesce(tickets.c.avg, 0),
+    }
+    sort_column = columns[sort].desc() if order == "desc" else columns[sort].asc()
+    return (
+        db.query(
+            rank.label("rank"),
+            Student.id,
+            Student.name,
+            Student.email,
+            Student.admin_notes,
+            Student.total_xp,
+            columns["quiz_done"].label("quiz_done"),
+            columns["avg_quiz"].label("avg_quiz"),
+            columns["ticket_done"].label("ticket_done"),
+            columns["avg_ticket"].label("avg_ticket"),
+            db.query(func.count(Quiz.id)).scalar_subquery().label("quiz_total"),
+            db.query(func.count(Ticket.id)).scalar_subquery().label("ticket_total"),
+        )
+        .outerjoin(quizzes, quizzes.c.student_id == Student.id)
+        .outerjoin(tickets, tickets.c.student_id == Student.id)
+        .order_by(sort_column, Student.total_xp.desc(), Student.id.asc())
+    )
+
+
+def _overview_row(row) -> dict:
+    return {
+        "rank": row.rank,
+        "student_id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "admin_notes": row.admin_notes,
+        "xp": row.total_xp,
+        "quiz_done": int(row.quiz_done),
+        "quiz_total": int(row.quiz_total or 0),
+        "avg_quiz": round(float(row.avg_quiz), 2),
+        "ticket_done": int(row.ticket_done),
+        "ticket_total": int(row.ticket_total or 0),
+        "avg_ticket": round(float(row.avg_ticket), 2),
+    }
+
+
+@router.get("/students/overview")
+def student_overview(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    sort: OverviewSort = "rank",
+    order: Literal["asc", "desc"] = "asc",
+    db: Session = Depends(get_db),
+):
+    total = db.query(func.count(Student.id)).scalar() or 0
+    rows = _overview_query(db, sort, order).offset((page - 1) * per_page).limit(per_page).all()
+    return ok([_overview_row(row) for row in rows], total=total, page=page, per_page=per_page)
+
+
+def _export_overview(format: str, sort: str, order: str):
+    # Own session: the request's session is closed before a streamed body is sent.
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=OVERVIEW_FIELDS)
+        if format == "csv":
+            writer.writeheader()
+        chunk = 0
+        for row in _overview_query(db, sort, order).yield_per(OVERVIEW_EXPORT_CHUNK):
+            if format == "csv":
+                writer.writerow(_overview_row(row))
+            else:
+                buffer.write(json.dumps(_overview_row(row)) + "\n")
+            chunk += 1
+            if chunk == OVERVIEW_EXPORT_CHUNK:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                chunk = 0
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/students/overview/export")
+def export_student_overview(
+    format: Literal["csv", "ndjson"] = "csv",
+    sort: OverviewSort = "rank",
+    order: Literal["asc", "desc"] = "asc",
+):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_overview(format, sort, order),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="student-overview.{format}"'},
+    )
+
+
+@router.get("/students/mastery-matrix")
+def student_mastery_matrix(module_id: list[int] | None = Query(default=None), db: Session = Depends(get_db)):
+    return ok(cohort_mastery_matrix(db, module_id))
 
 
 @router.get("/students/{student_id}/activity")
@@ -110,6 +236,7 @@ def create_student(payload: StudentCreateRequest, db: Session = Depends(get_db))
             )
         )
 
+    refresh_student_stats(db, [student.id])
     db.commit()
     db.refresh(student)
     return ok({"student_id": student.id, "name": student.name, "email": student.email})
@@ -145,19 +272,5 @@ def delete_student(student_id: int, db: Session = Depends(get_db)):
 
 @router.get("/squad/activity")
 def admin_squad_activity(limit: int = 30, db: Session = Depends(get_db)):
-    rows = get_recent_activity(db, limit=max(1, min(limit, 100)))
-    data = []
-    for row in rows:
-        student = db.query(Student).filter(Student.id == row.student_id).first()
-        data.append(
-            {
-                "id": row.id,
-                "student_id": row.student_id,
-                "student_name": student.name if student else f"Student {row.student_id}",
-                "activity_type": row.activity_type,
-                "title": row.title,
-                "detail": row.detail,
-                "created_at": row.created_at,
-            }
-        )
+    data = get_recent_activity(db, limit=max(1, min(limit, 100)))
     return ok(data, total=len(data), page=1, per_page=len(data) or 1)
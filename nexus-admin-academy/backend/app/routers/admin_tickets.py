@@ -3,9 +3,9 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from statistics import mean
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, aliased, selectinload
 
 from app.database import get_db
 from app.models.ai_usage_log import AIUsageLog
@@ -23,16 +23,19 @@ from app.models.ticket import Ticket, TicketSubmission
 from app.models.xp_ledger import XPLedger
 from app.schemas.quiz import BulkTicketGenerateRequest, QuizGenerateRequest
 from app.schemas.resource import ResourceCreateRequest
-from app.schemas.ticket import ManualReviewRequest, OverrideRequest, TicketCreateRequest
+from app.schemas.ticket import BulkReviewRequest, ManualReviewRequest, OverrideRequest, TicketCreateRequest
 from app.services.activity_service import get_recent_activity, log_activity
 from app.services.admin_auth import verify_admin
 from app.services.ai_service import ai_health_test
 from app.services.cve_service import fetch_recent_cves, generate_security_ticket_from_cve
-from app.services.mastery_service import record_ticket_mastery_verified
+from app.services.mastery_service import record_ticket_mastery_verified_many
+from app.services.objective_service import record_objective_scores, ticket_objective_scores
 from app.services.quiz_generator import generate_quiz_from_video
 from app.services.squad_service import get_weekly_domain_leads, recompute_weekly_domain_leads
+from app.services.stats_service import refresh_student_stats
+from app.services.submission_count_service import count_submissions, submission_counts, summarize_counts
 from app.services.ticket_generator import generate_ticket_description
-from app.services.xp_service import award_xp
+from app.services.xp_service import award_xp_many
 from app.utils.responses import ok
 
 router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin)])
@@ -70,30 +73,121 @@ def create_ticket(payload: TicketCreateRequest, db: Session = Depends(get_db)):
     db.refresh(ticket)
     return ok({"ticket_id": ticket.id, "title": ticket.title})
 
-@router.get("/submissions")
-def list_submissions(student_id: int | None = None, ticket_id: int | None = None, db: Session = Depends(get_db)):
-    query = db.query(TicketSubmission).options(selectinload(TicketSubmission.student), selectinload(TicketSubmission.ticket))
+def _submissions_query(
+    db: Session,
+    *,
+    graded_only: bool = False,
+    status: str | None = None,
+    reviewed: bool | None = None,
+    week: int | None = None,
+    student_id: int | None = None,
+    ticket_id: int | None = None,
+):
+    """Listing projection: submission columns plus student name and ticket title, no ORM entities."""
+    query = (
+        db.query(
+            TicketSubmission.id,
+            TicketSubmission.student_id,
+            Student.name.label("student_name"),
+            Ticket.title.label("ticket_title"),
+            Ticket.week_number,
+            TicketSubmission.ai_score,
+            TicketSubmission.final_score,
+            TicketSubmission.submitted_at,
+            TicketSubmission.admin_reviewed,
+            TicketSubmission.collaborator_ids,
+            TicketSubmission.status,
+            TicketSubmission.xp_granted,
+        )
+        .join(Student, Student.id == TicketSubmission.student_id)
+        .join(Ticket, Ticket.id == TicketSubmission.ticket_id)
+    )
+    if graded_only:
+        query = query.filter(TicketSubmission.ai_score.isnot(None))
+    if status is not None:
+        query = query.filter(TicketSubmission.status == status)
+    if reviewed is not None:
+        query = query.filter(TicketSubmission.admin_reviewed == reviewed)
+    if week is not None:
+        query = query.filter(Ticket.week_number == week)
     if student_id is not None:
         query = query.filter(TicketSubmission.student_id == student_id)
     if ticket_id is not None:
         query = query.filter(TicketSubmission.ticket_id == ticket_id)
+    return query
+
+
+def _keyset_page(query, cursor: int | None, per_page: int) -> tuple[list, int | None]:
+    """Newest-first page after the submission id in cursor, walking (submitted_at, id) on the composite indexes.
+
+    The cursor row's timestamp is compared in SQL rather than round-tripped
+    through Python, so stored and bound datetime formats cannot disagree.
+    """
+    if cursor is not None:
+        anchor = aliased(TicketSubmission)
+        anchor_at = select(anchor.submitted_at).where(anchor.id == cursor).scalar_subquery()
+        query = query.filter(
+            or_(
+                TicketSubmission.submitted_at < anchor_at,
+                and_(TicketSubmission.submitted_at == anchor_at, TicketSubmission.id < cursor),
+            )
+        )
+    rows = query.order_by(TicketSubmission.submitted_at.desc(), TicketSubmission.id.desc()).limit(per_page + 1).all()
+    next_cursor = rows[per_page - 1].id if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def _display_score(row) -> int | None:
+    return row.final_score if row.final_score is not None else row.ai_score
 
-    submissions = query.order_by(TicketSubmission.submitted_at.desc()).all()
+
+def _submissions_summary(db: Session, query) -> dict:
+    """Cohort figures over every row the listing matches, not just the page sent back."""
+    average, students = query.order_by(None).with_entities(
+        func.avg(func.coalesce(TicketSubmission.final_score, TicketSubmission.ai_score, 0)),
+        func.count(func.distinct(TicketSubmission.student_id)),
+    ).one()
+    return {
+        "average_score": round(float(average or 0), 1),
+        "students_submitted": students,
+        "student_count": db.query(func.count(Student.id)).scalar(),
+    }
+
+
+@router.get("/submissions")
+def list_submissions(
+    student_id: int | None = None,
+    ticket_id: int | None = None,
+    status: str | None = None,
+    reviewed: bool | None = None,
+    week: int | None = Query(None, ge=1),
+    cursor: int | None = Query(None, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    query = _submissions_query(db, status=status, reviewed=reviewed, week=week, student_id=student_id, ticket_id=ticket_id)
+    rows, next_cursor = _keyset_page(query, cursor, per_page)
+    if student_id is None and ticket_id is None and week is None:
+        total = count_submissions(submission_counts(db), status=status, reviewed=reviewed)
+    else:
+        total = query.order_by(None).count()
     data = [
         {
-            "id": s.id,
-            "student_name": s.student.name,
-            "ticket_title": s.ticket.title,
-            "ai_score": s.final_score if s.final_score is not None else s.ai_score,
-            "submitted_at": s.submitted_at,
-            "admin_reviewed": s.admin_reviewed,
-            "collaborator_ids": s.collaborator_ids,
-            "status": s.status,
-            "xp_granted": s.xp_granted,
+            "id": row.id,
+            "student_name": row.student_name,
+            "ticket_title": row.ticket_title,
+            "ai_score": _display_score(row),
+            "submitted_at": row.submitted_at,
+            "admin_reviewed": row.admin_reviewed,
+            "collaborator_ids": row.collaborator_ids,
+            "status": row.status,
+            "xp_granted": row.xp_granted,
         }
-        for s in submissions
+        for row in rows
     ]
-    return ok(data, total=len(data), page=1, per_page=len(data) or 1)
+    # Only the first page carries the summary; later pages would repeat the same scan.
+    summary = _submissions_summary(db, query) if cursor is None else None
+    return {**ok(data, total=total, per_page=per_page), "next_cursor": next_cursor, "summary": summary}
 
 @router.get("/submissions/{submission_id}")
 def submission_details(submission_id: int, db: Session = Depends(get_db)):
@@ -145,21 +239,20 @@ def override_grade(submission_id: int, payload: OverrideRequest, db: Session = D
     submission.xp_awarded = new_xp_each
 
     if submission.xp_granted and delta != 0:
-        for sid in participants:
-            award_xp(
-                db,
-                student_id=sid,
-                delta=delta,
-                source_type="admin_override",
-                source_id=submission.id,
-                description=f"Manual review adjustment for ticket {submission.ticket_id}",
-            )
+        award_xp_many(
+            db,
+            participants,
+            delta=delta,
+            source_type="admin_override",
+            source_id=submission.id,
+            description=f"Manual review adjustment for ticket {submission.ticket_id}",
+        )
     elif not submission.xp_granted:
         submission.status = "pending"
 
+    refresh_student_stats(db, participants)
     db.commit()
     log_activity(
-        db,
         submission.student_id,
         "ticket_override",
         submission.ticket.title if submission.ticket else f"Ticket {submission.ticket_id}",
@@ -168,20 +261,28 @@ def override_grade(submission_id: int, payload: OverrideRequest, db: Session = D
     return ok({"submission_id": submission.id, "old_score": old_score, "new_score": payload.new_score, "xp_difference_per_student": delta})
 
 @router.get("/review")
-def review_queue(db: Session = Depends(get_db)):
-    rows = (
-        db.query(TicketSubmission)
-        .options(selectinload(TicketSubmission.student), selectinload(TicketSubmission.ticket))
-        .filter(TicketSubmission.ai_score.isnot(None))
-        .order_by(TicketSubmission.submitted_at.desc())
-        .all()
-    )
+def review_queue(
+    status: str | None = None,
+    reviewed: bool | None = None,
+    week: int | None = Query(None, ge=1),
+    cursor: int | None = Query(None, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    query = _submissions_query(db, graded_only=True, status=status, reviewed=reviewed, week=week)
+    rows, next_cursor = _keyset_page(query, cursor, per_page)
+    counts = submission_counts(db)
+    if week is None:
+        total = count_submissions(counts, status=status, reviewed=reviewed, graded=True)
+    else:
+        total = query.order_by(None).count()
     data = [
         {
             "submission_id": row.id,
-            "student_name": row.student.name,
-            "ticket_title": row.ticket.title,
-            "ai_score": row.final_score if row.final_score is not None else row.ai_score,
+            "student_name": row.student_name,
+            "ticket_title": row.ticket_title,
+            "week_number": row.week_number,
+            "ai_score": _display_score(row),
             "admin_reviewed": row.admin_reviewed,
             "status": row.status,
             "xp_granted": row.xp_granted,
@@ -189,7 +290,11 @@ def review_queue(db: Session = Depends(get_db)):
         }
         for row in rows
     ]
-    return ok(data, total=len(data), page=1, per_page=len(data) or 1)
+    return {
+        **ok(data, total=total, per_page=per_page),
+        "next_cursor": next_cursor,
+        "counts": summarize_counts(counts, graded=True),
+    }
 
 @router.put("/review/{submission_id}")
 def manual_review(submission_id: int, payload: ManualReviewRequest, db: Session = Depends(get_db)):
@@ -212,15 +317,14 @@ def verify_proof(submission_id: int, comment: str | None = None, db: Session = D
 
     submission.status = "in_review"
     participants = [submission.student_id] + [int(x) for x in (submission.collaborator_ids or [])]
-    for sid in participants:
-        award_xp(
-            db,
-            student_id=sid,
-            delta=submission.xp_awarded,
-            source_type="ticket",
-            source_id=submission.id,
-            description=f"Ticket verified: {submission.ticket.title if submission.ticket else submission.ticket_id}",
-        )
+    award_xp_many(
+        db,
+        participants,
+        delta=submission.xp_awarded,
+        source_type="ticket",
+        source_id=submission.id,
+        description=f"Ticket verified: {submission.ticket.title if submission.ticket else submission.ticket_id}",
+    )
 
     submission.xp_granted = True
     submission.status = "passed"
@@ -228,15 +332,14 @@ def verify_proof(submission_id: int, comment: str | None = None, db: Session = D
     submission.admin_comment = comment or submission.admin_comment
     submission.verified_at = datetime.utcnow()
     submission.verified_by = 0
-    db.commit()
-
     ticket_domain = submission.ticket.domain_id if submission.ticket else "1.0"
     score_for_mastery = int(submission.final_score if submission.final_score is not None else submission.ai_score or 0)
-    for sid in participants:
-        record_ticket_mastery_verified(db, sid, ticket_domain, score_for_mastery)
+    record_ticket_mastery_verified_many(db, [(sid, ticket_domain, score_for_mastery, submission.id) for sid in dict.fromkeys(participants)])
+    record_objective_scores(db, ticket_objective_scores(db, submission.ticket, participants, score_for_mastery))
+    refresh_student_stats(db, participants)
+    db.commit()
 
     log_activity(
-        db,
         submission.student_id,
         "ticket_verified",
         submission.ticket.title if submission.ticket else f"Ticket {submission.ticket_id}",
@@ -266,6 +369,106 @@ def reject_proof(submission_id: int, comment: str | None = None, db: Session = D
     db.commit()
     return ok({"submission_id": submission.id, "status": submission.status})
 
+@router.post("/submissions/bulk-review")
+def bulk_review(payload: BulkReviewRequest, db: Session = Depends(get_db)):
+    """Verify or reject many submissions in one transaction, with an outcome per id.
+
+    Items that cannot be processed (missing, ungraded, already passed, XP already
+    granted, unknown participant) are reported and skipped; the rest commit together.
+    """
+    submission_ids = list(dict.fromkeys(payload.submission_ids))
+    submissions = {
+        row.id: row
+        for row in db.query(TicketSubmission)
+        .options(selectinload(TicketSubmission.ticket))
+        .filter(TicketSubmission.id.in_(submission_ids))
+        .all()
+    }
+    participants_by_id = {
+        row.id: [row.student_id] + [int(x) for x in (row.collaborator_ids or [])] for row in submissions.values()
+    }
+    all_participants = {sid for participants in participants_by_id.values() for sid in participants}
+    known_students = {row.id for row in db.query(Student.id).filter(Student.id.in_(all_participants)).all()}
+
+    results = []
+    verified = []
+    now = datetime.utcnow()
+    for submission_id in submission_ids:
+        submission = submissions.get(submission_id)
+        outcome = None
+        if not submission:
+            outcome = "not_found"
+        elif payload.action == "reject":
+            if submission.xp_granted:
+                outcome = "xp_granted"
+            else:
+                submission.status = "needs_revision"
+                submission.admin_reviewed = True
+                submission.admin_comment = payload.comment or submission.admin_comment
+                outcome = "rejected"
+        elif submission.ai_score is None:
+            outcome = "not_graded"
+        elif submission.status == "passed" and submission.xp_granted:
+            outcome = "already_passed"
+        elif not set(participants_by_id[submission_id]) <= known_students:
+            outcome = "student_not_found"
+        else:
+            submission.xp_granted = True
+            submission.status = "passed"
+            submission.admin_reviewed = True
+            submission.admin_comment = payload.comment or submission.admin_comment
+            submission.verified_at = now
+            submission.verified_by = 0
+            verified.append(submission)
+            outcome = "verified"
+        results.append(
+            {
+                "submission_id": submission_id,
+                "outcome": outcome,
+                "status": submission.status if submission else None,
+            }
+        )
+
+    mastery_results = []
+    objective_scores = []
+    affected: set[int] = set()
+    for submission in verified:
+        participants = participants_by_id[submission.id]
+        ticket_title = submission.ticket.title if submission.ticket else submission.ticket_id
+        award_xp_many(
+            db,
+            participants,
+            delta=submission.xp_awarded,
+            source_type="ticket",
+            source_id=submission.id,
+            description=f"Ticket verified: {ticket_title}",
+        )
+        ticket_domain = submission.ticket.domain_id if submission.ticket else "1.0"
+        score_for_mastery = int(submission.final_score if submission.final_score is not None else submission.ai_score or 0)
+        mastery_results.extend((sid, ticket_domain, score_for_mastery, submission.id) for sid in dict.fromkeys(participants))
+        objective_scores.extend(ticket_objective_scores(db, submission.ticket, participants, score_for_mastery))
+        affected.update(participants)
+    record_ticket_mastery_verified_many(db, mastery_results)
+    record_objective_scores(db, objective_scores)
+    refresh_student_stats(db, list(affected))
+    db.commit()
+
+    for submission in verified:
+        score_for_mastery = int(submission.final_score if submission.final_score is not None else submission.ai_score or 0)
+        log_activity(
+            submission.student_id,
+            "ticket_verified",
+            submission.ticket.title if submission.ticket else f"Ticket {submission.ticket_id}",
+            f"Verified score {score_for_mastery}/10",
+        )
+    logger.info(
+        "bulk_review action=%s requested=%s processed=%s",
+        payload.action,
+        len(submission_ids),
+        sum(1 for item in results if item["outcome"] in ("verified", "rejected")),
+    )
+    return ok(results, total=len(results), page=1, per_page=len(results) or 1)
+
 @router.post("/tickets/bulk-generate")
 async def bulk_generate_tickets(payload: BulkTicketGenerateRequest, db: Session = Depends(get_db)):
     try:
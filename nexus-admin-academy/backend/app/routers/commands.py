@@ -1,21 +1,20 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.command_reference import CommandReference
+from app.services.search_service import search_commands as search_command_index
 
 router = APIRouter(prefix="/api/commands", tags=["commands"])
 
 
 @router.get("/search")
 def search_commands(q: str = "", db: Session = Depends(get_db)):
-    query = db.query(CommandReference)
     term = (q or "").strip()
     if term:
-        like = f"%{term}%"
-        query = query.filter(or_(CommandReference.command.ilike(like), CommandReference.description.ilike(like)))
-    rows = query.order_by(CommandReference.command.asc()).limit(25).all()
+        rows = search_command_index(db, term, limit=25, include_syntax=False)
+    else:
+        rows = db.query(CommandReference).order_by(CommandReference.command.asc()).limit(25).all()
 
     return {
         "success": True,
@@ -7,8 +7,11 @@ from app.database import get_db
 from app.models.quiz import Quiz, QuizAttempt
 from app.models.student import Student
 from app.schemas.quiz import QuizSubmitRequest
-from app.services.activity_service import log_activity, mark_student_active
+from app.services.activity_service import log_activity
 from app.services.mastery_service import record_quiz_mastery
+from app.services.objective_service import record_quiz_objectives
+from app.services.presence_service import presence
+from app.services.stats_service import refresh_student_stats
 from app.services.xp_service import award_xp
 from app.utils.responses import ok
 
@@ -115,7 +118,7 @@ def submit_quiz(quiz_id: int, payload: QuizSubmitRequest, db: Session = Depends(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    mark_student_active(db, student_id)
+    presence.touch(student_id)
 
     questions = sorted(quiz.questions, key=lambda q: q.id)
     total_questions = len(questions)
@@ -181,13 +184,16 @@ def submit_quiz(quiz_id: int, payload: QuizSubmitRequest, db: Session = Depends(
                 source_id=attempt.id,
                 description=f"Quiz: {quiz.title} (Score: {score}/{total_questions})",
             )
-        record_quiz_mastery(db, student_id, quiz.domain_id, score)
-        log_activity(db, student_id, "quiz_passed", quiz.title, f"Score {score}/{total_questions}")
+        record_quiz_objectives(db, student_id, quiz, results)
+        refresh_student_stats(db, [student_id])
+        record_quiz_mastery(db, student_id, quiz.domain_id, score, source_id=attempt.id)
+        log_activity(student_id, "quiz_passed", quiz.title, f"Score {score}/{total_questions}")
     else:
         existing.answers = answers
         existing.results = results
         existing.score = score
         existing.best_score = max(existing.best_score or 0, score)
+        refresh_student_stats(db, [student_id])
         db.commit()
 
     if is_first_attempt:
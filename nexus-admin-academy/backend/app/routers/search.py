@@ -1,10 +1,8 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models.command_reference import CommandReference
-from app.models.learning import Lesson
+from app.services.search_service import search_commands, search_lessons
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
@@ -15,27 +13,8 @@ def global_search(q: str = "", db: Session = Depends(get_db)):
     if not term:
         return {"success": True, "data": {"lessons": [], "commands": []}}
 
-    like = f"%{term}%"
-    lessons = (
-        db.query(Lesson)
-        .filter(or_(Lesson.title.ilike(like), Lesson.summary.ilike(like)))
-        .order_by(Lesson.lesson_order.asc())
-        .limit(10)
-        .all()
-    )
-    commands = (
-        db.query(CommandReference)
-        .filter(
-            or_(
-                CommandReference.command.ilike(like),
-                CommandReference.syntax.ilike(like),
-                CommandReference.description.ilike(like),
-            )
-        )
-        .order_by(CommandReference.command.asc())
-        .limit(10)
-        .all()
-    )
+    lessons = search_lessons(db, term, limit=10)
+    commands = search_commands(db, term, limit=10)
     return {
         "success": True,
         "data": {
@@ -1,54 +1,34 @@
+import asyncio
+import json
 from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models.comptia import ComptiaObjective, StudentObjectiveProgress
-from app.models.learning import Lesson, Module
-from app.models.login_streak import LoginStreak
-from app.models.progression import MethodologyFramework, StudentMethodologyProgress
-from app.models.quiz import Quiz, QuizAttempt
+from app.database import SessionLocal, get_db
+from app.models.progression import StudentMethodologyProgress
+from app.models.quiz import QuizAttempt
 from app.models.student import Student
-from app.models.squad_activity import SquadActivity
-from app.models.ticket import Ticket, TicketSubmission
+from app.models.ticket import TicketSubmission
 from app.models.xp_ledger import XPLedger
-from app.services.activity_service import mark_student_active
+from app.services.activity_service import activity_feed, get_recent_activity
+from app.services.leaderboard_service import leaderboard
+from app.services.learning_path import learning_path_cache
 from app.services.mastery_service import list_student_mastery
-from app.services.methodology_enforcer import can_access_tickets
-from app.services.progression_service import check_module_unlock, get_module_mastery, get_promotion_status
+from app.services.methodology_enforcer import methodology_access
+from app.services.presence_service import presence
+from app.services.progression_service import get_promotion_status
 from app.services.squad_service import get_weekly_domain_leads
+from app.services.stats_service import get_cert_readiness_summary, get_student_stats_view
 from app.services.xp_calculator import level_from_xp
+from app.services.xp_rollup_service import month_bounds, ranked_xp, utc_today, validate_range, week_bounds, weekly_leaderboard
 from app.utils.responses import ok
 
 router = APIRouter(tags=["students"])
 
-
-def update_login_streak(db: Session, student_id: int) -> LoginStreak:
-    today = date.today()
-    streak = db.query(LoginStreak).filter(LoginStreak.student_id == student_id).first()
-
-    if streak is None:
-        streak = LoginStreak(student_id=student_id, current_streak=1, longest_streak=1, last_login=today)
-        db.add(streak)
-        db.commit()
-        db.refresh(streak)
-        return streak
-
-    if streak.last_login == today:
-        return streak
-
-    if streak.last_login == today - timedelta(days=1):
-        streak.current_streak += 1
-        streak.longest_streak = max(streak.longest_streak, streak.current_streak)
-    else:
-        streak.current_streak = 1
-
-    streak.last_login = today
-    db.commit()
-    db.refresh(streak)
-    return streak
+STREAM_KEEPALIVE_SECONDS = 15
 
 
 @router.post("/api/students/{student_id}/check-in")
@@ -56,8 +36,7 @@ def student_check_in(student_id: int, db: Session = Depends(get_db)):
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    mark_student_active(db, student_id)
-    streak = update_login_streak(db, student_id)
+    streak = presence.check_in(db, student_id)
     return {"success": True, "streak": streak.current_streak, "longest_streak": streak.longest_streak}
 
 
@@ -106,138 +85,10 @@ def get_student_dashboard(student_id: int, db: Session = Depends(get_db)):
 
 @router.get("/api/students/{student_id}/stats")
 def get_student_stats(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
+    data = get_student_stats_view(db, student_id)
+    if data is None:
         raise HTTPException(status_code=404, detail="Student not found")
-
-    streak = update_login_streak(db, student_id)
-    level, level_name = level_from_xp(student.total_xp)
-
-    quiz_stats = (
-        db.query(func.count(QuizAttempt.id).label("completed"), func.coalesce(func.avg(QuizAttempt.score), 0).label("avg_score"))
-        .filter(QuizAttempt.student_id == student_id)
-        .first()
-    )
-    total_quizzes = db.query(func.count(Quiz.id)).scalar() or 0
-
-    ticket_stats = (
-        db.query(func.count(TicketSubmission.id).label("completed"), func.coalesce(func.avg(TicketSubmission.ai_score), 0).label("avg_score"))
-        .filter(TicketSubmission.student_id == student_id, TicketSubmission.status == "passed")
-        .first()
-    )
-    total_tickets = db.query(func.count(Ticket.id)).scalar() or 0
-
-    week_number = 1
-    week_quizzes = db.query(func.count(Quiz.id)).filter(Quiz.week_number == week_number).scalar() or 0
-    week_tickets = db.query(func.count(Ticket.id)).filter(Ticket.week_number == week_number).scalar() or 0
-    week_completed_q = db.query(func.count(QuizAttempt.id)).join(Quiz, QuizAttempt.quiz_id == Quiz.id).filter(QuizAttempt.student_id == student_id, Quiz.week_number == week_number).scalar() or 0
-    week_completed_t = (
-        db.query(func.count(TicketSubmission.id))
-        .join(Ticket, TicketSubmission.ticket_id == Ticket.id)
-        .filter(TicketSubmission.student_id == student_id, Ticket.week_number == week_number, TicketSubmission.status == "passed")
-        .scalar()
-        or 0
-    )
-    week_total = week_quizzes + week_tickets
-    week_done = week_completed_q + week_completed_t
-    week_completion = round((week_done / week_total) * 100, 1) if week_total else 0
-
-    quiz_activity = (
-        db.query(
-            QuizAttempt.completed_at.label("timestamp"),
-            Quiz.title.label("title"),
-            QuizAttempt.score.label("score"),
-            QuizAttempt.xp_awarded.label("xp"),
-        )
-        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
-        .filter(QuizAttempt.student_id == student_id)
-        .all()
-    )
-    ticket_activity = (
-        db.query(
-            TicketSubmission.submitted_at.label("timestamp"),
-            Ticket.title.label("title"),
-            TicketSubmission.ai_score.label("score"),
-            TicketSubmission.xp_awarded.label("xp"),
-        )
-        .join(Ticket, Ticket.id == TicketSubmission.ticket_id)
-        .filter(TicketSubmission.student_id == student_id, TicketSubmission.status == "passed")
-        .all()
-    )
-
-    recent_activity = [
-        {"type": "quiz", "title": row.title, "score": row.score, "xp": row.xp, "timestamp": row.timestamp}
-        for row in quiz_activity
-    ] + [
-        {"type": "ticket", "title": row.title, "score": row.score, "xp": row.xp, "timestamp": row.timestamp}
-        for row in ticket_activity
-    ]
-    recent_activity.sort(key=lambda x: x["timestamp"] or datetime.min, reverse=True)
-    recent_activity = recent_activity[:5]
-
-    weak_rows = (
-        db.query(
-            Ticket.category.label("category"),
-            func.count(TicketSubmission.id).label("attempts"),
-            func.coalesce(func.avg(TicketSubmission.ai_score), 0).label("avg_score"),
-        )
-        .join(Ticket, Ticket.id == TicketSubmission.ticket_id)
-        .filter(TicketSubmission.student_id == student_id, TicketSubmission.status == "passed")
-        .group_by(Ticket.category)
-        .having(func.avg(TicketSubmission.ai_score) < 6)
-        .order_by(func.avg(TicketSubmission.ai_score).asc())
-        .all()
-    )
-
-    cohort = (
-        db.query(Student.id, Student.total_xp)
-        .filter(Student.id != student_id)
-        .all()
-    )
-    cohort_xp_values = [row.total_xp for row in cohort]
-    avg_xp = round(sum(cohort_xp_values) / len(cohort_xp_values), 0) if cohort_xp_values else 0
-    percentile = round(((student.total_xp - avg_xp) / avg_xp) * 100, 1) if avg_xp else 0
-
-    cohort_quiz_avg = (
-        db.query(func.coalesce(func.avg(QuizAttempt.score), 0))
-        .join(Student, Student.id == QuizAttempt.student_id)
-        .filter(Student.id != student_id)
-        .scalar()
-        or 0
-    )
-
-    cert = get_cert_readiness(student_id, db)
-
-    return {
-        "success": True,
-        "name": student.name,
-        "total_xp": student.total_xp,
-        "level": level,
-        "level_name": level_name,
-        "quizzes_completed": int(quiz_stats.completed or 0),
-        "total_quizzes": int(total_quizzes),
-        "avg_quiz_score": round(float(quiz_stats.avg_score or 0), 1),
-        "tickets_completed": int(ticket_stats.completed or 0),
-        "total_tickets": int(total_tickets),
-        "avg_ticket_score": round(float(ticket_stats.avg_score or 0), 1),
-        "current_week": week_number,
-        "week_completion": week_completion,
-        "recent_activity": recent_activity,
-        "weak_areas": [
-            {"topic": row.category or "general", "avg_score": round(float(row.avg_score or 0), 1), "attempts": int(row.attempts or 0)}
-            for row in weak_rows
-        ],
-        "streak": streak.current_streak,
-        "longest_streak": streak.longest_streak,
-        "cohort_comparison": {
-            "your_xp": student.total_xp,
-            "avg_xp": avg_xp,
-            "percentile": percentile,
-            "your_quiz_avg": round(float(quiz_stats.avg_score or 0), 1),
-            "cohort_quiz_avg": round(float(cohort_quiz_avg), 1),
-        },
-        "cert_readiness": cert["data"],
-    }
+    return {"success": True, **data}
 
 
 @router.get("/api/students/{student_id}/certification-readiness")
@@ -245,61 +96,67 @@ def get_cert_readiness(student_id: int, db: Session = Depends(get_db)):
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-
-    total_objectives = db.query(func.count(ComptiaObjective.id)).scalar() or 0
-
-    mastery_rows = (
-        db.query(
-            ComptiaObjective.domain.label("domain"),
-            func.coalesce(func.avg(StudentObjectiveProgress.mastery_level), 0).label("avg_mastery"),
-        )
-        .outerjoin(
-            StudentObjectiveProgress,
-            (ComptiaObjective.id == StudentObjectiveProgress.objective_id)
-            & (StudentObjectiveProgress.student_id == student_id),
-        )
-        .group_by(ComptiaObjective.domain)
-        .order_by(ComptiaObjective.domain)
-        .all()
-    )
-
-    overall = (
-        db.query(func.coalesce(func.avg(StudentObjectiveProgress.mastery_level), 0))
-        .filter(StudentObjectiveProgress.student_id == student_id)
-        .scalar()
-        or 0
-    )
-
-    data = {
-        "overall_readiness": round(float(overall), 1),
-        "by_domain": [{"domain": row.domain, "readiness": round(float(row.avg_mastery), 1)} for row in mastery_rows],
-        "total_objectives": int(total_objectives),
-    }
-    return {"success": True, "data": data}
+    return {"success": True, "data": get_cert_readiness_summary(db, student_id)}
 
 
 @router.get("/api/leaderboard")
-def get_leaderboard(db: Session = Depends(get_db)):
-    students = db.query(Student).order_by(Student.total_xp.desc(), Student.id.asc()).all()
-    entries = []
-    for rank, student in enumerate(students, start=1):
-        level, _ = level_from_xp(student.total_xp)
-        entries.append(
-            {
-                "rank": rank,
-                "student_id": student.id,
-                "name": student.name,
-                "total_xp": student.total_xp,
-                "level": level,
-            }
-        )
-    return ok(entries, total=len(entries), page=1, per_page=len(entries) or 1)
+def get_leaderboard(page: int = Query(1, ge=1), per_page: int = Query(50, ge=1, le=200), db: Session = Depends(get_db)):
+    entries, total = leaderboard.page(db, page, per_page)
+    return ok(entries, total=total, page=page, per_page=per_page)
+
+
+@router.get("/api/leaderboard/weekly")
+def get_weekly_leaderboard(
+    week: str | None = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    entries, total, week_key = weekly_leaderboard(db, week, page, per_page)
+    start, end = week_bounds(week_key)
+    return {"success": True, "week": week_key, "start": start, "end": end, "data": entries, "total": total, "page": page, "per_page": per_page}
+
+
+@router.get("/api/leaderboard/monthly")
+def get_monthly_leaderboard(
+    month: str | None = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    start, end = month_bounds(month or utc_today().strftime("%Y-%m"))
+    entries, total = ranked_xp(db, start, end, page, per_page)
+    return {"success": True, "start": start, "end": end, "data": entries, "total": total, "page": page, "per_page": per_page}
+
+
+@router.get("/api/leaderboard/range")
+def get_range_leaderboard(
+    start: date,
+    end: date,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    validate_range(start, end)
+    entries, total = ranked_xp(db, start, end, page, per_page)
+    return {"success": True, "start": start, "end": end, "data": entries, "total": total, "page": page, "per_page": per_page}
+
+
+@router.get("/api/leaderboard/students/{student_id}")
+def get_leaderboard_position(student_id: int, window: int = Query(2, ge=0, le=25), db: Session = Depends(get_db)):
+    position = leaderboard.around(db, student_id, window)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return ok(position)
 
 
 @router.get("/api/students")
 def get_students(db: Session = Depends(get_db)):
     rows = db.query(Student).order_by(Student.name.asc()).all()
-    data = [{"id": row.id, "name": row.name, "email": row.email, "last_active_at": row.last_active_at} for row in rows]
+    data = [
+        {"id": row.id, "name": row.name, "email": row.email, "last_active_at": presence.last_seen(row.id, row.last_active_at)}
+        for row in rows
+    ]
     return ok(data, total=len(data), page=1, per_page=len(data) or 1)
 
 
@@ -318,37 +175,19 @@ def squad_dashboard(student_id: int | None = None, limit: int = 30, db: Session
     members = db.query(Student).order_by(Student.total_xp.desc(), Student.name.asc()).all()
     member_rows = []
     for member in members:
-        active = member.last_active_at and member.last_active_at >= cutoff
+        last_active_at = presence.last_seen(member.id, member.last_active_at)
+        active = last_active_at and last_active_at >= cutoff
         member_rows.append(
             {
                 "student_id": member.id,
                 "name": member.name,
                 "total_xp": member.total_xp,
-                "last_active_at": member.last_active_at,
+                "last_active_at": last_active_at,
                 "status": "Active" if active else "Idle",
             }
         )
 
-    activities = (
-        db.query(SquadActivity)
-        .order_by(SquadActivity.created_at.desc())
-        .limit(max(1, min(limit, 100)))
-        .all()
-    )
-    feed = []
-    for row in activities:
-        student = db.query(Student).filter(Student.id == row.student_id).first()
-        feed.append(
-            {
-                "id": row.id,
-                "student_id": row.student_id,
-                "student_name": student.name if student else f"Student {row.student_id}",
-                "activity_type": row.activity_type,
-                "title": row.title,
-                "detail": row.detail,
-                "created_at": row.created_at,
-            }
-        )
+    feed = get_recent_activity(db, limit=max(1, min(limit, 100)))
 
     response = {
         "members": member_rows,
@@ -362,66 +201,60 @@ def squad_dashboard(student_id: int | None = None, limit: int = 30, db: Session
     return ok(response)
 
 
+def _sse(entry: dict) -> str:
+    return f"id: {entry['id']}\nevent: activity\ndata: {json.dumps(jsonable_encoder(entry))}\n\n"
+
+
+def _activity_since(last_event_id: int) -> list[dict]:
+    # A short-lived session: the stream outlives any request-scoped one, and a cold feed runs the initial load here.
+    db = SessionLocal()
+    try:
+        return activity_feed.since(db, last_event_id)
+    finally:
+        db.close()
+
+
+@router.get("/api/squad/stream")
+async def squad_activity_stream(request: Request, last_event_id: int | None = Header(default=None)):
+    """Server-sent events: one `activity` event per new squad activity, resuming after Last-Event-ID."""
+    queue = activity_feed.subscribe()
+    try:
+        backlog = await asyncio.to_thread(_activity_since, last_event_id) if last_event_id is not None else []
+    except BaseException:
+        activity_feed.unsubscribe(queue)
+        raise
+
+    async def events():
+        last_sent = backlog[-1]["id"] if backlog else (last_event_id or 0)
+        try:
+            for entry in backlog:
+                yield _sse(entry)
+            while not await request.is_disconnected():
+                try:
+                    entry = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if entry["id"] > last_sent:
+                    last_sent = entry["id"]
+                    yield _sse(entry)
+        finally:
+            activity_feed.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/api/students/{student_id}/learning-path")
 def get_learning_path(student_id: int, db: Session = Depends(get_db)):
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    modules = db.query(Module).order_by(Module.module_order.asc().nullslast(), Module.id.asc()).all()
-    result = []
-    for module in modules:
-        mastery = get_module_mastery(student_id, module.id, db)
-        unlock_check = check_module_unlock(student_id, module.id, db)
-        lessons = db.query(Lesson).filter(Lesson.module_id == module.id).order_by(Lesson.lesson_order.asc()).all()
-
-        lesson_items = []
-        for lesson in lessons:
-            quiz_count = db.query(func.count(Quiz.id)).filter(Quiz.lesson_id == lesson.id).scalar() or 0
-            ticket_count = db.query(func.count(Ticket.id)).filter(Ticket.lesson_id == lesson.id).scalar() or 0
-            completed_quiz = (
-                db.query(func.count(QuizAttempt.id))
-                .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
-                .filter(QuizAttempt.student_id == student_id, Quiz.lesson_id == lesson.id)
-                .scalar()
-                or 0
-            )
-            completed_ticket = (
-                db.query(func.count(TicketSubmission.id))
-                .join(Ticket, TicketSubmission.ticket_id == Ticket.id)
-                .filter(TicketSubmission.student_id == student_id, Ticket.lesson_id == lesson.id, TicketSubmission.status == "passed")
-                .scalar()
-                or 0
-            )
-            total_parts = int(quiz_count + ticket_count)
-            done_parts = int(completed_quiz + completed_ticket)
-            completion_percent = round((done_parts / total_parts) * 100, 1) if total_parts else 0
-
-            lesson_items.append(
-                {
-                    "id": lesson.id,
-                    "title": lesson.title,
-                    "video_url": lesson.video_url,
-                    "summary": lesson.summary,
-                    "lesson_order": lesson.lesson_order,
-                    "completion_percent": completion_percent,
-                }
-            )
-
-        result.append(
-            {
-                "id": module.id,
-                "code": module.code,
-                "title": module.title,
-                "description": module.description,
-                "mastery_percent": mastery,
-                "unlocked": unlock_check["unlocked"],
-                "unlock_requirements": unlock_check.get("requirements_missing", []),
-                "lessons": lesson_items,
-            }
-        )
-
-    return {"success": True, "modules": result}
+    return {"success": True, "modules": learning_path_cache.get_or_build(db, student_id)}
 
 
 @router.get("/api/students/{student_id}/promotion-status")
@@ -439,8 +272,8 @@ def methodology_status(student_id: int, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    access = can_access_tickets(student_id, db)
-    frameworks = db.query(MethodologyFramework).order_by(MethodologyFramework.id.asc()).all()
+    access = methodology_access.check(db, student_id)
+    frameworks = methodology_access.frameworks(db)
     progress = (
         db.query(StudentMethodologyProgress)
         .filter(StudentMethodologyProgress.student_id == student_id)
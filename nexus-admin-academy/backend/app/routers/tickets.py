@@ -1,8 +1,5 @@
 import logging
-import os
-import uuid
 from datetime import datetime
-from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
@@ -11,25 +8,15 @@ from app.database import get_db
 from app.models.student import Student
 from app.models.ticket import Ticket, TicketSubmission
 from app.schemas.ticket import TicketSubmitRequest
-from app.services.activity_service import log_activity, mark_student_active
+from app.services.activity_service import log_activity
+from app.services.presence_service import presence
 from app.services.ticket_grader import grade_ticket_submission, grade_ticket_with_answer_key
+from app.services.upload_service import IMAGE_KINDS, save_upload
 from app.utils.responses import ok
 
 router = APIRouter(prefix="/api/tickets", tags=["tickets"])
 logger = logging.getLogger(__name__)
 
-ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp"}
-ALLOWED_MIMES = {"image/jpeg", "image/png", "image/webp"}
-MAX_FILE_SIZE = 5 * 1024 * 1024
-
-
-def _get_upload_dir() -> Path:
-    configured = os.getenv("UPLOAD_DIR")
-    path = Path(configured) if configured else Path(__file__).resolve().parents[2] / "uploads" / "screenshots"
-    path.mkdir(parents=True, exist_ok=True)
-    return path
-
-
 def _collab_multiplier(count_people: int) -> float:
     if count_people <= 1:
         return 1.0
@@ -68,30 +55,10 @@ def _build_itil_writeup(payload: TicketSubmitRequest) -> str:
 
 @router.post("/uploads")
 async def upload_screenshots(files: list[UploadFile] = File(...)):
-    upload_dir = _get_upload_dir()
     saved = []
-
     for file in files:
-        ext = file.filename.rsplit(".", 1)[-1].lower() if file.filename and "." in file.filename else ""
-        if ext not in ALLOWED_EXTENSIONS:
-            raise HTTPException(status_code=400, detail="Invalid file type (jpg, jpeg, png, webp only)")
-        if file.content_type not in ALLOWED_MIMES:
-            raise HTTPException(status_code=400, detail="Invalid MIME type")
-
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large (max 5MB)")
-
-        safe_name = f"{uuid.uuid4()}.{ext}"
-        destination = (upload_dir / safe_name).resolve()
-        try:
-            destination.relative_to(upload_dir.resolve())
-        except ValueError as exc:
-            raise HTTPException(status_code=400, detail="Invalid file path") from exc
-
-        destination.write_bytes(contents)
-        logger.info("upload_saved filename=%s size=%s", safe_name, len(contents))
-        saved.append(safe_name)
+        stored = await save_upload(file, allowed_kinds=IMAGE_KINDS)
+        saved.append(stored["storage_key"])
 
     return ok({"files": saved})
 
@@ -171,7 +138,7 @@ async def submit_ticket(ticket_id: int, payload: TicketSubmitRequest, db: Sessio
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    mark_student_active(db, student_id)
+    presence.touch(student_id)
 
     existing = db.query(TicketSubmission).filter(TicketSubmission.student_id == student_id, TicketSubmission.ticket_id == ticket_id).first()
     if existing and existing.status == "passed":
@@ -263,8 +230,8 @@ async def submit_ticket(ticket_id: int, payload: TicketSubmitRequest, db: Sessio
         db.flush()
         submission_id = new_sub.id
 
+    db.commit()
     log_activity(
-        db,
         student_id,
         "ticket_submitted",
         ticket.title,
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -40,3 +42,9 @@ class OverrideRequest(BaseModel):
 class ManualReviewRequest(BaseModel):
     new_score: int = Field(ge=0, le=10)
     comment: str | None = Field(default=None, max_length=4000)
+
+
+class BulkReviewRequest(BaseModel):
+    submission_ids: list[int] = Field(min_length=1, max_length=200)
+    action: Literal["verify", "reject"]
+    comment: str | None = Field(default=None, max_length=4000)
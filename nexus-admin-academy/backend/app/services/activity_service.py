@@ -1,24 +1,292 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
 from datetime import datetime
 
-from sqlalchemy import desc
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
+from app.database import SessionLocal
 from app.models.squad_activity import SquadActivity
 from app.models.student import Student
 
+logger = logging.getLogger(__name__)
 
-def mark_student_active(db: Session, student_id: int) -> None:
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
-        return
-    student.last_active_at = datetime.utcnow()
-    db.commit()
+FEED_SIZE = 100
+SUBSCRIBER_QUEUE_SIZE = 100
+FLUSH_INTERVAL_SECONDS = max(0.1, float(os.getenv("ACTIVITY_FLUSH_SECONDS", "2")))
+BATCH_SIZE = max(1, int(os.getenv("ACTIVITY_BATCH_SIZE", "100")))
+QUEUE_SIZE = max(BATCH_SIZE, int(os.getenv("ACTIVITY_QUEUE_SIZE", "1000")))
 
 
-def log_activity(db: Session, student_id: int, activity_type: str, title: str, detail: str | None = None) -> None:
-    db.add(SquadActivity(student_id=student_id, activity_type=activity_type, title=title[:200], detail=(detail or "")[:500] or None))
-    db.commit()
+def _fallback_name(student_id: int) -> str:
+    return f"Student {student_id}"
 
 
-def get_recent_activity(db: Session, limit: int = 50) -> list[SquadActivity]:
-    return db.query(SquadActivity).order_by(desc(SquadActivity.created_at)).limit(limit).all()
+def _entry(row, student_name: str | None) -> dict:
+    return {
+        "id": row.id,
+        "student_id": row.student_id,
+        "student_name": student_name or _fallback_name(row.student_id),
+        "activity_type": row.activity_type,
+        "title": row.title,
+        "detail": row.detail,
+        "created_at": row.created_at,
+    }
+
+
+def query_recent_activity(db: Session, limit: int) -> list[dict]:
+    """Newest activity with student names, joined in one query."""
+    rows = (
+        db.query(
+            SquadActivity.id,
+            SquadActivity.student_id,
+            SquadActivity.activity_type,
+            SquadActivity.title,
+            SquadActivity.detail,
+            SquadActivity.created_at,
+            Student.name,
+        )
+        .outerjoin(Student, Student.id == SquadActivity.student_id)
+        .order_by(SquadActivity.created_at.desc(), SquadActivity.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [_entry(row, row.name) for row in rows]
+
+
+class ActivityFeed:
+    """The newest FEED_SIZE activity entries held in a ring buffer, plus live subscribers.
+
+    Loaded with one joined query on first read. Activity rows and student
+    renames/deletes are collected at flush time and applied after commit;
+    new entries are then pushed to every subscriber's queue on its own loop.
+    """
+
+    def __init__(self, size: int = FEED_SIZE):
+        self.size = size
+        self._entries: deque[dict] = deque(maxlen=size)
+        self._names: dict[int, str] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        entries = query_recent_activity(db, self.size)
+        self._entries.extend(reversed(entries))
+        self._names = dict(db.query(Student.id, Student.name).all())
+        self._loaded = True
+
+    def recent(self, db: Session, limit: int) -> list[dict]:
+        with self._lock:
+            self._ensure_loaded(db)
+            newest = list(self._entries)[-limit:]
+            return [self._resolved(entry) for entry in reversed(newest)]
+
+    def since(self, db: Session, last_id: int) -> list[dict]:
+        """Buffered entries newer than last_id, oldest first (for stream resumption)."""
+        with self._lock:
+            self._ensure_loaded(db)
+            return [self._resolved(entry) for entry in self._entries if entry["id"] > last_id]
+
+    def _resolved(self, entry: dict) -> dict:
+        return {**entry, "student_name": self._names.get(entry["student_id"]) or _fallback_name(entry["student_id"])}
+
+    def apply(self, activities: list[dict], names: dict[int, str | None]) -> None:
+        with self._lock:
+            if self._loaded:
+                for student_id, name in names.items():
+                    if name is None:
+                        self._names.pop(student_id, None)
+                    else:
+                        self._names[student_id] = name
+                for entry in activities:
+                    if entry["student_id"] not in self._names and entry["student_name"] != _fallback_name(entry["student_id"]):
+                        self._names[entry["student_id"]] = entry["student_name"]
+                self._entries.extend(activities)
+            published = [self._resolved(entry) if self._loaded else entry for entry in activities]
+            subscribers = list(self._subscribers)
+        for entry in published:
+            for loop, queue in subscribers:
+                loop.call_soon_threadsafe(self._offer, queue, entry)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, entry: dict) -> None:
+        try:
+            queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            logger.warning("activity_subscriber_lagging dropped_id=%s", entry["id"])
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {sub for sub in self._subscribers if sub[1] is not queue}
+
+
+activity_feed = ActivityFeed()
+
+
+def get_recent_activity(db: Session, limit: int = 50) -> list[dict]:
+    if limit <= activity_feed.size:
+        return activity_feed.recent(db, limit)
+    return query_recent_activity(db, limit)
+
+
+class ActivitySink:
+    """Buffers squad activity and bulk-inserts it off the request path.
+
+    A lifespan task writes the buffer every FLUSH_INTERVAL_SECONDS, or as soon
+    as BATCH_SIZE events are waiting; stop() writes whatever is left. record()
+    never writes on the caller's thread, which may be the event loop: past
+    QUEUE_SIZE buffered events the oldest are shed and the count is logged.
+    Rows are committed through the ORM, so the feed hooks above publish them
+    to the ring buffer and SSE subscribers. Without a running loop (scripts,
+    tests) each event is written at once, logging rather than raising errors.
+    """
+
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS, batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self._buffer: deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._loop = None
+            self._wake = None
+        await asyncio.to_thread(self._flush_logged)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.to_thread(self._flush_logged)
+
+    def record(self, event: dict) -> None:
+        with self._lock:
+            self._buffer.append(event)
+            while len(self._buffer) > self.queue_size:
+                self._buffer.popleft()
+                self._dropped += 1
+            size = len(self._buffer)
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            self._flush_logged()
+        elif size >= self.batch_size:
+            loop.call_soon_threadsafe(wake.set)
+
+    def _flush_logged(self) -> None:
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning("activity_events_dropped count=%s queue_size=%s", dropped, self.queue_size)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("activity_flush_failed")
+
+    def flush(self) -> int:
+        """Write everything buffered, BATCH_SIZE rows per insert; returns rows written."""
+        written = 0
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                try:
+                    db = SessionLocal()
+                    try:
+                        db.add_all(SquadActivity(**event) for event in batch)
+                        db.commit()
+                    finally:
+                        db.close()
+                except Exception:
+                    with self._lock:
+                        self._buffer.extendleft(reversed(batch))
+                    raise
+                written += len(batch)
+
+
+activity_sink = ActivitySink()
+
+
+def log_activity(student_id: int, activity_type: str, title: str, detail: str | None = None) -> None:
+    activity_sink.record(
+        {
+            "student_id": student_id,
+            "activity_type": activity_type,
+            "title": title[:200],
+            "detail": (detail or "")[:500] or None,
+            "created_at": datetime.utcnow(),
+        }
+    )
+
+
+_PENDING_KEY = "activity_feed_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_activity(session: Session, flush_context) -> None:
+    added = [obj for obj in session.new if isinstance(obj, SquadActivity)]
+    known = {}
+    if added:
+        # One lookup per flush, however many activity rows a batch holds.
+        ids = {obj.student_id for obj in added}
+        known = dict(session.query(Student.id, Student.name).filter(Student.id.in_(ids)).all())
+    activities = [_entry(obj, known.get(obj.student_id)) for obj in added]
+    names = {obj.id: obj.name for obj in session.new if isinstance(obj, Student)}
+    for obj in session.dirty:
+        if isinstance(obj, Student) and inspect(obj).attrs.name.history.has_changes():
+            names[obj.id] = obj.name
+    for obj in session.deleted:
+        if isinstance(obj, Student):
+            names[obj.id] = None
+    if activities or names:
+        pending = session.info.setdefault(_PENDING_KEY, ([], {}))
+        pending[0].extend(sorted(activities, key=lambda entry: entry["id"]))
+        pending[1].update(names)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_activity(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        activity_feed.apply(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_activity(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,133 @@
+import errno
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.evidence import EvidenceArtifact
+
+logger = logging.getLogger(__name__)
+
+GC_GRACE_SECONDS = 24 * 60 * 60
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+# Held by commit_blob and by collect_garbage around each delete, so a pass in this
+# process cannot remove a blob or shard directory while it is being committed.
+_STORE_LOCK = threading.Lock()
+
+
+def blob_key(checksum: str, ext: str) -> str:
+    """Storage key for a blob: sha256 sharded two levels deep, e.g. ab/cd/abcd....png."""
+    return f"{checksum[:2]}/{checksum[2:4]}/{checksum}.{ext}"
+
+
+def _move_into_store(tmp_path: Path, destination: Path) -> None:
+    """Rename tmp_path onto destination, or copy then rename when it is on another filesystem."""
+    try:
+        os.replace(tmp_path, destination)
+        return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    fd, part_name = tempfile.mkstemp(dir=destination.parent, prefix=".blob-", suffix=".part")
+    try:
+        with open(tmp_path, "rb") as source, os.fdopen(fd, "wb") as target:
+            shutil.copyfileobj(source, target)
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(part_name, destination)
+    except BaseException:
+        Path(part_name).unlink(missing_ok=True)
+        raise
+    tmp_path.unlink(missing_ok=True)
+
+
+def commit_blob(root: Path, tmp_path: Path, checksum: str, ext: str) -> tuple[str, bool]:
+    """Move a fully written temp file into the store. Returns (storage_key, created).
+
+    When the blob already exists its mtime is bumped first, so a concurrent GC
+    pass treats it as fresh, and only then is the temp file dropped. If GC got
+    there first (the blob or its shard directories vanished) the temp file is
+    moved in after all, retrying once, so the upload's bytes are never lost.
+    """
+    key = blob_key(checksum, ext)
+    destination = root / key
+    with _STORE_LOCK:
+        try:
+            os.utime(destination)
+        except FileNotFoundError:
+            pass
+        else:
+            tmp_path.unlink(missing_ok=True)
+            return key, False
+
+        for attempt in range(2):
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                _move_into_store(tmp_path, destination)
+                break
+            except FileNotFoundError:
+                # Another process's GC removed an empty shard directory after mkdir.
+                if attempt or not tmp_path.exists():
+                    raise
+    return key, True
+
+
+def blob_refcounts(db: Session) -> dict[str, int]:
+    rows = (
+        db.query(EvidenceArtifact.checksum, func.count(EvidenceArtifact.id))
+        .filter(EvidenceArtifact.checksum.isnot(None))
+        .group_by(EvidenceArtifact.checksum)
+        .all()
+    )
+    return {checksum: int(count) for checksum, count in rows}
+
+
+def collect_garbage(db: Session, root: Path, *, grace_seconds: int = GC_GRACE_SECONDS, dry_run: bool = False) -> dict:
+    """Delete blobs no EvidenceArtifact references by checksum.
+
+    Blobs younger than the grace period are kept so uploads whose artifact row
+    has not been committed yet survive. Files outside the shard layout
+    (legacy UUID uploads) are never touched.
+    """
+    referenced = set(blob_refcounts(db))
+    cutoff = time.time() - grace_seconds
+    scanned = 0
+    removed: list[str] = []
+    freed_bytes = 0
+
+    for path in root.glob("[0-9a-f][0-9a-f]/[0-9a-f][0-9a-f]/*"):
+        match = _BLOB_NAME.match(path.name)
+        if not match or not path.is_file():
+            continue
+        scanned += 1
+        if match.group(1) in referenced:
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        if not dry_run:
+            with _STORE_LOCK:
+                # Re-check under the lock: commit_blob bumps the mtime of a blob it is reusing.
+                try:
+                    if path.stat().st_mtime > cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                path.unlink(missing_ok=True)
+                for shard in (path.parent, path.parent.parent):
+                    try:
+                        shard.rmdir()
+                    except OSError:
+                        break
+        removed.append(path.relative_to(root).as_posix())
+        freed_bytes += stat.st_size
+
+    logger.info("blob_gc scanned=%s removed=%s freed_bytes=%s dry_run=%s", scanned, len(removed), freed_bytes, dry_run)
+    return {"scanned": scanned, "removed": removed, "freed_bytes": freed_bytes, "dry_run": dry_run}
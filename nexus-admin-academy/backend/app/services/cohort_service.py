@@ -0,0 +1,127 @@
+import threading
+from collections import Counter
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.student import Student
+from app.models.student_stats import StudentStats
+from app.services.leaderboard_service import leaderboard
+
+QUIZ_HISTOGRAM_BIN = 1
+
+
+class QuizDistribution:
+    """Cohort quiz averages kept in memory: running totals plus a histogram of per-student averages.
+
+    Loaded from student_stats on first use and updated after each commit that
+    writes a student_stats row, so a comparison never scans the cohort.
+    """
+
+    def __init__(self):
+        self._students: dict[int, tuple[int, int]] = {}
+        self._score_total = 0
+        self._attempts = 0
+        self._histogram: Counter[int] = Counter()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bin(score_total: int, attempts: int) -> int:
+        return int(score_total / attempts // QUIZ_HISTOGRAM_BIN)
+
+    def _add(self, student_id: int, value: tuple[int, int]) -> None:
+        score_total, attempts = value
+        self._students[student_id] = value
+        self._score_total += score_total
+        self._attempts += attempts
+        if attempts:
+            self._histogram[self._bin(score_total, attempts)] += 1
+
+    def _remove(self, student_id: int) -> None:
+        value = self._students.pop(student_id, None)
+        if value is None:
+            return
+        score_total, attempts = value
+        self._score_total -= score_total
+        self._attempts -= attempts
+        if attempts:
+            bucket = self._bin(score_total, attempts)
+            self._histogram[bucket] -= 1
+            if self._histogram[bucket] <= 0:
+                del self._histogram[bucket]
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        rows = db.query(StudentStats.student_id, StudentStats.quiz_score_total, StudentStats.quizzes_completed).all()
+        for row in rows:
+            self._add(row.student_id, (row.quiz_score_total, row.quizzes_completed))
+        self._loaded = True
+
+    def apply(self, changes: dict[int, tuple[int, int] | None]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            for student_id, value in changes.items():
+                self._remove(student_id)
+                if value is not None:
+                    self._add(student_id, value)
+
+    def comparison(self, db: Session, student_id: int) -> dict:
+        with self._lock:
+            self._ensure_loaded(db)
+            own_total, own_attempts = self._students.get(student_id, (0, 0))
+            others_attempts = self._attempts - own_attempts
+            return {
+                "cohort_quiz_avg": round((self._score_total - own_total) / others_attempts, 1) if others_attempts else 0.0,
+                "quiz_histogram": [
+                    {"min": bucket * QUIZ_HISTOGRAM_BIN, "max": (bucket + 1) * QUIZ_HISTOGRAM_BIN, "students": count}
+                    for bucket, count in sorted(self._histogram.items())
+                ],
+                "your_quiz_bin": self._bin(own_total, own_attempts) * QUIZ_HISTOGRAM_BIN if own_attempts else None,
+            }
+
+
+quiz_distribution = QuizDistribution()
+
+
+def cohort_comparison(db: Session, student_id: int, total_xp: int, quiz_avg: float) -> dict:
+    """Percentile rank of the student's XP among the rest of the cohort, plus quiz comparison."""
+    standing = leaderboard.xp_standing(db, student_id)
+    others = standing["others"] if standing else 0
+    avg_xp = round(standing["others_xp_total"] / others, 0) if others else 0
+    # Percentile rank: share of other students below, counting ties as half.
+    percentile = round((standing["below"] + standing["tied"] / 2) / others * 100, 1) if others else 0
+    return {
+        "your_xp": total_xp,
+        "avg_xp": avg_xp,
+        "percentile": percentile,
+        "your_quiz_avg": quiz_avg,
+        **quiz_distribution.comparison(db, student_id),
+    }
+
+
+_PENDING_KEY = "cohort_quiz_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_quiz_totals(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, StudentStats) and obj not in session.deleted:
+            session.info.setdefault(_PENDING_KEY, {})[obj.student_id] = (obj.quiz_score_total or 0, obj.quizzes_completed or 0)
+        elif isinstance(obj, Student) and obj in session.deleted:
+            session.info.setdefault(_PENDING_KEY, {})[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_quiz_totals(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        quiz_distribution.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_quiz_totals(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
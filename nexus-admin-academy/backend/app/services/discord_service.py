@@ -1,14 +1,25 @@
+import asyncio
 import logging
 import os
+import time
+from datetime import datetime, timedelta
 
 import httpx
+from sqlalchemy import event, update
 from sqlalchemy.orm import Session
 
-from app.models.student import Student
+from app.database import SessionLocal
+from app.models.notification_outbox import NotificationOutbox
 
 logger = logging.getLogger(__name__)
 
 DISCORD_WEBHOOK_URL = (os.getenv("DISCORD_WEBHOOK_URL") or "").strip()
+DISPATCH_INTERVAL_SECONDS = max(0.5, float(os.getenv("DISCORD_DISPATCH_SECONDS", "5")))
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 5
+LEASE_SECONDS = 60
+CLAIM_LIMIT = 50
+MESSAGE_LIMIT = 2000  # Discord rejects longer message content.
 MILESTONES = {
     100: "reached 100 XP!",
     500: "hit 500 XP milestone!",
@@ -16,34 +27,233 @@ MILESTONES = {
     2000: "reached 2000 XP!",
 }
 
+_WAKE_KEY = "discord_outbox_wake"
 
-def post_milestone(student_name: str, milestone: str, xp: int | None = None) -> None:
-    if not DISCORD_WEBHOOK_URL:
-        return
 
+def milestone_message(student_name: str, milestone: str, xp: int | None = None) -> str:
     message = f"{student_name} {milestone}"
     if xp is not None:
         message += f" (+{xp} XP)"
+    return message
 
-    try:
-        with httpx.Client(timeout=10.0) as client:
-            client.post(
-                DISCORD_WEBHOOK_URL,
-                json={"content": message, "username": "Nexus Admin Academy"},
-            )
-    except Exception as exc:
-        logger.warning("discord_webhook_failed error=%s", exc)
+
+def queue_discord_message(db: Session, content: str) -> None:
+    """Add a webhook message to the outbox; it is sent only if db commits."""
+    if not DISCORD_WEBHOOK_URL:
+        return
+    db.add(NotificationOutbox(channel="discord", payload={"content": content[:MESSAGE_LIMIT]}, next_attempt_at=datetime.utcnow()))
+    db.info[_WAKE_KEY] = True
 
 
-def check_and_post_milestones(db: Session, student_id: int, delta_xp: int) -> None:
+def check_and_post_milestones(db: Session, student_name: str, total_xp: int, delta_xp: int) -> None:
     if delta_xp <= 0:
         return
+    previous_xp = total_xp - delta_xp
+    for threshold, message in MILESTONES.items():
+        if previous_xp < threshold <= total_xp:
+            queue_discord_message(db, milestone_message(student_name, message, delta_xp))
 
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
-        return
 
-    previous_xp = student.total_xp - delta_xp
-    for threshold, message in MILESTONES.items():
-        if previous_xp < threshold <= student.total_xp:
-            post_milestone(student.name, message, delta_xp)
+def coalesce(messages: list[tuple[int, str]], limit: int = MESSAGE_LIMIT) -> list[tuple[list[int], str]]:
+    """Pack consecutive outbox messages into as few webhook posts as fit Discord's length limit."""
+    chunks: list[tuple[list[int], str]] = []
+    for outbox_id, content in messages:
+        if chunks and len(chunks[-1][1]) + 1 + len(content) <= limit:
+            ids, text = chunks[-1]
+            chunks[-1] = (ids + [outbox_id], f"{text}\n{content}")
+        else:
+            chunks.append(([outbox_id], content))
+    return chunks
+
+
+class DiscordDispatcher:
+    """Delivers the Discord outbox from a lifespan task.
+
+    Due rows are leased (status "sending", attempts bumped as a version check
+    so two workers never take the same row), packed into as few posts as the
+    2000-character limit allows and sent through one pooled AsyncClient.
+    Network errors and 5xx retry with exponential backoff up to MAX_ATTEMPTS;
+    a 429, or an exhausted X-RateLimit-Remaining, pauses dispatch for the
+    advertised time without spending an attempt.
+    """
+
+    def __init__(self, interval: float = DISPATCH_INTERVAL_SECONDS):
+        self.interval = interval
+        self._client: httpx.AsyncClient | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._paused_until = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running or not DISCORD_WEBHOOK_URL:
+            return
+        self._client = httpx.AsyncClient(timeout=10.0, limits=httpx.Limits(max_connections=4, max_keepalive_connections=2))
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+        self._wake = None
+
+    def wake(self) -> None:
+        """Thread-safe nudge after a commit queued messages."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.dispatch_due()
+            except Exception:
+                logger.exception("discord_dispatch_failed")
+
+    async def dispatch_due(self) -> int:
+        """Send everything due now; returns the number of outbox rows delivered."""
+        delivered = 0
+        while time.monotonic() >= self._paused_until:
+            claimed = await asyncio.to_thread(self._claim_due, CLAIM_LIMIT)
+            if not claimed:
+                break
+            chunks = coalesce(claimed)
+            for index, (ids, content) in enumerate(chunks):
+                outcome, detail = await self._send(content)
+                if outcome == "throttled":
+                    rest = [outbox_id for chunk_ids, _ in chunks[index:] for outbox_id in chunk_ids]
+                    await asyncio.to_thread(self._release, rest, detail)
+                    return delivered
+                await asyncio.to_thread(self._record, ids, outcome, detail)
+                if outcome == "sent":
+                    delivered += len(ids)
+                if time.monotonic() < self._paused_until:
+                    rest = [outbox_id for chunk_ids, _ in chunks[index + 1 :] for outbox_id in chunk_ids]
+                    await asyncio.to_thread(self._release, rest, None)
+                    return delivered
+            if len(claimed) < CLAIM_LIMIT:
+                break
+        return delivered
+
+    async def _send(self, content: str) -> tuple[str, str | None]:
+        try:
+            response = await self._client.post(DISCORD_WEBHOOK_URL, json={"content": content, "username": "Nexus Admin Academy"})
+        except httpx.HTTPError as exc:
+            return "retry", str(exc) or exc.__class__.__name__
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json().get("retry_after"))
+            except (ValueError, TypeError, AttributeError):
+                retry_after = float(response.headers.get("Retry-After") or 1)
+            self._pause(retry_after)
+            logger.warning("discord_rate_limited retry_after=%s", retry_after)
+            return "throttled", f"rate limited for {retry_after}s"
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            self._pause(float(response.headers.get("X-RateLimit-Reset-After") or 1))
+        if response.is_success:
+            return "sent", None
+        if response.status_code >= 500:
+            return "retry", f"HTTP {response.status_code}"
+        return "failed", f"HTTP {response.status_code}: {response.text[:200]}"
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+
+    @staticmethod
+    def _claim_due(limit: int) -> list[tuple[int, str]]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            rows = (
+                db.query(NotificationOutbox.id, NotificationOutbox.status, NotificationOutbox.attempts, NotificationOutbox.payload)
+                .filter(
+                    NotificationOutbox.channel == "discord",
+                    NotificationOutbox.status.in_(("pending", "sending")),
+                    NotificationOutbox.next_attempt_at <= now,
+                )
+                .order_by(NotificationOutbox.id.asc())
+                .limit(limit)
+                .all()
+            )
+            claimed = []
+            for row in rows:
+                result = db.execute(
+                    update(NotificationOutbox)
+                    .where(
+                        NotificationOutbox.id == row.id,
+                        NotificationOutbox.status == row.status,
+                        NotificationOutbox.attempts == row.attempts,
+                    )
+                    .values(status="sending", attempts=row.attempts + 1, next_attempt_at=now + timedelta(seconds=LEASE_SECONDS))
+                )
+                if result.rowcount == 1:
+                    claimed.append((row.id, (row.payload or {}).get("content", "")))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    @staticmethod
+    def _record(ids: list[int], outcome: str, error: str | None) -> None:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            for row in db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids)).all():
+                row.last_error = error
+                if outcome == "sent":
+                    row.status = "sent"
+                    row.sent_at = now
+                elif outcome == "retry" and row.attempts < MAX_ATTEMPTS:
+                    row.status = "pending"
+                    row.next_attempt_at = now + timedelta(seconds=BACKOFF_BASE_SECONDS * 2 ** (row.attempts - 1))
+                else:
+                    row.status = "failed"
+                    logger.warning("discord_message_failed outbox_id=%s attempts=%s error=%s", row.id, row.attempts, error)
+            db.commit()
+        finally:
+            db.close()
+
+    def _release(self, ids: list[int], error: str | None) -> None:
+        """Hand leased rows back untried, due once the rate-limit pause ends."""
+        if not ids:
+            return
+        db = SessionLocal()
+        try:
+            resume_at = datetime.utcnow() + timedelta(seconds=max(0.0, self._paused_until - time.monotonic()))
+            db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(ids), NotificationOutbox.status == "sending")
+                .values(status="pending", attempts=NotificationOutbox.attempts - 1, next_attempt_at=resume_at, last_error=error)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+discord_dispatcher = DiscordDispatcher()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session: Session) -> None:
+    if session.info.pop(_WAKE_KEY, None):
+        discord_dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_wake(session: Session) -> None:
+    session.info.pop(_WAKE_KEY, None)
@@ -1,13 +1,13 @@
 import hashlib
-import os
+import re
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from sqlalchemy.orm import Session
 
 from app.models.evidence import EvidenceArtifact
-
-MAX_FILE_SIZE = 5 * 1024 * 1024
+from app.services.log_scanner import scan_log
+from app.services.upload_service import MAX_FILE_SIZE
 
 try:
     from PIL import Image
@@ -17,31 +17,23 @@ except Exception:  # pragma: no cover
     TAGS = {}
 
 
-def validate_evidence_artifact(
-    *,
-    file_path: str,
-    artifact_type: str,
-    validation_rules: dict,
-    db: Session,
-) -> dict:
+def analyze_evidence_file(*, file_path: str, artifact_type: str, validation_rules: dict) -> dict:
+    """CPU-bound checks that need only the file; safe to run in a worker process."""
     issues: list[str] = []
     metadata: dict = {}
     path = Path(file_path)
 
     if not path.exists():
-        return {"valid": False, "issues": ["File missing"], "metadata": {}, "checksum": ""}
+        return {"valid": False, "issues": ["File missing"], "metadata": {}}
 
     file_size = path.stat().st_size
     if file_size > MAX_FILE_SIZE:
         issues.append(f"File too large: {file_size / 1024 / 1024:.2f}MB")
 
-    checksum = _sha256(file_path)
-    duplicate = db.query(EvidenceArtifact).filter(EvidenceArtifact.checksum == checksum).first()
-    if duplicate:
-        issues.append(f"Duplicate checksum already uploaded at {duplicate.uploaded_at}")
-
+    perceptual_hash = None
     if artifact_type == "screenshot":
         metadata = _extract_screenshot_metadata(file_path)
+        perceptual_hash = _dhash(file_path)
         timestamp = metadata.get("timestamp")
         if timestamp:
             try:
@@ -56,24 +48,55 @@ def validate_evidence_artifact(
             issues.append("Possible edited image detected from metadata software field")
 
     if artifact_type == "log":
-        must_contain = validation_rules.get("must_contain_text", [])
         try:
-            content = path.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            content = ""
-        for required_text in must_contain:
-            if required_text not in content:
-                issues.append(f"Missing required text: '{required_text}'")
+            scan = scan_log(
+                file_path,
+                must_contain=validation_rules.get("must_contain_text", []),
+                must_match=validation_rules.get("must_match_regex", []),
+            )
+        except OSError:
+            scan = {"missing": [], "invalid": [], "format": None, "parsed": None, "matched_lines": {}, "line_count": 0}
+            issues.append("Log could not be read")
+        except re.error as exc:
+            scan = {"missing": [], "invalid": [], "format": None, "parsed": None, "matched_lines": {}, "line_count": 0}
+            issues.append(f"Invalid validation pattern: {exc}")
+        for pattern, error in scan["invalid"]:
+            issues.append(f"Invalid validation pattern /{pattern}/: {error}")
+        for kind, pattern in scan["missing"]:
+            if kind == "literal":
+                issues.append(f"Missing required text: '{pattern}'")
+            else:
+                issues.append(f"Missing required pattern: /{pattern}/")
+        expected_format = validation_rules.get("expected_format")
+        if expected_format and scan["format"] != expected_format:
+            issues.append(f"Expected {expected_format} output, got {scan['format'] or 'unrecognized text'}")
+        metadata = {
+            "log_format": scan["format"],
+            "parsed": scan["parsed"],
+            "matched_lines": scan["matched_lines"],
+            "line_count": scan["line_count"],
+        }
 
     return {
         "valid": len(issues) == 0,
         "issues": issues,
         "metadata": metadata,
-        "checksum": checksum,
+        "perceptual_hash": perceptual_hash,
     }
 
 
-def _sha256(file_path: str) -> str:
+def find_duplicate_issue(db: Session, checksum: str, artifact_id: int | None = None) -> str | None:
+    query = db.query(EvidenceArtifact).filter(EvidenceArtifact.checksum == checksum)
+    if artifact_id is not None:
+        # Only earlier uploads count, so re-validating the original never flags it.
+        query = query.filter(EvidenceArtifact.id < artifact_id)
+    duplicate = query.order_by(EvidenceArtifact.id.asc()).first()
+    if duplicate:
+        return f"Duplicate checksum already uploaded at {duplicate.uploaded_at}"
+    return None
+
+
+def sha256_file(file_path: str) -> str:
     hasher = hashlib.sha256()
     with open(file_path, "rb") as f:
         for chunk in iter(lambda: f.read(8192), b""):
@@ -100,6 +123,24 @@ def _extract_screenshot_metadata(file_path: str) -> dict:
         return {}
 
 
+def _dhash(file_path: str, size: int = 8) -> str | None:
+    """64-bit difference hash: survives re-encoding, rescaling and small crops or edits."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(file_path) as image:
+            pixels = list(image.convert("L").resize((size + 1, size), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
 def _parse_timestamp(raw: str) -> datetime | None:
     for fmt in ("%Y:%m:%d %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
         try:
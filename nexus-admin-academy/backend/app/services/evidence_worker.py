@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.evidence import EvidenceArtifact
+from app.models.ticket import Ticket
+from app.services.evidence_validator import analyze_evidence_file, find_duplicate_issue, sha256_file
+from app.services.phash_index import screenshot_index
+from app.services.upload_service import get_upload_dir
+
+logger = logging.getLogger(__name__)
+
+WORKER_PROCESSES = max(1, int(os.getenv("EVIDENCE_WORKER_PROCESSES", "2")))
+QUEUE_SIZE = max(1, int(os.getenv("EVIDENCE_QUEUE_SIZE", "100")))
+SWEEP_SECONDS = max(5.0, float(os.getenv("EVIDENCE_SWEEP_SECONDS", "60")))
+MAX_ATTEMPTS = max(1, int(os.getenv("EVIDENCE_MAX_ATTEMPTS", "3")))
+REVALIDATE_BATCH_SIZE = 100
+
+
+def validation_rules_for(ticket: Ticket | None, artifact_type: str) -> dict:
+    evidence_types = ((ticket.required_evidence if ticket else None) or {}).get("evidence_types", [])
+    return next((e.get("validation", {}) for e in evidence_types if e.get("type") == artifact_type), {})
+
+
+class EvidenceValidationWorker:
+    """Runs evidence validation off the event loop.
+
+    Artifact ids go through a bounded asyncio queue; CPU-bound work (EXIF/PIL
+    decoding, hashing, log scans) runs in a process pool and the outcome is
+    written back to the artifact row. Uploads never wait for queue room: rows
+    that do not fit stay pending, and a sweep every SWEEP_SECONDS (and on
+    start) queues pending rows again. A failing artifact is retried up to
+    MAX_ATTEMPTS times and then marked "error" so pollers stop waiting.
+    """
+
+    def __init__(self, processes: int = WORKER_PROCESSES, queue_size: int = QUEUE_SIZE):
+        self.processes = processes
+        self.queue_size = queue_size
+        self._pool: ProcessPoolExecutor | None = None
+        self._queue: asyncio.Queue[int] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._background: set[asyncio.Task] = set()
+        self._queued: set[int] = set()
+        self._failures: dict[int, int] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._pool = self._new_pool()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.processes)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        for task in [*self._tasks, *self._background]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._background, return_exceptions=True)
+        self._tasks = []
+        self._background.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._queue = None
+        self._queued.clear()
+        self._failures.clear()
+
+    async def enqueue(self, artifact_id: int) -> None:
+        """Queue an artifact without waiting; if the queue is full it stays pending for the sweep."""
+        if not self.running:
+            await self._validate(artifact_id)
+            return
+        if artifact_id in self._queued:
+            return
+        try:
+            self._queue.put_nowait(artifact_id)
+        except asyncio.QueueFull:
+            logger.warning("evidence_queue_full artifact_id=%s left_pending", artifact_id)
+            return
+        self._queued.add(artifact_id)
+
+    def schedule_revalidation(self, batch_size: int = REVALIDATE_BATCH_SIZE) -> None:
+        self._spawn(self.revalidate_all(batch_size))
+
+    async def revalidate_all(self, batch_size: int = REVALIDATE_BATCH_SIZE) -> int:
+        """Re-run validation for every artifact not yet reviewed by an admin, batch by batch."""
+        last_id = 0
+        queued = 0
+        while True:
+            ids = await asyncio.to_thread(self._mark_batch_pending, last_id, batch_size)
+            if not ids:
+                break
+            for artifact_id in ids:
+                await self._put(artifact_id)
+            queued += len(ids)
+            last_id = ids[-1]
+        logger.info("evidence_revalidation_queued count=%s", queued)
+        return queued
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _put(self, artifact_id: int) -> None:
+        """Background callers wait for room instead of leaving rows to the sweep."""
+        if artifact_id in self._queued:
+            return
+        self._queued.add(artifact_id)
+        await self._queue.put(artifact_id)
+
+    async def _consume(self) -> None:
+        while True:
+            artifact_id = await self._queue.get()
+            try:
+                await self._validate(artifact_id)
+                self._failures.pop(artifact_id, None)
+                self._queued.discard(artifact_id)
+            except Exception as exc:
+                logger.exception("evidence_validation_failed artifact_id=%s", artifact_id)
+                self._queued.discard(artifact_id)
+                await self._record_failure(artifact_id, exc)
+            finally:
+                self._queue.task_done()
+
+    async def _record_failure(self, artifact_id: int, exc: Exception) -> None:
+        attempts = self._failures.get(artifact_id, 0) + 1
+        if attempts < MAX_ATTEMPTS:
+            # Retry straight away if there is room; otherwise the row stays pending for the sweep.
+            self._failures[artifact_id] = attempts
+            await self.enqueue(artifact_id)
+            return
+        self._failures.pop(artifact_id, None)
+        try:
+            await asyncio.to_thread(self._store_error, artifact_id, f"Validation could not be completed: {exc}")
+        except Exception:
+            logger.exception("evidence_validation_error_not_stored artifact_id=%s", artifact_id)
+
+    async def _validate(self, artifact_id: int) -> None:
+        job = await asyncio.to_thread(self._load_job, artifact_id)
+        if job is None:
+            return
+
+        result = await self._run_cpu(
+            partial(
+                analyze_evidence_file,
+                file_path=job["file_path"],
+                artifact_type=job["artifact_type"],
+                validation_rules=job["validation_rules"],
+            )
+        )
+        checksum = job["checksum"]
+        if not checksum and result["issues"] != ["File missing"]:
+            checksum = await self._run_cpu(partial(sha256_file, job["file_path"]))
+        await asyncio.to_thread(self._store_result, artifact_id, checksum, result)
+
+    async def _run_cpu(self, fn):
+        if self._pool is None:
+            return await asyncio.to_thread(fn)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn)
+        except BrokenProcessPool:
+            # A crashed child (e.g. a decoder segfault) poisons the pool; replace it and retry once.
+            logger.warning("evidence_worker_pool_broken restarting")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn)
+
+    async def _sweep(self) -> None:
+        while True:
+            try:
+                await self._requeue_pending()
+            except Exception:
+                logger.exception("evidence_sweep_failed")
+            await asyncio.sleep(SWEEP_SECONDS)
+
+    async def _requeue_pending(self) -> None:
+        ids = [artifact_id for artifact_id in await asyncio.to_thread(self._pending_ids) if artifact_id not in self._queued]
+        for artifact_id in ids:
+            await self._put(artifact_id)
+        if ids:
+            logger.info("evidence_validation_requeued count=%s", len(ids))
+
+    @staticmethod
+    def _pending_ids() -> list[int]:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(EvidenceArtifact.id)
+                .filter(EvidenceArtifact.validation_status == "pending")
+                .order_by(EvidenceArtifact.id.asc())
+                .all()
+            )
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _mark_batch_pending(after_id: int, batch_size: int) -> list[int]:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(EvidenceArtifact.id)
+                .filter(EvidenceArtifact.id > after_id, EvidenceArtifact.validated_at.is_(None))
+                .order_by(EvidenceArtifact.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            ids = [row.id for row in rows]
+            if ids:
+                db.query(EvidenceArtifact).filter(EvidenceArtifact.id.in_(ids)).update(
+                    {EvidenceArtifact.validation_status: "pending"}, synchronize_session=False
+                )
+                db.commit()
+            return ids
+        finally:
+            db.close()
+
+    @staticmethod
+    def _load_job(artifact_id: int) -> dict | None:
+        db = SessionLocal()
+        try:
+            row = db.query(EvidenceArtifact).filter(EvidenceArtifact.id == artifact_id).first()
+            if not row:
+                return None
+            ticket = None
+            if row.submission_type == "ticket":
+                ticket = db.query(Ticket).filter(Ticket.id == row.submission_id).first()
+            return {
+                "file_path": str(get_upload_dir() / row.storage_key),
+                "artifact_type": row.artifact_type,
+                "validation_rules": validation_rules_for(ticket, row.artifact_type),
+                "checksum": row.checksum,
+            }
+        finally:
+            db.close()
+
+    @staticmethod
+    def _store_result(artifact_id: int, checksum: str | None, result: dict) -> None:
+        db = SessionLocal()
+        try:
+            row = db.query(EvidenceArtifact).filter(EvidenceArtifact.id == artifact_id).first()
+            if not row or row.validated_at is not None:
+                # Deleted meanwhile, or an admin already ruled on it.
+                return
+            apply_validation_result(db, row, checksum, result)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _store_error(artifact_id: int, note: str) -> None:
+        db = SessionLocal()
+        try:
+            row = db.query(EvidenceArtifact).filter(EvidenceArtifact.id == artifact_id).first()
+            if not row or row.validated_at is not None or row.validation_status != "pending":
+                return
+            row.validation_status = "error"
+            row.validation_notes = note
+            db.commit()
+        finally:
+            db.close()
+
+
+def apply_validation_result(db: Session, row: EvidenceArtifact, checksum: str | None, result: dict) -> None:
+    issues = list(result["issues"])
+    if checksum:
+        row.checksum = checksum
+        duplicate_issue = find_duplicate_issue(db, checksum, row.id)
+        if duplicate_issue:
+            issues.insert(0, duplicate_issue)
+    row.perceptual_hash = result.get("perceptual_hash")
+    row.near_duplicate_of = None
+    if row.perceptual_hash:
+        matches = screenshot_index.find_and_add(db, row.id, row.checksum, row.perceptual_hash)
+        earlier = [(other_id, distance) for other_id, distance in matches if other_id < row.id]
+        if earlier:
+            row.near_duplicate_of, distance = earlier[0]
+            issues.append(_near_duplicate_note(row.near_duplicate_of, distance))
+        # Validation runs concurrently, so a later copy may have been indexed before this original.
+        for other_id, distance in matches:
+            if other_id > row.id:
+                _flag_near_duplicate(db, other_id, row.id, distance)
+    row.metadata_json = result["metadata"]
+    row.validation_status = "suspicious" if issues else "valid"
+    row.validation_notes = "; ".join(issues) if issues else None
+
+
+def _near_duplicate_note(original_id: int, distance: int) -> str:
+    return f"Near-duplicate of artifact #{original_id} (hash distance {distance}/64)"
+
+
+def _flag_near_duplicate(db: Session, artifact_id: int, original_id: int, distance: int) -> None:
+    row = db.query(EvidenceArtifact).filter(EvidenceArtifact.id == artifact_id).first()
+    if not row or row.validated_at is not None:
+        return
+    if row.near_duplicate_of is not None and row.near_duplicate_of < original_id:
+        return
+    note = _near_duplicate_note(original_id, distance)
+    issues = [
+        issue
+        for issue in (row.validation_notes.split("; ") if row.validation_notes else [])
+        if not issue.startswith("Near-duplicate of artifact #")
+    ]
+    row.near_duplicate_of = original_id
+    row.validation_status = "suspicious"
+    row.validation_notes = "; ".join([*issues, note])
+
+
+evidence_worker = EvidenceValidationWorker()
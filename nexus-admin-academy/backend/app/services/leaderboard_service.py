@@ -0,0 +1,220 @@
+import threading
+from bisect import bisect_left, insort
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.student import Student
+from app.services.xp_calculator import level_from_xp
+
+BUCKET_LOAD = 256
+
+# Sort key: highest XP first, ties broken by lower student id (same order as the old ORDER BY).
+RankKey = tuple[int, int]
+
+
+def rank_key(student_id: int, total_xp: int) -> RankKey:
+    return (-total_xp, student_id)
+
+
+class SortedKeyList:
+    """Sorted list split into buckets of ~BUCKET_LOAD keys, with cached bucket offsets.
+
+    Membership and rank use a bisect over bucket maxima and then within one
+    bucket, so they stay logarithmic; inserts and removals shift at most one
+    bucket instead of the whole list.
+    """
+
+    def __init__(self, keys=()):
+        ordered = sorted(keys)
+        self._buckets: list[list[RankKey]] = [ordered[i : i + BUCKET_LOAD] for i in range(0, len(ordered), BUCKET_LOAD)]
+        self._maxes: list[RankKey] = [bucket[-1] for bucket in self._buckets]
+        self._offsets: list[int] | None = None
+        self._size = len(ordered)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _bucket_for(self, key: RankKey) -> int:
+        return min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+
+    def _offset(self, index: int) -> int:
+        if self._offsets is None:
+            offsets, total = [], 0
+            for bucket in self._buckets:
+                offsets.append(total)
+                total += len(bucket)
+            self._offsets = offsets
+        return self._offsets[index]
+
+    def add(self, key: RankKey) -> None:
+        self._size += 1
+        self._offsets = None
+        if not self._buckets:
+            self._buckets, self._maxes = [[key]], [key]
+            return
+        index = self._bucket_for(key)
+        bucket = self._buckets[index]
+        insort(bucket, key)
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * BUCKET_LOAD:
+            half = len(bucket) // 2
+            self._buckets[index : index + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[index : index + 1] = [bucket[half - 1], bucket[-1]]
+
+    def remove(self, key: RankKey) -> None:
+        if not self._buckets:
+            return
+        index = self._bucket_for(key)
+        bucket = self._buckets[index]
+        position = bisect_left(bucket, key)
+        if position == len(bucket) or bucket[position] != key:
+            return
+        del bucket[position]
+        self._size -= 1
+        self._offsets = None
+        if bucket:
+            self._maxes[index] = bucket[-1]
+        else:
+            del self._buckets[index]
+            del self._maxes[index]
+
+    def position(self, key: RankKey) -> int:
+        """Number of keys sorting before key; the key itself need not be present."""
+        bucket_index = self._bucket_for(key)
+        return self._offset(bucket_index) + bisect_left(self._buckets[bucket_index], key)
+
+    def slice(self, start: int, stop: int) -> list[RankKey]:
+        start, stop = max(0, start), min(self._size, stop)
+        if start >= stop:
+            return []
+        self._offset(0)
+        bucket_index = max(0, bisect_left(self._offsets, start + 1) - 1)
+        result: list[RankKey] = []
+        position = start - self._offsets[bucket_index]
+        while len(result) < stop - start and bucket_index < len(self._buckets):
+            bucket = self._buckets[bucket_index]
+            result.extend(bucket[position : position + (stop - start - len(result))])
+            bucket_index += 1
+            position = 0
+        return result
+
+
+class Leaderboard:
+    """All-time XP ranking held in memory.
+
+    Loaded from the students table on first use. award_xp and Student
+    inserts/deletes/renames stage changes on the session; they are applied
+    after the transaction commits, so rolled-back XP never shows up.
+    """
+
+    def __init__(self):
+        self._keys = SortedKeyList()
+        self._students: dict[int, tuple[int, str]] = {}
+        self._xp_total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        rows = db.query(Student.id, Student.name, Student.total_xp).all()
+        self._students = {row.id: (row.total_xp, row.name) for row in rows}
+        self._keys = SortedKeyList(rank_key(sid, xp) for sid, (xp, _) in self._students.items())
+        self._xp_total = sum(xp for xp, _ in self._students.values())
+        self._loaded = True
+
+    def apply(self, changes: dict[int, tuple[int, str] | None]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            for student_id, value in changes.items():
+                current = self._students.pop(student_id, None)
+                if current is not None:
+                    self._keys.remove(rank_key(student_id, current[0]))
+                    self._xp_total -= current[0]
+                if value is not None:
+                    self._students[student_id] = value
+                    self._keys.add(rank_key(student_id, value[0]))
+                    self._xp_total += value[0]
+
+    def _entry(self, position: int, key: RankKey) -> dict:
+        student_id = key[1]
+        total_xp, name = self._students[student_id]
+        level, _ = level_from_xp(total_xp)
+        return {"rank": position + 1, "student_id": student_id, "name": name, "total_xp": total_xp, "level": level}
+
+    def page(self, db: Session, page: int, per_page: int) -> tuple[list[dict], int]:
+        with self._lock:
+            self._ensure_loaded(db)
+            start = (page - 1) * per_page
+            keys = self._keys.slice(start, start + per_page)
+            return [self._entry(start + offset, key) for offset, key in enumerate(keys)], len(self._keys)
+
+    def around(self, db: Session, student_id: int, window: int) -> dict | None:
+        """The student's entry plus up to `window` neighbours on each side, or None if unknown."""
+        with self._lock:
+            self._ensure_loaded(db)
+            current = self._students.get(student_id)
+            if current is None:
+                return None
+            position = self._keys.position(rank_key(student_id, current[0]))
+            start = max(0, position - window)
+            keys = self._keys.slice(start, position + window + 1)
+            return {
+                "entry": self._entry(position, rank_key(student_id, current[0])),
+                "neighbors": [self._entry(start + offset, key) for offset, key in enumerate(keys)],
+                "total": len(self._keys),
+            }
+
+    def xp_standing(self, db: Session, student_id: int) -> dict | None:
+        """Where a student's XP sits among everyone else: two bisects, no cohort scan."""
+        with self._lock:
+            self._ensure_loaded(db)
+            current = self._students.get(student_id)
+            if current is None:
+                return None
+            xp = current[0]
+            higher = self._keys.position((-xp, -1))
+            at_or_higher = self._keys.position((-xp + 1, -1))
+            others = len(self._keys) - 1
+            return {
+                "others": others,
+                "below": len(self._keys) - at_or_higher,
+                "tied": at_or_higher - higher - 1,
+                "others_xp_total": self._xp_total - xp,
+            }
+
+
+leaderboard = Leaderboard()
+
+_PENDING_KEY = "leaderboard_changes"
+
+
+def stage_xp(db: Session, student_id: int, total_xp: int, name: str) -> None:
+    """Record a student's new XP total; applied to the leaderboard when db commits."""
+    db.info.setdefault(_PENDING_KEY, {})[student_id] = (total_xp, name)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_student_changes(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Student):
+            continue
+        if obj in session.deleted:
+            session.info.setdefault(_PENDING_KEY, {})[obj.id] = None
+        elif obj in session.new or inspect(obj).attrs.name.history.has_changes():
+            stage_xp(session, obj.id, obj.total_xp, obj.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_student_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        leaderboard.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_student_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
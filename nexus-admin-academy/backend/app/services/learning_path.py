@@ -0,0 +1,299 @@
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from itertools import chain
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.models.lab import LabRun, LabTemplate
+from app.models.learning import Lesson, Module
+from app.models.quiz import Quiz, QuizAttempt
+from app.models.student import Student
+from app.models.ticket import Ticket, TicketSubmission
+
+LEARNING_PATH_CACHE_SIZE = int(os.getenv("LEARNING_PATH_CACHE_SIZE", "500"))
+
+# Lesson mastery = weighted quiz/ticket/lab averages (0-10 scale); module mastery is the lesson mean x10.
+QUIZ_WEIGHT = 0.3
+TICKET_WEIGHT = 0.4
+LAB_WEIGHT = 0.3
+DEFAULT_UNLOCK_THRESHOLD = 70
+
+CURRICULUM_MODELS = (Module, Lesson, Quiz, Ticket, LabTemplate)
+PROGRESS_MODELS = (QuizAttempt, TicketSubmission, LabRun)
+
+
+def _scoped(query, column, values: list[int] | None):
+    return query.filter(column.in_(values)) if values is not None else query
+
+
+def lesson_aggregates(db: Session, student_ids: list[int] | None, lesson_ids: list[int] | None = None) -> dict:
+    """Per-(student, lesson) completion counts and score averages in three grouped queries.
+
+    Returns {(student_id, lesson_id): {"quizzes_done", "tickets_done", "quiz_avg", "ticket_avg", "lab_avg"}};
+    pairs with no activity are absent.
+    """
+    stats: dict[tuple[int, int], dict] = defaultdict(
+        lambda: {"quizzes_done": 0, "tickets_done": 0, "quiz_avg": 0.0, "ticket_avg": 0.0, "lab_avg": 0.0}
+    )
+
+    quiz_rows = _scoped(
+        _scoped(
+            db.query(QuizAttempt.student_id, Quiz.lesson_id, func.count(QuizAttempt.id), func.avg(QuizAttempt.score))
+            .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+            .filter(Quiz.lesson_id.isnot(None)),
+            QuizAttempt.student_id,
+            student_ids,
+        ),
+        Quiz.lesson_id,
+        lesson_ids,
+    ).group_by(QuizAttempt.student_id, Quiz.lesson_id)
+    for sid, lesson_id, count, avg in quiz_rows:
+        stats[(sid, lesson_id)]["quizzes_done"] = int(count)
+        stats[(sid, lesson_id)]["quiz_avg"] = float(avg or 0)
+
+    ticket_rows = _scoped(
+        _scoped(
+            db.query(
+                TicketSubmission.student_id,
+                Ticket.lesson_id,
+                func.count(TicketSubmission.id),
+                func.avg(TicketSubmission.final_score),
+            )
+            .join(Ticket, TicketSubmission.ticket_id == Ticket.id)
+            .filter(Ticket.lesson_id.isnot(None), TicketSubmission.status == "passed"),
+            TicketSubmission.student_id,
+            student_ids,
+        ),
+        Ticket.lesson_id,
+        lesson_ids,
+    ).group_by(TicketSubmission.student_id, Ticket.lesson_id)
+    for sid, lesson_id, count, avg in ticket_rows:
+        stats[(sid, lesson_id)]["tickets_done"] = int(count)
+        stats[(sid, lesson_id)]["ticket_avg"] = float(avg or 0)
+
+    lab_rows = _scoped(
+        _scoped(
+            db.query(LabRun.student_id, LabTemplate.lesson_id, func.avg(LabRun.final_score))
+            .join(LabTemplate, LabRun.lab_template_id == LabTemplate.id)
+            .filter(LabTemplate.lesson_id.isnot(None)),
+            LabRun.student_id,
+            student_ids,
+        ),
+        LabTemplate.lesson_id,
+        lesson_ids,
+    ).group_by(LabRun.student_id, LabTemplate.lesson_id)
+    for sid, lesson_id, avg in lab_rows:
+        stats[(sid, lesson_id)]["lab_avg"] = float(avg or 0)
+
+    return dict(stats)
+
+
+def lesson_score(stats: dict | None) -> float:
+    if not stats:
+        return 0.0
+    return stats["quiz_avg"] * QUIZ_WEIGHT + stats["ticket_avg"] * TICKET_WEIGHT + stats["lab_avg"] * LAB_WEIGHT
+
+
+def module_mastery(student_id: int, lesson_ids: list[int], aggregates: dict) -> float:
+    if not lesson_ids:
+        return 0.0
+    total = sum(lesson_score(aggregates.get((student_id, lesson_id))) for lesson_id in lesson_ids)
+    return round((total / len(lesson_ids)) * 10, 1)
+
+
+def unlock_state(module: Module, mastery_by_module: dict[int, float]) -> dict:
+    requirements_missing = []
+    if module.prerequisite_module_id:
+        prereq_mastery = mastery_by_module.get(module.prerequisite_module_id, 0.0)
+        if prereq_mastery < (module.unlock_threshold or DEFAULT_UNLOCK_THRESHOLD):
+            requirements_missing.append(
+                f"Need {module.unlock_threshold}% mastery in prerequisite (current: {prereq_mastery}%)"
+            )
+    return {"unlocked": len(requirements_missing) == 0, "requirements_missing": requirements_missing}
+
+
+def build_learning_path(db: Session, student_id: int) -> list[dict]:
+    """Modules with lessons, completion, mastery and unlock state in seven queries, whatever the curriculum size."""
+    modules = db.query(Module).order_by(Module.module_order.asc().nullslast(), Module.id.asc()).all()
+    lessons = db.query(Lesson).order_by(Lesson.module_id.asc(), Lesson.lesson_order.asc()).all()
+    quiz_totals = dict(
+        db.query(Quiz.lesson_id, func.count(Quiz.id)).filter(Quiz.lesson_id.isnot(None)).group_by(Quiz.lesson_id).all()
+    )
+    ticket_totals = dict(
+        db.query(Ticket.lesson_id, func.count(Ticket.id)).filter(Ticket.lesson_id.isnot(None)).group_by(Ticket.lesson_id).all()
+    )
+    aggregates = lesson_aggregates(db, [student_id])
+
+    lessons_by_module: dict[int, list[Lesson]] = defaultdict(list)
+    for lesson in lessons:
+        lessons_by_module[lesson.module_id].append(lesson)
+    # Prerequisites may point at any module, so score them all before resolving unlocks.
+    mastery_by_module = {
+        module.id: module_mastery(student_id, [lesson.id for lesson in lessons_by_module[module.id]], aggregates)
+        for module in modules
+    }
+
+    result = []
+    for module in modules:
+        lesson_items = []
+        for lesson in lessons_by_module[module.id]:
+            stats = aggregates.get((student_id, lesson.id))
+            total_parts = int(quiz_totals.get(lesson.id, 0) + ticket_totals.get(lesson.id, 0))
+            done_parts = (stats["quizzes_done"] + stats["tickets_done"]) if stats else 0
+            lesson_items.append(
+                {
+                    "id": lesson.id,
+                    "title": lesson.title,
+                    "video_url": lesson.video_url,
+                    "summary": lesson.summary,
+                    "lesson_order": lesson.lesson_order,
+                    "completion_percent": round((done_parts / total_parts) * 100, 1) if total_parts else 0,
+                }
+            )
+
+        unlock_check = unlock_state(module, mastery_by_module)
+        result.append(
+            {
+                "id": module.id,
+                "code": module.code,
+                "title": module.title,
+                "description": module.description,
+                "mastery_percent": mastery_by_module[module.id],
+                "unlocked": unlock_check["unlocked"],
+                "unlock_requirements": unlock_check["requirements_missing"],
+                "lessons": lesson_items,
+            }
+        )
+    return result
+
+
+def cohort_mastery_matrix(db: Session, module_ids: list[int] | None = None) -> dict:
+    """Module mastery for every student x module from one grouped aggregate pass.
+
+    Lessons are laid out as contiguous columns per module, each student's
+    sparse lesson scores are filled into a dense row, and module mastery is
+    the mean of that module's column slice x10.
+    """
+    modules = _scoped(db.query(Module), Module.id, module_ids).order_by(Module.module_order.asc().nullslast(), Module.id.asc()).all()
+    lessons = (
+        _scoped(db.query(Lesson.id, Lesson.module_id), Lesson.module_id, [module.id for module in modules])
+        .order_by(Lesson.module_id.asc(), Lesson.lesson_order.asc())
+        .all()
+    )
+    students = db.query(Student.id, Student.name).order_by(Student.id.asc()).all()
+
+    lesson_ids_by_module: dict[int, list[int]] = defaultdict(list)
+    for lesson in lessons:
+        lesson_ids_by_module[lesson.module_id].append(lesson.id)
+    column: dict[int, int] = {}
+    slices: list[tuple[int, int]] = []
+    for module in modules:
+        start = len(column)
+        for lesson_id in lesson_ids_by_module[module.id]:
+            column[lesson_id] = len(column)
+        slices.append((start, len(column)))
+
+    aggregates = lesson_aggregates(db, None, list(column)) if column else {}
+    rows: dict[int, list[float]] = {}
+    for (student_id, lesson_id), stats in aggregates.items():
+        if lesson_id in column:
+            rows.setdefault(student_id, [0.0] * len(column))[column[lesson_id]] = lesson_score(stats)
+
+    empty = [0.0] * len(column)
+    matrix = []
+    for student in students:
+        scores = rows.get(student.id, empty)
+        matrix.append([round(sum(scores[start:end]) / (end - start) * 10, 1) if end > start else 0.0 for start, end in slices])
+
+    averages = [round(sum(col) / len(col), 1) if col else 0.0 for col in zip(*matrix)] if matrix else [0.0] * len(modules)
+    return {
+        "modules": [
+            {"id": module.id, "code": module.code, "title": module.title, "cohort_average": average}
+            for module, average in zip(modules, averages)
+        ],
+        "students": [{"id": student.id, "name": student.name} for student in students],
+        "matrix": matrix,
+    }
+
+
+class LearningPathCache:
+    """LRU of built learning paths per student.
+
+    Entries are dropped when a commit touches that student's quiz attempts,
+    ticket submissions or lab runs, and the whole cache is cleared when any
+    curriculum row changes. A generation counter stops a path computed before
+    an invalidation from being stored after it.
+    """
+
+    def __init__(self, max_entries: int = LEARNING_PATH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, list[dict]] = OrderedDict()
+        self._generation: dict[int, int] = defaultdict(int)
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, db: Session, student_id: int) -> list[dict]:
+        with self._lock:
+            cached = self._entries.get(student_id)
+            if cached is not None:
+                self._entries.move_to_end(student_id)
+                return cached
+            stamp = (self._epoch, self._generation[student_id])
+
+        path = build_learning_path(db, student_id)
+
+        with self._lock:
+            if stamp == (self._epoch, self._generation[student_id]):
+                self._entries[student_id] = path
+                self._entries.move_to_end(student_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return path
+
+    def invalidate(self, student_ids) -> None:
+        with self._lock:
+            for student_id in student_ids:
+                self._entries.pop(student_id, None)
+                self._generation[student_id] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation.clear()
+            self._epoch += 1
+
+
+learning_path_cache = LearningPathCache()
+
+_PENDING_KEY = "learning_path_invalidations"
+_ALL = "all"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_learning_path_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CURRICULUM_MODELS):
+            pending.add(_ALL)
+        elif isinstance(obj, PROGRESS_MODELS):
+            pending.add(obj.student_id)
+        elif isinstance(obj, Student) and obj in session.deleted:
+            pending.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_learning_path_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL in pending:
+        learning_path_cache.clear()
+    else:
+        learning_path_cache.invalidate(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_learning_path_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
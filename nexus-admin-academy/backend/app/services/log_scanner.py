@@ -0,0 +1,295 @@
+import codecs
+import logging
+import mmap
+import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORMAT_SNIFF_LINES = 40
+MAX_TRACKED_EVENT_IDS = 50
+
+
+class _PatternSet:
+    """Required literals and regexes, each satisfied by its first matching line.
+
+    The still-unmatched literals are escaped into one alternation with a named
+    group each, so a line is scanned for all of them at once; when a literal is
+    found the alternation is rebuilt without it and the same line is scanned
+    again, at most one rebuild per literal over the whole file. Regexes are
+    compiled and searched one by one, since valid patterns can stop being valid
+    once joined (inline global flags, backreferences to group numbers).
+    Regexes that do not compile are kept in invalid rather than raising.
+    """
+
+    def __init__(self, literals: list[str], regexes: list[str]):
+        self.patterns: dict[str, tuple[str, str]] = {}
+        self.invalid: list[tuple[str, str]] = []
+        self._regexes: dict[str, re.Pattern] = {}
+        for idx, text in enumerate(literals):
+            self.patterns[f"l{idx}"] = ("literal", text)
+        for idx, raw in enumerate(regexes):
+            try:
+                self._regexes[f"r{idx}"] = re.compile(raw)
+            except re.error as exc:
+                logger.warning("log_scan_invalid_regex pattern=%r error=%s", raw, exc)
+                self.invalid.append((raw, str(exc)))
+                continue
+            self.patterns[f"r{idx}"] = ("regex", raw)
+        self.found: dict[str, int] = {}
+        self._compile()
+
+    def _compile(self) -> None:
+        parts = [
+            f"(?P<{name}>{re.escape(text)})"
+            for name, (kind, text) in self.patterns.items()
+            if kind == "literal" and name not in self.found
+        ]
+        self._literals = re.compile("|".join(parts)) if parts else None
+
+    @property
+    def done(self) -> bool:
+        return self._literals is None and not self._regexes
+
+    def feed(self, line: str, line_number: int) -> None:
+        while self._literals is not None:
+            hits = {match.lastgroup for match in self._literals.finditer(line)}
+            if not hits:
+                break
+            for name in hits:
+                self.found[name] = line_number
+            self._compile()
+        for name, regex in list(self._regexes.items()):
+            if regex.search(line):
+                self.found[name] = line_number
+                del self._regexes[name]
+
+    def report(self) -> tuple[dict[str, int], list[tuple[str, str]]]:
+        matched = {self.patterns[name][1]: line for name, line in sorted(self.found.items(), key=lambda item: item[1])}
+        missing = [self.patterns[name] for name in self.patterns if name not in self.found]
+        return matched, missing
+
+
+class _IpconfigParser:
+    _ADAPTER = re.compile(r"^(\S.*adapter .+):\s*$")
+    _FIELD = re.compile(r"^\s+([A-Za-z0-9 ().-]+?)(?:\s*\.)+\s*:\s*(.*)$")
+    _KEEP = {
+        "IPv4 Address": "ipv4",
+        "IP Address": "ipv4",
+        "Subnet Mask": "subnet_mask",
+        "Default Gateway": "default_gateway",
+        "DNS Servers": "dns_servers",
+        "DHCP Enabled": "dhcp_enabled",
+        "Physical Address": "mac",
+        "Media State": "media_state",
+    }
+
+    def __init__(self):
+        self.adapters: list[dict] = []
+        self._current: dict | None = None
+        self._last_key: str | None = None
+
+    def feed(self, line: str) -> None:
+        adapter = self._ADAPTER.match(line)
+        if adapter:
+            self._current = {"name": adapter.group(1).strip()}
+            self.adapters.append(self._current)
+            self._last_key = None
+            return
+        if self._current is None:
+            return
+        field = self._FIELD.match(line)
+        if field:
+            key = self._KEEP.get(field.group(1).strip())
+            self._last_key = key
+            if key:
+                value = field.group(2).replace("(Preferred)", "").strip()
+                self._current[key] = [value] if key in {"dns_servers", "default_gateway"} else value
+            return
+        # DNS servers and gateways continue on indented lines without a label;
+        # anything else ends the field.
+        value = line.strip()
+        if not value or not line[:1].isspace():
+            self._last_key = None
+        elif self._last_key in {"dns_servers", "default_gateway"}:
+            self._current[self._last_key].append(value)
+
+    def result(self) -> dict:
+        for adapter in self.adapters:
+            for key in ("dns_servers", "default_gateway"):
+                if key in adapter:
+                    adapter[key] = [value for value in adapter[key] if value]
+        return {"adapters": self.adapters}
+
+
+class _PingParser:
+    _TARGET = re.compile(r"^(?:Pinging|PING)\s+(\S+)")
+    _WIN_REPLY = re.compile(r"Reply from ([^:]+):.*time[=<](\d+)ms", re.IGNORECASE)
+    _UNIX_REPLY = re.compile(r"bytes from ([^:]+):.*time=([\d.]+) ms")
+    _WIN_SUMMARY = re.compile(r"Sent = (\d+), Received = (\d+), Lost = (\d+)")
+    _UNIX_SUMMARY = re.compile(r"(\d+) packets transmitted, (\d+) (?:packets )?received")
+    _FAILURE = re.compile(r"Request timed out|Destination host unreachable|could not find host", re.IGNORECASE)
+
+    def __init__(self):
+        self.target: str | None = None
+        self.replies = 0
+        self.failures = 0
+        self.sent: int | None = None
+        self.received: int | None = None
+        self._min: float | None = None
+        self._max: float | None = None
+        self._total = 0.0
+
+    def feed(self, line: str) -> None:
+        if self.target is None:
+            target = self._TARGET.match(line.strip())
+            if target:
+                self.target = target.group(1)
+                return
+        reply = self._WIN_REPLY.search(line) or self._UNIX_REPLY.search(line)
+        if reply:
+            rtt = float(reply.group(2))
+            self.replies += 1
+            self._total += rtt
+            self._min = rtt if self._min is None else min(self._min, rtt)
+            self._max = rtt if self._max is None else max(self._max, rtt)
+            return
+        if self._FAILURE.search(line):
+            self.failures += 1
+            return
+        summary = self._WIN_SUMMARY.search(line)
+        if summary:
+            self.sent, self.received = int(summary.group(1)), int(summary.group(2))
+            return
+        summary = self._UNIX_SUMMARY.search(line)
+        if summary:
+            self.sent, self.received = int(summary.group(1)), int(summary.group(2))
+
+    def result(self) -> dict:
+        sent = self.sent if self.sent is not None else self.replies + self.failures
+        received = self.received if self.received is not None else self.replies
+        return {
+            "target": self.target,
+            "sent": sent,
+            "received": received,
+            "loss_percent": round((sent - received) / sent * 100, 1) if sent else None,
+            "min_ms": self._min,
+            "max_ms": self._max,
+            "avg_ms": round(self._total / self.replies, 1) if self.replies else None,
+        }
+
+
+class _EventViewerParser:
+    """Event Viewer text exports ("Log Name:/Event ID:" blocks) and CSV exports."""
+
+    _FIELD = re.compile(r"^\s*(Log Name|Source|Event ID|Level):\s*(.*)$")
+    _CSV_HEADER = re.compile(r"^Level,Date and Time,Source,Event ID", re.IGNORECASE)
+
+    def __init__(self):
+        self.events = 0
+        self.levels: dict[str, int] = {}
+        self.event_ids: dict[str, int] = {}
+        self.log_names: set[str] = set()
+        self._csv = False
+
+    def _count(self, level: str | None, event_id: str | None) -> None:
+        if level:
+            self.levels[level] = self.levels.get(level, 0) + 1
+        if event_id and (event_id in self.event_ids or len(self.event_ids) < MAX_TRACKED_EVENT_IDS):
+            self.event_ids[event_id] = self.event_ids.get(event_id, 0) + 1
+
+    def feed(self, line: str) -> None:
+        if self._CSV_HEADER.match(line):
+            self._csv = True
+            return
+        if self._csv:
+            cells = line.split(",")
+            if len(cells) >= 4 and cells[0].strip():
+                self.events += 1
+                self._count(cells[0].strip(), cells[3].strip())
+            return
+        field = self._FIELD.match(line)
+        if not field:
+            return
+        key, value = field.group(1), field.group(2).strip()
+        if key == "Log Name":
+            self.events += 1
+            self.log_names.add(value)
+        elif key == "Event ID":
+            self._count(None, value)
+        elif key == "Level":
+            self._count(value, None)
+
+    def result(self) -> dict:
+        top_ids = sorted(self.event_ids.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "events": self.events,
+            "levels": self.levels,
+            "top_event_ids": [{"event_id": event_id, "count": count} for event_id, count in top_ids],
+            "log_names": sorted(self.log_names),
+        }
+
+
+PARSERS = {
+    "ipconfig": _IpconfigParser,
+    "ping": _PingParser,
+    "eventviewer": _EventViewerParser,
+}
+
+
+def detect_format(line: str) -> str | None:
+    text = line.strip()
+    if text.startswith("Windows IP Configuration"):
+        return "ipconfig"
+    if text.startswith(("Pinging ", "PING ")):
+        return "ping"
+    if text.startswith("Log Name:") or _EventViewerParser._CSV_HEADER.match(text):
+        return "eventviewer"
+    return None
+
+
+def _iter_lines(path: Path):
+    """Yield decoded lines without loading the file: mmap for UTF-8/ASCII, a decoding stream for UTF-16."""
+    with open(path, "rb") as handle:
+        head = handle.read(4)
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            handle.seek(0)
+            with open(path, "r", encoding="utf-16", errors="ignore", newline=None) as text:
+                for line in text:
+                    yield line.rstrip("\r\n")
+            return
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if head.startswith(codecs.BOM_UTF8):
+                mapped.seek(len(codecs.BOM_UTF8))
+            for raw in iter(mapped.readline, b""):
+                yield raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+
+
+def scan_log(file_path: str, *, must_contain: list[str], must_match: list[str] | None = None) -> dict:
+    """Check required literals/regexes and parse known formats in a single streaming pass."""
+    patterns = _PatternSet(list(must_contain or []), list(must_match or []))
+    log_format = None
+    parser = None
+    line_count = 0
+
+    for line_count, line in enumerate(_iter_lines(Path(file_path)), start=1):
+        if log_format is None and line_count <= FORMAT_SNIFF_LINES:
+            log_format = detect_format(line)
+            if log_format:
+                parser = PARSERS[log_format]()
+        if parser is not None:
+            parser.feed(line)
+        if not patterns.done:
+            patterns.feed(line, line_count)
+
+    matched, missing = patterns.report()
+    return {
+        "line_count": line_count,
+        "format": log_format,
+        "parsed": parser.result() if parser else None,
+        "matched_lines": matched,
+        "missing": missing,
+        "invalid": patterns.invalid,
+    }
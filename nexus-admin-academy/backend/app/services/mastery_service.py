@@ -1,6 +1,13 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from app.models.mastery import StudentDomainMastery
+from app.models.mastery import MasteryEvent, StudentDomainMastery
+from app.models.quiz import Quiz, QuizAttempt
+from app.models.ticket import Ticket, TicketSubmission
 
 DOMAIN_LABELS = {
     "1.0": "Hardware",
@@ -8,45 +15,201 @@ DOMAIN_LABELS = {
     "3.0": "Software Troubleshooting",
     "4.0": "Security / Procedures",
 }
+HALF_LIFE_DAYS = max(1.0, float(os.getenv("MASTERY_HALF_LIFE_DAYS", "30")))
+RECOMPUTE_BATCH_SIZE = 5000
+_HALF_LIFE_SECONDS = HALF_LIFE_DAYS * 86400
 
 
-def _get_or_create(db: Session, student_id: int, domain_id: str) -> StudentDomainMastery:
-    row = (
-        db.query(StudentDomainMastery)
-        .filter(StudentDomainMastery.student_id == student_id, StudentDomainMastery.domain_id == domain_id)
-        .first()
-    )
-    if row:
-        return row
-    row = StudentDomainMastery(student_id=student_id, domain_id=domain_id)
-    db.add(row)
-    db.flush()
-    return row
+@dataclass
+class _MasteryTotals:
+    """Plain stand-in for a StudentDomainMastery row while the batch recompute folds events."""
+
+    student_id: int
+    domain_id: str
+    quiz_score_total: float = 0.0
+    quiz_attempts: int = 0
+    ticket_score_total: float = 0.0
+    ticket_attempts: int = 0
+    quiz_weighted_score: float = 0.0
+    quiz_weight: float = 0.0
+    ticket_weighted_score: float = 0.0
+    ticket_weight: float = 0.0
+    last_event_at: datetime | None = None
+    mastery_percent: float = 0.0
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _decay(seconds: float) -> float:
+    return 0.5 ** (seconds / _HALF_LIFE_SECONDS)
 
 
-def _recalc(row: StudentDomainMastery) -> None:
-    quiz_avg = (row.quiz_score_total / row.quiz_attempts) if row.quiz_attempts else 0
-    ticket_avg = (row.ticket_score_total / row.ticket_attempts) if row.ticket_attempts else 0
+def _recalc(row) -> None:
+    quiz_avg = (row.quiz_weighted_score / row.quiz_weight) if row.quiz_weight else 0
+    ticket_avg = (row.ticket_weighted_score / row.ticket_weight) if row.ticket_weight else 0
     weighted = ((quiz_avg * 1) + (ticket_avg * 2)) / 3
     row.mastery_percent = min(100.0, max(0.0, weighted * 10))
 
 
-def record_quiz_mastery(db: Session, student_id: int, domain_id: str, score: int) -> None:
-    row = _get_or_create(db, student_id, domain_id)
-    row.quiz_score_total += float(score)
-    row.quiz_attempts += 1
+def _apply_event(row, source_type: str, score: float, at: datetime) -> None:
+    """Fold one event into a row's sums; the single step behind both the incremental and batch paths.
+
+    Weighted sums are kept decayed to last_event_at, so a newer event first
+    ages what is there by its half-life factor and then counts in full, while
+    an event older than last_event_at is added at its own decayed weight.
+    Mastery is the ratio of the sums, so it only moves when events arrive.
+    """
+    kind = "ticket" if source_type == "ticket" else "quiz"
+    at_seconds = _epoch(at)
+    weight = 1.0
+    if row.last_event_at is None or at_seconds >= _epoch(row.last_event_at):
+        if row.last_event_at is not None:
+            factor = _decay(at_seconds - _epoch(row.last_event_at))
+            row.quiz_weighted_score *= factor
+            row.quiz_weight *= factor
+            row.ticket_weighted_score *= factor
+            row.ticket_weight *= factor
+        row.last_event_at = at
+    else:
+        weight = _decay(_epoch(row.last_event_at) - at_seconds)
+
+    setattr(row, f"{kind}_weighted_score", getattr(row, f"{kind}_weighted_score") + float(score) * weight)
+    setattr(row, f"{kind}_weight", getattr(row, f"{kind}_weight") + weight)
+    setattr(row, f"{kind}_score_total", getattr(row, f"{kind}_score_total") + float(score))
+    setattr(row, f"{kind}_attempts", getattr(row, f"{kind}_attempts") + 1)
     _recalc(row)
+
+
+def record_mastery_events(db: Session, events: list[tuple[int, str, str, int | None, float]]) -> None:
+    """Append (student_id, domain_id, source_type, source_id, score) events and fold them into mastery; the caller commits.
+
+    Existing mastery rows are loaded with one query and missing ones are
+    added together, so a batch of results does not round-trip per event.
+    """
+    if not events:
+        return
+    now = datetime.utcnow()
+    db.add_all(
+        MasteryEvent(student_id=student_id, domain_id=domain_id, source_type=source_type, source_id=source_id, score=float(score), created_at=now)
+        for student_id, domain_id, source_type, source_id, score in events
+    )
+    student_ids = {event[0] for event in events}
+    # The session does not autoflush; rows added earlier in this transaction must be visible.
+    db.flush()
+    rows = {
+        (row.student_id, row.domain_id): row
+        for row in db.query(StudentDomainMastery).filter(StudentDomainMastery.student_id.in_(student_ids)).all()
+    }
+    for student_id, domain_id, source_type, _, score in events:
+        row = rows.get((student_id, domain_id))
+        if row is None:
+            row = StudentDomainMastery(**vars(_MasteryTotals(student_id, domain_id)))
+            db.add(row)
+            rows[(student_id, domain_id)] = row
+        _apply_event(row, source_type, score, now)
+
+
+def record_quiz_mastery(db: Session, student_id: int, domain_id: str, score: int, source_id: int | None = None) -> None:
+    record_mastery_events(db, [(student_id, domain_id, "quiz", source_id, score)])
     db.commit()
 
 
-def record_ticket_mastery_verified(db: Session, student_id: int, domain_id: str, score: int) -> None:
-    row = _get_or_create(db, student_id, domain_id)
-    row.ticket_score_total += float(score)
-    row.ticket_attempts += 1
-    _recalc(row)
+def record_ticket_mastery_verified(db: Session, student_id: int, domain_id: str, score: int, source_id: int | None = None) -> None:
+    record_mastery_events(db, [(student_id, domain_id, "ticket", source_id, score)])
     db.commit()
 
 
+def record_ticket_mastery_verified_many(db: Session, results: list[tuple[int, str, int, int | None]]) -> None:
+    """Apply (student_id, domain_id, score, submission_id) ticket results; the caller commits."""
+    record_mastery_events(
+        db, [(student_id, domain_id, "ticket", submission_id, score) for student_id, domain_id, score, submission_id in results]
+    )
+
+
+def recompute_all_mastery(db: Session, batch_size: int = RECOMPUTE_BATCH_SIZE) -> int:
+    """Rebuild every mastery row from mastery_events in one ordered scan. Returns the number of rows written.
+
+    Events stream in (student, domain, time) order and are folded with the
+    same step as the incremental path, so a rebuild reproduces what live
+    updates would have produced; the rows are then replaced with one
+    executemany insert. Run after changing the formula or HALF_LIFE_DAYS.
+    """
+    totals: list[_MasteryTotals] = []
+    current: _MasteryTotals | None = None
+    events = (
+        db.query(MasteryEvent.student_id, MasteryEvent.domain_id, MasteryEvent.source_type, MasteryEvent.score, MasteryEvent.created_at)
+        .order_by(MasteryEvent.student_id, MasteryEvent.domain_id, MasteryEvent.created_at, MasteryEvent.id)
+        .yield_per(batch_size)
+    )
+    for event in events:
+        if current is None or (current.student_id, current.domain_id) != (event.student_id, event.domain_id):
+            current = _MasteryTotals(event.student_id, event.domain_id)
+            totals.append(current)
+        _apply_event(current, event.source_type, event.score, event.created_at)
+
+    db.query(StudentDomainMastery).delete()
+    for start in range(0, len(totals), batch_size):
+        db.execute(insert(StudentDomainMastery), [vars(row) for row in totals[start : start + batch_size]])
+    return len(totals)
+
+
+def backfill_mastery_events(db: Session) -> int:
+    """Add mastery_events for quiz attempts and verified tickets not yet in the log. Returns the number added.
+
+    Sources already logged, by (source_type, source_id, student_id), are
+    skipped, so this is safe to run again and fills gaps around live events.
+    Quiz attempts only keep their latest score, so a retaken quiz is seeded
+    with that rather than the first-attempt score live updates would have used.
+    """
+    logged = set(
+        db.query(MasteryEvent.source_type, MasteryEvent.source_id, MasteryEvent.student_id)
+        .filter(MasteryEvent.source_id.isnot(None))
+        .all()
+    )
+    events = [
+        {"student_id": row.student_id, "domain_id": row.domain_id, "source_type": "quiz", "source_id": row.id, "score": float(row.score), "created_at": row.completed_at or datetime.utcnow()}
+        for row in db.query(QuizAttempt.id, QuizAttempt.student_id, QuizAttempt.score, QuizAttempt.completed_at, Quiz.domain_id)
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .all()
+    ]
+    tickets = (
+        db.query(
+            TicketSubmission.id,
+            TicketSubmission.student_id,
+            TicketSubmission.collaborator_ids,
+            TicketSubmission.final_score,
+            TicketSubmission.ai_score,
+            TicketSubmission.verified_at,
+            TicketSubmission.submitted_at,
+            Ticket.domain_id,
+        )
+        .join(Ticket, Ticket.id == TicketSubmission.ticket_id)
+        .filter(TicketSubmission.status == "passed", TicketSubmission.xp_granted.is_(True))
+        .all()
+    )
+    for row in tickets:
+        score = float(row.final_score if row.final_score is not None else row.ai_score or 0)
+        for student_id in dict.fromkeys([row.student_id] + [int(x) for x in (row.collaborator_ids or [])]):
+            events.append(
+                {
+                    "student_id": student_id,
+                    "domain_id": row.domain_id or "1.0",
+                    "source_type": "ticket",
+                    "source_id": row.id,
+                    "score": score,
+                    "created_at": row.verified_at or row.submitted_at or datetime.utcnow(),
+                }
+            )
+    events = [row for row in events if (row["source_type"], row["source_id"], row["student_id"]) not in logged]
+    for start in range(0, len(events), RECOMPUTE_BATCH_SIZE):
+        db.execute(insert(MasteryEvent), events[start : start + RECOMPUTE_BATCH_SIZE])
+    return len(events)
+
+
 def list_student_mastery(db: Session, student_id: int) -> list[dict]:
     rows = db.query(StudentDomainMastery).filter(StudentDomainMastery.student_id == student_id).all()
     output = []
@@ -1,31 +1,169 @@
+import threading
+from dataclasses import dataclass
+from itertools import chain
+
+from sqlalchemy import and_, event, inspect
 from sqlalchemy.orm import Session
 
 from app.models.progression import MethodologyFramework, StudentMethodologyProgress
 from app.models.student import Student
 
+DEFAULT_ROLE_ID = 1
 
-def can_access_tickets(student_id: int, db: Session) -> dict:
-    student = db.query(Student).filter(Student.id == student_id).first()
-    role_id = student.current_role_id if student and student.current_role_id else 1
-
-    required_frameworks = (
-        db.query(MethodologyFramework)
-        .filter((MethodologyFramework.required_for_role.is_(None)) | (MethodologyFramework.required_for_role <= role_id))
-        .all()
-    )
-
-    missing_frameworks = []
-    for framework in required_frameworks:
-        progress = (
-            db.query(StudentMethodologyProgress)
-            .filter(
-                StudentMethodologyProgress.student_id == student_id,
-                StudentMethodologyProgress.framework_id == framework.id,
+
+@dataclass(frozen=True)
+class FrameworkInfo:
+    id: int
+    name: str
+    required_for_role: int | None
+
+
+@dataclass(frozen=True)
+class StudentAccess:
+    role_id: int
+    # Bit i is set when frameworks[i] is completed with its practice passed.
+    done_mask: int
+
+
+class MethodologyAccessCache:
+    """Per-student methodology bitmaps behind can_access_tickets.
+
+    Frameworks are loaded once and numbered by position; each student is one
+    joined query (role plus passed frameworks) folded into a bitmask, after
+    which an access check is a mask comparison. Progress, role or student
+    changes drop that student's entry on commit, and any framework change
+    clears everything. Generation counters stop a value read before an
+    invalidation from being stored after it.
+    """
+
+    def __init__(self):
+        self._frameworks: list[FrameworkInfo] | None = None
+        self._required: dict[int, int] = {}
+        self._students: dict[int, StudentAccess] = {}
+        self._generation: dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def frameworks(self, db: Session) -> list[FrameworkInfo]:
+        with self._lock:
+            if self._frameworks is not None:
+                return self._frameworks
+            epoch = self._epoch
+        rows = db.query(MethodologyFramework.id, MethodologyFramework.name, MethodologyFramework.required_for_role).order_by(
+            MethodologyFramework.id.asc()
+        )
+        frameworks = [FrameworkInfo(row.id, row.name, row.required_for_role) for row in rows.all()]
+        with self._lock:
+            if epoch == self._epoch:
+                self._frameworks = frameworks
+                self._required = {}
+        return frameworks
+
+    def _required_mask(self, frameworks: list[FrameworkInfo], role_id: int) -> int:
+        with self._lock:
+            cached = self._required.get(role_id) if frameworks is self._frameworks else None
+        if cached is not None:
+            return cached
+        mask = 0
+        for bit, framework in enumerate(frameworks):
+            if framework.required_for_role is None or framework.required_for_role <= role_id:
+                mask |= 1 << bit
+        with self._lock:
+            if frameworks is self._frameworks:
+                self._required[role_id] = mask
+        return mask
+
+    def _student(self, db: Session, student_id: int, frameworks: list[FrameworkInfo]) -> StudentAccess:
+        with self._lock:
+            cached = self._students.get(student_id)
+            if cached is not None:
+                return cached
+            stamp = (self._epoch, self._generation.get(student_id, 0))
+
+        rows = (
+            db.query(Student.current_role_id, StudentMethodologyProgress.framework_id)
+            .outerjoin(
+                StudentMethodologyProgress,
+                and_(
+                    StudentMethodologyProgress.student_id == Student.id,
+                    StudentMethodologyProgress.completed.is_(True),
+                    StudentMethodologyProgress.practice_passed.is_(True),
+                ),
             )
-            .first()
+            .filter(Student.id == student_id)
+            .all()
         )
-        if not progress or not progress.completed or not progress.practice_passed:
-            missing_frameworks.append(framework.name)
+        bits = {framework.id: bit for bit, framework in enumerate(frameworks)}
+        done_mask = 0
+        for row in rows:
+            if row.framework_id in bits:
+                done_mask |= 1 << bits[row.framework_id]
+        role_id = rows[0].current_role_id if rows and rows[0].current_role_id else DEFAULT_ROLE_ID
+        access = StudentAccess(role_id, done_mask)
+
+        with self._lock:
+            if stamp == (self._epoch, self._generation.get(student_id, 0)) and frameworks is self._frameworks:
+                self._students[student_id] = access
+        return access
+
+    def check(self, db: Session, student_id: int) -> dict:
+        frameworks = self.frameworks(db)
+        access = self._student(db, student_id, frameworks)
+        missing = self._required_mask(frameworks, access.role_id) & ~access.done_mask
+        missing_frameworks = [framework.name for bit, framework in enumerate(frameworks) if missing >> bit & 1]
+        return {"allowed": missing == 0, "missing_frameworks": missing_frameworks}
+
+    def invalidate(self, student_ids) -> None:
+        with self._lock:
+            for student_id in student_ids:
+                self._students.pop(student_id, None)
+                self._generation[student_id] = self._generation.get(student_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frameworks = None
+            self._required = {}
+            self._students.clear()
+            self._generation.clear()
+            self._epoch += 1
+
+
+methodology_access = MethodologyAccessCache()
+
+
+def can_access_tickets(student_id: int, db: Session) -> dict:
+    return methodology_access.check(db, student_id)
+
+
+_PENDING_KEY = "methodology_access_invalidations"
+_ALL = "all"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_methodology_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, MethodologyFramework):
+            pending.add(_ALL)
+        elif isinstance(obj, StudentMethodologyProgress):
+            pending.add(obj.student_id)
+        elif isinstance(obj, Student) and (
+            obj in session.new or obj in session.deleted or inspect(obj).attrs.current_role_id.history.has_changes()
+        ):
+            pending.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_methodology_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL in pending:
+        methodology_access.clear()
+    else:
+        methodology_access.invalidate(pending)
 
-    return {"allowed": len(missing_frameworks) == 0, "missing_frameworks": missing_frameworks}
 
+@event.listens_for(Session, "after_rollback")
+def _discard_methodology_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,397 @@
+import json
+import math
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import event, func, insert, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.comptia import ComptiaObjective, StudentDomainReadiness, StudentObjectiveProgress
+from app.models.quiz import Question, Quiz, QuizAttempt
+from app.models.ticket import Ticket, TicketSubmission
+
+TAG_LIMIT = 3
+MIN_TAG_SCORE = 1.0
+# Objective mastery is a running average for the first attempts, then an
+# exponential average with this weight so recent results keep counting.
+SMOOTHING = 0.3
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in into is it its of on or the their this that to "
+    "what when which while who why will with you your".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _terms(text: str) -> set[str]:
+    """Stemmed words and adjacent word pairs, so "Event viewer" matches as a phrase as well as by word."""
+    words = [_stem(word) for word in _WORD.findall((text or "").lower()) if len(word) > 1 and word not in _STOPWORDS]
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def _subtopics(raw: str | None) -> list[str]:
+    if not raw:
+        return []
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return [raw]
+    return [str(item) for item in value] if isinstance(value, list) else [str(value)]
+
+
+@dataclass(frozen=True)
+class ObjectiveCatalog:
+    """All objectives plus an inverted keyword index over their text and subtopics."""
+
+    domain_of: dict[int, str]
+    numbers: dict[str, int]
+    postings: dict[str, frozenset[int]]
+    idf: dict[str, float]
+    domains: list[str]
+
+    def resolve(self, values) -> list[int]:
+        """Known objective ids from stored tags, which may be ids or objective numbers like "2.3"."""
+        ids = []
+        for value in values or []:
+            objective_id = value if isinstance(value, int) else self.numbers.get(str(value))
+            if objective_id in self.domain_of and objective_id not in ids:
+                ids.append(objective_id)
+        return ids
+
+    def tag(self, text: str, domain: str | None = None, limit: int = TAG_LIMIT) -> list[int]:
+        """The best matching objective ids for text, restricted to domain when it has objectives."""
+        restrict = domain if domain in self.domains else None
+        scores: dict[int, float] = defaultdict(float)
+        for term in _terms(text):
+            for objective_id in self.postings.get(term, ()):
+                if restrict is None or self.domain_of[objective_id] == restrict:
+                    scores[objective_id] += self.idf[term]
+        ranked = sorted((item for item in scores.items() if item[1] >= MIN_TAG_SCORE), key=lambda item: (-item[1], item[0]))
+        return [objective_id for objective_id, _ in ranked[:limit]]
+
+
+class ObjectiveIndex:
+    """Process-wide ObjectiveCatalog, built on first use and dropped when objectives change."""
+
+    def __init__(self):
+        self._catalog: ObjectiveCatalog | None = None
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def catalog(self, db: Session) -> ObjectiveCatalog:
+        with self._lock:
+            if self._catalog is not None:
+                return self._catalog
+            epoch = self._epoch
+        rows = db.query(ComptiaObjective).order_by(ComptiaObjective.id.asc()).all()
+        postings: dict[str, set[int]] = defaultdict(set)
+        for row in rows:
+            for text in [row.objective_text, *_subtopics(row.subtopics_json)]:
+                for term in _terms(text):
+                    postings[term].add(row.id)
+        catalog = ObjectiveCatalog(
+            domain_of={row.id: row.domain for row in rows},
+            numbers={row.objective_number: row.id for row in rows},
+            postings={term: frozenset(ids) for term, ids in postings.items()},
+            idf={term: math.log(1 + len(rows) / len(ids)) for term, ids in postings.items()},
+            domains=sorted({row.domain for row in rows}),
+        )
+        with self._lock:
+            if epoch == self._epoch:
+                self._catalog = catalog
+        return catalog
+
+    def clear(self) -> None:
+        with self._lock:
+            self._catalog = None
+            self._epoch += 1
+
+
+objective_index = ObjectiveIndex()
+
+
+def _quiz_text(quiz: Quiz) -> str:
+    return quiz.title or ""
+
+
+def _question_text(question: Question) -> str:
+    return f"{question.question_text or ''} {question.explanation or ''}"
+
+
+def _ticket_text(ticket: Ticket) -> str:
+    return " ".join(filter(None, [ticket.title, ticket.description, ticket.root_cause_type]))
+
+
+def quiz_objective_scores(catalog: ObjectiveCatalog, quiz: Quiz, results: list[dict]) -> dict[int, float]:
+    """Percent correct per objective for a graded attempt; untagged questions count toward the quiz's tags."""
+    questions = {question.id: question for question in quiz.questions}
+    quiz_objectives = catalog.resolve(quiz.objective_ids)
+    correct: dict[int, int] = defaultdict(int)
+    asked: dict[int, int] = defaultdict(int)
+    for result in results:
+        question = questions.get(result.get("question_id"))
+        objective_ids = (catalog.resolve(question.objective_ids) if question is not None else []) or quiz_objectives
+        for objective_id in objective_ids:
+            asked[objective_id] += 1
+            correct[objective_id] += 1 if result.get("is_correct") else 0
+    return {objective_id: correct[objective_id] * 100 / asked[objective_id] for objective_id in asked}
+
+
+def _apply_score(level: int, attempts: int, score: float) -> tuple[int, int]:
+    attempts += 1
+    weight = max(1 / attempts, SMOOTHING)
+    level = round(level + (score - level) * weight)
+    return min(100, max(0, level)), attempts
+
+
+def _create_progress_rows(db: Session, keys: list[tuple[int, int]]) -> set[tuple[int, int]]:
+    """Insert the missing (student_id, objective_id) progress rows and return the keys that were new.
+
+    An INSERT ... ON CONFLICT DO NOTHING where the dialect supports it, so two
+    submits creating the same row cannot both insert it. On SQLite the
+    statement also takes the write lock, making the reads that follow current.
+    """
+    insert_stmt = _UPSERTS.get(db.get_bind().dialect.name)
+    if insert_stmt is not None:
+        stmt = (
+            insert_stmt(StudentObjectiveProgress)
+            .values([{"student_id": sid, "objective_id": oid, "mastery_level": 0, "attempts": 0} for sid, oid in keys])
+            .on_conflict_do_nothing(index_elements=[StudentObjectiveProgress.student_id, StudentObjectiveProgress.objective_id])
+            .returning(StudentObjectiveProgress.student_id, StudentObjectiveProgress.objective_id)
+        )
+        return {(row.student_id, row.objective_id) for row in db.execute(stmt)}
+    existing = set(
+        db.query(StudentObjectiveProgress.student_id, StudentObjectiveProgress.objective_id).filter(
+            tuple_(StudentObjectiveProgress.student_id, StudentObjectiveProgress.objective_id).in_(keys)
+        )
+    )
+    created = [key for key in keys if key not in existing]
+    db.add_all(StudentObjectiveProgress(student_id=sid, objective_id=oid, mastery_level=0, attempts=0) for sid, oid in created)
+    db.flush()
+    return set(created)
+
+
+def _add_readiness(db: Session, deltas: dict[tuple[int, str], list[int]]) -> None:
+    """Add (mastery_total, objectives_practiced) deltas to the readiness rows, as one atomic upsert where supported."""
+    insert_stmt = _UPSERTS.get(db.get_bind().dialect.name)
+    if insert_stmt is not None:
+        stmt = insert_stmt(StudentDomainReadiness).values(
+            [
+                {"student_id": sid, "domain": domain, "mastery_total": total, "objectives_practiced": practiced}
+                for (sid, domain), (total, practiced) in deltas.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StudentDomainReadiness.student_id, StudentDomainReadiness.domain],
+            set_={
+                "mastery_total": StudentDomainReadiness.mastery_total + stmt.excluded.mastery_total,
+                "objectives_practiced": StudentDomainReadiness.objectives_practiced + stmt.excluded.objectives_practiced,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+        return
+    readiness = {
+        (row.student_id, row.domain): row
+        for row in db.query(StudentDomainReadiness).filter(StudentDomainReadiness.student_id.in_({sid for sid, _ in deltas}))
+    }
+    for (student_id, domain), (total, practiced) in deltas.items():
+        row = readiness.get((student_id, domain))
+        if row is None:
+            db.add(StudentDomainReadiness(student_id=student_id, domain=domain, mastery_total=total, objectives_practiced=practiced))
+        else:
+            row.mastery_total += total
+            row.objectives_practiced += practiced
+
+
+def record_objective_scores(db: Session, scores: list[tuple[int, int, float]], at: datetime | None = None) -> None:
+    """Fold (student_id, objective_id, percent) results into objective progress and the readiness summary; the caller commits.
+
+    Missing progress rows are created with an upsert, then the rows are read
+    with FOR UPDATE (SQLite is already serialized by the upsert's write lock),
+    so concurrent submits for a student apply one after the other. Readiness
+    moves by each level's change through an atomic upsert, so nothing is
+    re-aggregated or read-modify-written per event.
+    """
+    catalog = objective_index.catalog(db)
+    scores = [item for item in scores if item[1] in catalog.domain_of]
+    if not scores:
+        return
+    at = at or datetime.utcnow()
+    keys = list(dict.fromkeys((student_id, objective_id) for student_id, objective_id, _ in scores))
+    # The session does not autoflush; rows added earlier in this transaction must be visible.
+    db.flush()
+    created = _create_progress_rows(db, keys)
+    progress = {
+        (row.student_id, row.objective_id): row
+        for row in db.query(StudentObjectiveProgress)
+        .filter(tuple_(StudentObjectiveProgress.student_id, StudentObjectiveProgress.objective_id).in_(keys))
+        .populate_existing()
+        .with_for_update()
+    }
+    deltas: dict[tuple[int, str], list[int]] = defaultdict(lambda: [0, 0])
+    for student_id, objective_id, score in scores:
+        row = progress[(student_id, objective_id)]
+        delta = deltas[(student_id, catalog.domain_of[objective_id])]
+        if (student_id, objective_id) in created:
+            created.discard((student_id, objective_id))
+            delta[1] += 1
+        previous = row.mastery_level or 0
+        row.mastery_level, row.attempts = _apply_score(previous, row.attempts or 0, score)
+        row.last_practiced = at
+        delta[0] += row.mastery_level - previous
+    _add_readiness(db, deltas)
+
+
+def record_quiz_objectives(db: Session, student_id: int, quiz: Quiz, results: list[dict]) -> None:
+    catalog = objective_index.catalog(db)
+    scores = quiz_objective_scores(catalog, quiz, results)
+    record_objective_scores(db, [(student_id, objective_id, score) for objective_id, score in scores.items()])
+
+
+def ticket_objective_scores(db: Session, ticket: Ticket | None, student_ids: list[int], score: int) -> list[tuple[int, int, float]]:
+    """(student_id, objective_id, percent) results for a verified ticket scored out of 10."""
+    if ticket is None:
+        return []
+    objective_ids = objective_index.catalog(db).resolve(ticket.objective_ids)
+    return [(student_id, objective_id, score * 10) for student_id in dict.fromkeys(student_ids) for objective_id in objective_ids]
+
+
+def tag_content(db: Session, objects) -> int:
+    """Tag quizzes, questions and tickets that have no objective ids yet. Returns the number tagged."""
+    catalog = objective_index.catalog(db)
+    tagged = 0
+    for obj in objects:
+        if obj.objective_ids:
+            continue
+        if isinstance(obj, Quiz):
+            objective_ids = catalog.tag(_quiz_text(obj), obj.domain_id)
+        elif isinstance(obj, Question):
+            quiz = obj.quiz or (db.get(Quiz, obj.quiz_id) if obj.quiz_id else None)
+            objective_ids = catalog.tag(_question_text(obj), quiz.domain_id if quiz else None)
+        elif isinstance(obj, Ticket):
+            objective_ids = catalog.tag(_ticket_text(obj), obj.domain_id)
+        else:
+            continue
+        if objective_ids:
+            obj.objective_ids = objective_ids
+            tagged += 1
+    return tagged
+
+
+def tag_untagged_content(db: Session) -> int:
+    """Backfill objective tags on existing content. Returns the number of rows tagged."""
+    return (
+        tag_content(db, db.query(Quiz).all())
+        + tag_content(db, db.query(Question).options(selectinload(Question.quiz)).all())
+        + tag_content(db, db.query(Ticket).all())
+    )
+
+
+def rebuild_objective_progress(db: Session) -> int:
+    """Replay graded quizzes and verified tickets into objective progress and readiness. Returns the progress row count.
+
+    Quiz attempts only keep their latest results, so a retaken quiz replays
+    those; events are folded in time order with the same step as live updates.
+    """
+    catalog = objective_index.catalog(db)
+    events: list[tuple[datetime, int, int, float]] = []
+    attempts = db.query(QuizAttempt).options(selectinload(QuizAttempt.quiz).selectinload(Quiz.questions)).all()
+    for attempt in attempts:
+        for objective_id, score in quiz_objective_scores(catalog, attempt.quiz, attempt.results or []).items():
+            events.append((attempt.completed_at or datetime.utcnow(), attempt.student_id, objective_id, score))
+    tickets = (
+        db.query(TicketSubmission)
+        .options(selectinload(TicketSubmission.ticket))
+        .filter(TicketSubmission.status == "passed", TicketSubmission.xp_granted.is_(True))
+        .all()
+    )
+    for submission in tickets:
+        score = int(submission.final_score if submission.final_score is not None else submission.ai_score or 0)
+        participants = [submission.student_id] + [int(x) for x in (submission.collaborator_ids or [])]
+        at = submission.verified_at or submission.submitted_at or datetime.utcnow()
+        for student_id, objective_id, percent in ticket_objective_scores(db, submission.ticket, participants, score):
+            events.append((at, student_id, objective_id, percent))
+
+    progress: dict[tuple[int, int], dict] = {}
+    for at, student_id, objective_id, score in sorted(events, key=lambda item: (item[0].replace(tzinfo=None), item[1], item[2])):
+        row = progress.setdefault(
+            (student_id, objective_id),
+            {"student_id": student_id, "objective_id": objective_id, "mastery_level": 0, "attempts": 0},
+        )
+        row["mastery_level"], row["attempts"] = _apply_score(row["mastery_level"], row["attempts"], score)
+        row["last_practiced"] = at
+
+    db.query(StudentObjectiveProgress).delete()
+    if progress:
+        db.execute(insert(StudentObjectiveProgress), list(progress.values()))
+    rebuild_readiness(db)
+    return len(progress)
+
+
+def rebuild_readiness(db: Session) -> int:
+    """Recompute every readiness summary row from objective progress. Returns the number of rows written."""
+    rows = (
+        db.query(
+            StudentObjectiveProgress.student_id,
+            ComptiaObjective.domain,
+            func.sum(StudentObjectiveProgress.mastery_level),
+            func.count(StudentObjectiveProgress.objective_id),
+        )
+        .join(ComptiaObjective, ComptiaObjective.id == StudentObjectiveProgress.objective_id)
+        .group_by(StudentObjectiveProgress.student_id, ComptiaObjective.domain)
+        .all()
+    )
+    db.query(StudentDomainReadiness).delete()
+    if rows:
+        db.execute(
+            insert(StudentDomainReadiness),
+            [
+                {"student_id": sid, "domain": domain, "mastery_total": int(total or 0), "objectives_practiced": int(count)}
+                for sid, domain, total, count in rows
+            ],
+        )
+    return len(rows)
+
+
+@event.listens_for(Session, "before_flush")
+def _tag_new_content(session: Session, flush_context, instances) -> None:
+    new = [obj for obj in session.new if isinstance(obj, (Quiz, Question, Ticket)) and not obj.objective_ids]
+    if new:
+        tag_content(session, new)
+
+
+_PENDING_KEY = "objective_index_stale"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_objective_changes(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, ComptiaObjective):
+            session.info[_PENDING_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_objective_changes(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, None):
+        objective_index.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_objective_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
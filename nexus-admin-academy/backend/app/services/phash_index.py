@@ -0,0 +1,103 @@
+import os
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.models.evidence import EvidenceArtifact
+
+NEAR_DUPLICATE_DISTANCE = int(os.getenv("NEAR_DUPLICATE_DISTANCE", "6"))
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance.
+
+    A node's children are keyed by their distance to the node, so a radius
+    search only descends into children whose key lies within
+    [d - radius, d + radius] instead of scanning every hash.
+    """
+
+    def __init__(self):
+        # node = [hash, {item, ...}, {distance: child_node}]
+        self._root: list | None = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item) -> None:
+        if self._root is None:
+            self._root = [value, {item}, {}]
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                if item not in node[1]:
+                    node[1].add(item)
+                    self._size += 1
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, {item}, {}]
+                self._size += 1
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list[tuple[int, object]]:
+        matches = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                matches.extend((distance, item) for item in node[1])
+            for key, child in node[2].items():
+                if distance - radius <= key <= distance + radius:
+                    stack.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class ScreenshotHashIndex:
+    """Process-wide perceptual-hash index, loaded from the artifacts table on first use."""
+
+    def __init__(self):
+        self._tree = BKTree()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        rows = (
+            db.query(EvidenceArtifact.id, EvidenceArtifact.checksum, EvidenceArtifact.perceptual_hash)
+            .filter(EvidenceArtifact.perceptual_hash.isnot(None))
+            .all()
+        )
+        for row in rows:
+            self._tree.add(int(row.perceptual_hash, 16), (row.id, row.checksum))
+        self._loaded = True
+
+    def find_and_add(self, db: Session, artifact_id: int, checksum: str | None, phash: str) -> list[tuple[int, int]]:
+        """Return (artifact_id, distance) for every indexed near-duplicate, closest first, then index this hash.
+
+        Byte-identical copies are skipped here; the checksum check already reports them.
+        """
+        value = int(phash, 16)
+        with self._lock:
+            self._ensure_loaded(db)
+            matches = [
+                (other_id, distance)
+                for distance, (other_id, other_checksum) in self._tree.search(value, NEAR_DUPLICATE_DISTANCE)
+                if other_id != artifact_id and other_checksum != checksum
+            ]
+            self._tree.add(value, (artifact_id, checksum))
+        return matches
+
+
+screenshot_index = ScreenshotHashIndex()
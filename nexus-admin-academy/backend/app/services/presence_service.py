@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.login_streak import LoginStreak
+from app.models.student import Student
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = max(0.5, float(os.getenv("PRESENCE_FLUSH_SECONDS", "5")))
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+@dataclass
+class StreakState:
+    current_streak: int
+    longest_streak: int
+    last_login: date | None
+
+
+def advance_streak(state: StreakState | None, today: date) -> StreakState:
+    if state is None:
+        return StreakState(1, 1, today)
+    if state.last_login == today:
+        return state
+    if state.last_login == today - timedelta(days=1):
+        current = state.current_streak + 1
+        return StreakState(current, max(state.longest_streak, current), today)
+    return StreakState(1, state.longest_streak, today)
+
+
+class PresenceTracker:
+    """Write-behind last-seen and login-streak state.
+
+    touch() and check_in() only update memory; a background task writes the
+    coalesced changes every FLUSH_INTERVAL_SECONDS as one batched UPDATE of
+    students.last_active_at and one upsert of login_streaks. Reads overlay
+    pending (and in-flight) state on what the database returned. Without a
+    running task (scripts, tests) every change is flushed immediately.
+    """
+
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS):
+        self.interval = interval
+        self._last_seen: dict[int, datetime] = {}
+        self._streaks: dict[int, StreakState] = {}
+        self._flushing_seen: dict[int, datetime] = {}
+        self._flushing_streaks: dict[int, StreakState] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("presence_flush_failed")
+
+    def touch(self, student_id: int, at: datetime | None = None) -> None:
+        at = at or datetime.utcnow()
+        with self._lock:
+            previous = self._last_seen.get(student_id)
+            if previous is None or at > previous:
+                self._last_seen[student_id] = at
+        if not self.running:
+            self.flush()
+
+    def check_in(self, db: Session, student_id: int, today: date | None = None) -> StreakState:
+        """Record a login for today and return the resulting streak."""
+        today = today or date.today()
+        state = self.streak(student_id)
+        if state is None:
+            row = db.query(LoginStreak).filter(LoginStreak.student_id == student_id).first()
+            state = StreakState(row.current_streak, row.longest_streak, row.last_login) if row else None
+        with self._lock:
+            # Another check-in may have landed while the row was being read.
+            state = advance_streak(self._streaks.get(student_id) or self._flushing_streaks.get(student_id) or state, today)
+            self._streaks[student_id] = state
+        self.touch(student_id)
+        return state
+
+    def last_seen(self, student_id: int, stored: datetime | None) -> datetime | None:
+        with self._lock:
+            pending = self._last_seen.get(student_id) or self._flushing_seen.get(student_id)
+        if pending is None:
+            return stored
+        if stored is None:
+            return pending
+        if stored.tzinfo is not None:
+            stored = stored.astimezone(timezone.utc).replace(tzinfo=None)
+        return max(pending, stored)
+
+    def streak(self, student_id: int) -> StreakState | None:
+        with self._lock:
+            return self._streaks.get(student_id) or self._flushing_streaks.get(student_id)
+
+    def flush(self) -> int:
+        """Write pending state; returns the number of students written."""
+        with self._lock:
+            if not self._last_seen and not self._streaks:
+                return 0
+            self._flushing_seen, self._last_seen = self._last_seen, {}
+            self._flushing_streaks, self._streaks = self._streaks, {}
+            seen, streaks = self._flushing_seen, self._flushing_streaks
+
+        db = SessionLocal()
+        try:
+            if seen:
+                table = Student.__table__
+                db.execute(
+                    update(table).where(table.c.id == bindparam("sid")).values(last_active_at=bindparam("seen")),
+                    [{"sid": student_id, "seen": at} for student_id, at in seen.items()],
+                )
+            if streaks:
+                self._write_streaks(db, streaks)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                # Keep whatever is newer so the next flush retries.
+                for student_id, at in seen.items():
+                    if at > self._last_seen.get(student_id, datetime.min):
+                        self._last_seen[student_id] = at
+                for student_id, state in streaks.items():
+                    self._streaks.setdefault(student_id, state)
+            raise
+        finally:
+            db.close()
+            with self._lock:
+                self._flushing_seen, self._flushing_streaks = {}, {}
+        return len(seen.keys() | streaks.keys())
+
+    @staticmethod
+    def _write_streaks(db: Session, streaks: dict[int, StreakState]) -> None:
+        rows = [
+            {
+                "student_id": student_id,
+                "current_streak": state.current_streak,
+                "longest_streak": state.longest_streak,
+                "last_login": state.last_login,
+            }
+            for student_id, state in streaks.items()
+        ]
+        insert = _UPSERTS.get(db.get_bind().dialect.name)
+        if insert is None:
+            for row in rows:
+                db.merge(LoginStreak(**row))
+            return
+        stmt = insert(LoginStreak)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LoginStreak.student_id],
+            set_={
+                "current_streak": stmt.excluded.current_streak,
+                "longest_streak": stmt.excluded.longest_streak,
+                "last_login": stmt.excluded.last_login,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt, rows)
+
+
+presence = PresenceTracker()
@@ -1,11 +1,12 @@
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.models.lab import LabRun, LabTemplate
 from app.models.learning import Lesson, Module
+from app.models.mastery import StudentDomainMastery
 from app.models.progression import PromotionGate, Role
-from app.models.quiz import Quiz, QuizAttempt
+from app.models.student import Student
 from app.models.ticket import Ticket, TicketSubmission
+from app.services.learning_path import lesson_aggregates, module_mastery, unlock_state
 
 
 def check_module_unlock(student_id: int, module_id: int, db: Session) -> dict:
@@ -13,66 +14,89 @@ def check_module_unlock(student_id: int, module_id: int, db: Session) -> dict:
     if not module:
         return {"unlocked": False, "requirements_missing": ["Module not found"]}
 
-    requirements_missing = []
+    mastery = {}
     if module.prerequisite_module_id:
-        prereq_mastery = get_module_mastery(student_id, module.prerequisite_module_id, db)
-        if prereq_mastery < (module.unlock_threshold or 70):
-            requirements_missing.append(
-                f"Need {module.unlock_threshold}% mastery in prerequisite (current: {prereq_mastery}%)"
-            )
-
-    return {"unlocked": len(requirements_missing) == 0, "requirements_missing": requirements_missing}
+        mastery[module.prerequisite_module_id] = get_module_mastery(student_id, module.prerequisite_module_id, db)
+    return unlock_state(module, mastery)
 
 
 def get_module_mastery(student_id: int, module_id: int, db: Session) -> float:
-    lessons = db.query(Lesson).filter(Lesson.module_id == module_id).all()
-    if not lessons:
+    lesson_ids = [row.id for row in db.query(Lesson.id).filter(Lesson.module_id == module_id).all()]
+    if not lesson_ids:
         return 0.0
+    return module_mastery(student_id, lesson_ids, lesson_aggregates(db, [student_id], lesson_ids))
 
-    total_score = 0.0
-    for lesson in lessons:
-        quiz_avg = (
-            db.query(func.coalesce(func.avg(QuizAttempt.score), 0))
-            .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
-            .filter(QuizAttempt.student_id == student_id, Quiz.lesson_id == lesson.id)
-            .scalar()
-            or 0
-        )
 
-        ticket_avg = (
-            db.query(func.coalesce(func.avg(TicketSubmission.final_score), 0))
-            .join(Ticket, TicketSubmission.ticket_id == Ticket.id)
-            .filter(TicketSubmission.student_id == student_id, Ticket.lesson_id == lesson.id, TicketSubmission.status == "passed")
-            .scalar()
-            or 0
-        )
+MASTERY_DOMAIN_ALIASES = {
+    "hardware": "1.0",
+    "networking": "2.0",
+    "software_troubleshooting": "3.0",
+    "security": "4.0",
+    "procedures": "4.0",
+}
+TICKET_REQUIREMENT = "min_verified_tickets_by_difficulty"
+MASTERY_REQUIREMENT = "min_mastery_by_domain"
 
-        lab_avg = (
-            db.query(func.coalesce(func.avg(LabRun.final_score), 0))
-            .join(LabTemplate, LabRun.lab_template_id == LabTemplate.id)
-            .filter(LabRun.student_id == student_id, LabTemplate.lesson_id == lesson.id)
-            .scalar()
-            or 0
-        )
 
-        lesson_score = (float(quiz_avg) * 0.3) + (float(ticket_avg) * 0.4) + (float(lab_avg) * 0.3)
-        total_score += lesson_score
+def _resolve_domain(domain) -> str:
+    return MASTERY_DOMAIN_ALIASES.get(str(domain).lower(), str(domain))
 
-    return round((total_score / len(lessons)) * 10, 1)
 
+def _thresholds(gate: PromotionGate) -> dict:
+    return (gate.requirement_config or {}).get("thresholds", {})
 
-def check_promotion_eligibility(student_id: int, target_role_id: int, db: Session) -> dict:
-    gates = db.query(PromotionGate).filter(PromotionGate.role_id == target_role_id).all()
+
+def _gate_aggregates(db: Session, gates: list[PromotionGate], student_ids: list[int] | None) -> tuple[dict, dict]:
+    """Everything the gates ask about, as at most two grouped queries.
+
+    Returns ({(student_id, difficulty): passed tickets}, {(student_id, domain_id): mastery}).
+    student_ids=None aggregates the whole cohort.
+    """
+    difficulties = {int(key) for gate in gates if gate.requirement_type == TICKET_REQUIREMENT for key in _thresholds(gate)}
+    domains = {_resolve_domain(key) for gate in gates if gate.requirement_type == MASTERY_REQUIREMENT for key in _thresholds(gate)}
+
+    ticket_counts = {}
+    if difficulties:
+        query = (
+            db.query(TicketSubmission.student_id, Ticket.difficulty, func.count(TicketSubmission.id))
+            .join(Ticket, TicketSubmission.ticket_id == Ticket.id)
+            .filter(TicketSubmission.status == "passed", Ticket.difficulty.in_(difficulties))
+        )
+        if student_ids is not None:
+            query = query.filter(TicketSubmission.student_id.in_(student_ids))
+        ticket_counts = {
+            (student_id, difficulty): int(count)
+            for student_id, difficulty, count in query.group_by(TicketSubmission.student_id, Ticket.difficulty).all()
+        }
+
+    mastery = {}
+    if domains:
+        query = db.query(
+            StudentDomainMastery.student_id,
+            StudentDomainMastery.domain_id,
+            func.max(StudentDomainMastery.mastery_percent),
+        ).filter(StudentDomainMastery.domain_id.in_(domains))
+        if student_ids is not None:
+            query = query.filter(StudentDomainMastery.student_id.in_(student_ids))
+        mastery = {
+            (student_id, domain_id): float(percent or 0)
+            for student_id, domain_id, percent in query.group_by(
+                StudentDomainMastery.student_id, StudentDomainMastery.domain_id
+            ).all()
+        }
+    return ticket_counts, mastery
+
+
+def _evaluate_gates(student_id: int, gates: list[PromotionGate], ticket_counts: dict, mastery: dict) -> dict:
     requirements_met = []
     requirements_missing = []
 
     for gate in gates:
         req_type = gate.requirement_type
-        config = gate.requirement_config or {}
-        if req_type == "min_verified_tickets_by_difficulty":
-            result = _check_ticket_requirement(student_id, config, db)
-        elif req_type == "min_mastery_by_domain":
-            result = _check_mastery_requirement(student_id, config, db)
+        if req_type == TICKET_REQUIREMENT:
+            result = _check_ticket_requirement(student_id, _thresholds(gate), ticket_counts)
+        elif req_type == MASTERY_REQUIREMENT:
+            result = _check_mastery_requirement(student_id, _thresholds(gate), mastery)
         else:
             continue
 
@@ -90,23 +114,30 @@ def check_promotion_eligibility(student_id: int, target_role_id: int, db: Sessio
     }
 
 
-def get_promotion_status(student_id: int, db: Session) -> dict:
-    from app.models.student import Student
+def check_promotion_eligibility(student_id: int, target_role_id: int, db: Session) -> dict:
+    gates = db.query(PromotionGate).filter(PromotionGate.role_id == target_role_id).all()
+    ticket_counts, mastery = _gate_aggregates(db, gates, [student_id])
+    return _evaluate_gates(student_id, gates, ticket_counts, mastery)
 
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
-        return {"current_role": None, "next_role": None, "eligibility": None}
 
-    current_role = None
-    if student.current_role_id:
-        current_role = db.query(Role).filter(Role.id == student.current_role_id).first()
-    if current_role is None:
-        current_role = db.query(Role).order_by(Role.rank_order.asc()).first()
+def _role_ladder(roles: list[Role], current_role_id: int | None) -> tuple[Role | None, Role | None]:
+    """(current, next) from roles sorted by rank_order; no or unknown role means the lowest."""
+    by_id = {role.id: role for role in roles}
+    by_rank = {role.rank_order: role for role in roles}
+    current_role = by_id.get(current_role_id) if current_role_id else None
+    if current_role is None and roles:
+        current_role = roles[0]
+    next_role = by_rank.get(current_role.rank_order + 1) if current_role else None
+    return current_role, next_role
 
-    next_role = None
-    if current_role:
-        next_role = db.query(Role).filter(Role.rank_order == current_role.rank_order + 1).first()
 
+def get_promotion_status(student_id: int, db: Session) -> dict:
+    student = db.query(Student.id, Student.current_role_id).filter(Student.id == student_id).first()
+    if not student:
+        return {"current_role": None, "next_role": None, "eligibility": None}
+
+    roles = db.query(Role).order_by(Role.rank_order.asc()).all()
+    current_role, next_role = _role_ladder(roles, student.current_role_id)
     eligibility = check_promotion_eligibility(student_id, next_role.id, db) if next_role else None
     return {
         "current_role": _role_dict(current_role),
@@ -115,6 +146,42 @@ def get_promotion_status(student_id: int, db: Session) -> dict:
     }
 
 
+def promotion_report(db: Session, target_role_id: int | None = None) -> list[dict]:
+    """Evaluate every student against their next role's gates (or target_role_id's) in one pass.
+
+    Roles, gates and students are read once and the requirement aggregates
+    come from two cohort-wide grouped queries, so the cost does not grow
+    with students x gates x thresholds.
+    """
+    roles = db.query(Role).order_by(Role.rank_order.asc()).all()
+    gates_by_role: dict[int, list[PromotionGate]] = {}
+    for gate in db.query(PromotionGate).order_by(PromotionGate.id.asc()).all():
+        gates_by_role.setdefault(gate.role_id, []).append(gate)
+    ticket_counts, mastery = _gate_aggregates(db, [gate for gates in gates_by_role.values() for gate in gates], None)
+    roles_by_id = {role.id: role for role in roles}
+
+    report = []
+    for student in db.query(Student.id, Student.name, Student.current_role_id).order_by(Student.id.asc()).all():
+        current_role, next_role = _role_ladder(roles, student.current_role_id)
+        if target_role_id is not None:
+            next_role = roles_by_id.get(target_role_id)
+        eligibility = (
+            _evaluate_gates(student.id, gates_by_role.get(next_role.id, []), ticket_counts, mastery) if next_role else None
+        )
+        report.append(
+            {
+                "student_id": student.id,
+                "student_name": student.name,
+                "current_role": _role_dict(current_role),
+                "next_role": _role_dict(next_role),
+                "eligible": bool(eligibility and eligibility["eligible"]),
+                "completion_percent": eligibility["completion_percent"] if eligibility else None,
+                "requirements_missing": eligibility["requirements_missing"] if eligibility else [],
+            }
+        )
+    return report
+
+
 def _role_dict(role: Role | None) -> dict | None:
     if role is None:
         return None
@@ -126,62 +193,32 @@ def _role_dict(role: Role | None) -> dict | None:
     }
 
 
-def _check_ticket_requirement(student_id: int, config: dict, db: Session) -> dict:
-    thresholds = (config or {}).get("thresholds", {})
+def _check_ticket_requirement(student_id: int, thresholds: dict, ticket_counts: dict) -> dict:
     progress = {}
     met = True
     for difficulty, required in thresholds.items():
-        current = (
-            db.query(func.count(TicketSubmission.id))
-            .join(Ticket, TicketSubmission.ticket_id == Ticket.id)
-            .filter(
-                TicketSubmission.student_id == student_id,
-                TicketSubmission.status == "passed",
-                Ticket.difficulty == int(difficulty),
-            )
-            .scalar()
-            or 0
-        )
+        current = ticket_counts.get((student_id, int(difficulty)), 0)
         progress[str(difficulty)] = {"current": int(current), "required": int(required)}
         if int(current) < int(required):
             met = False
     return {
-        "type": "min_verified_tickets_by_difficulty",
+        "type": TICKET_REQUIREMENT,
         "description": "Verified tickets by difficulty",
         "progress": progress,
         "met": met,
     }
 
 
-def _check_mastery_requirement(student_id: int, config: dict, db: Session) -> dict:
-    from app.models.mastery import StudentDomainMastery
-
-    thresholds = (config or {}).get("thresholds", {})
-    aliases = {
-        "hardware": "1.0",
-        "networking": "2.0",
-        "software_troubleshooting": "3.0",
-        "security": "4.0",
-        "procedures": "4.0",
-    }
+def _check_mastery_requirement(student_id: int, thresholds: dict, mastery: dict) -> dict:
     progress = {}
     met = True
     for domain, required in thresholds.items():
-        resolved_domain = aliases.get(str(domain).lower(), str(domain))
-        row = (
-            db.query(StudentDomainMastery)
-            .filter(
-                StudentDomainMastery.student_id == student_id,
-                StudentDomainMastery.domain_id == resolved_domain,
-            )
-            .first()
-        )
-        current = float(row.mastery_percent) if row else 0.0
+        current = mastery.get((student_id, _resolve_domain(domain)), 0.0)
         progress[str(domain)] = {"current": round(current, 1), "required": int(required)}
         if current < int(required):
             met = False
     return {
-        "type": "min_mastery_by_domain",
+        "type": MASTERY_REQUIREMENT,
         "description": "Mastery by domain",
         "progress": progress,
         "met": met,
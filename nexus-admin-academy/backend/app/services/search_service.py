@@ -0,0 +1,131 @@
+import re
+
+from sqlalchemy import column, func, literal_column, or_, table
+from sqlalchemy.orm import Session
+
+from app.models.command_reference import CommandReference
+from app.models.learning import Lesson
+
+MAX_TERMS = 8
+_TOKEN = re.compile(r"[^\W_]+")
+
+# Full-text indexes from migration 0023: FTS5 tables on SQLite, a generated
+# search_vector column with a GIN index on Postgres. Column order below
+# matches the FTS5 tables and sets their bm25 weights.
+_LESSONS_FTS = table("lessons_fts", column("rowid"))
+_COMMANDS_FTS = table("command_reference_fts", column("rowid"))
+LESSON_WEIGHTS = (10.0, 1.0)  # title, summary
+COMMAND_WEIGHTS = (10.0, 2.0, 1.0)  # command, description, syntax
+
+
+def _tokens(term: str) -> list[str]:
+    return _TOKEN.findall(term.lower())[:MAX_TERMS]
+
+
+def _fts5_match(tokens: list[str], columns: list[str] | None = None) -> str:
+    # Quoted tokens cannot be read as FTS5 operators; the trailing * makes each one a prefix.
+    expression = " ".join(f'"{token}"*' for token in tokens)
+    return f"{{{' '.join(columns)}}} : ({expression})" if columns else expression
+
+
+def _tsquery(tokens: list[str], weights: str = "") -> str:
+    return " & ".join(f"{token}:*{weights}" for token in tokens)
+
+
+def _search_lessons_sqlite(db: Session, tokens: list[str], limit: int):
+    fts = literal_column("lessons_fts")
+    return (
+        db.query(Lesson)
+        .join(_LESSONS_FTS, _LESSONS_FTS.c.rowid == Lesson.id)
+        .filter(fts.op("MATCH")(_fts5_match(tokens)))
+        .order_by(func.bm25(fts, *LESSON_WEIGHTS), Lesson.lesson_order.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _search_lessons_postgres(db: Session, tokens: list[str], limit: int):
+    vector = literal_column("lessons.search_vector")
+    query = func.to_tsquery("simple", _tsquery(tokens))
+    return (
+        db.query(Lesson)
+        .filter(vector.op("@@")(query))
+        .order_by(func.ts_rank(vector, query).desc(), Lesson.lesson_order.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _search_lessons_like(db: Session, term: str, limit: int):
+    like = f"%{term}%"
+    return (
+        db.query(Lesson)
+        .filter(or_(Lesson.title.ilike(like), Lesson.summary.ilike(like)))
+        .order_by(Lesson.lesson_order.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _search_commands_sqlite(db: Session, tokens: list[str], limit: int, include_syntax: bool):
+    fts = literal_column("command_reference_fts")
+    columns = None if include_syntax else ["command", "description"]
+    return (
+        db.query(CommandReference)
+        .join(_COMMANDS_FTS, _COMMANDS_FTS.c.rowid == CommandReference.id)
+        .filter(fts.op("MATCH")(_fts5_match(tokens, columns)))
+        .order_by(func.bm25(fts, *COMMAND_WEIGHTS), CommandReference.command.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _search_commands_postgres(db: Session, tokens: list[str], limit: int, include_syntax: bool):
+    vector = literal_column("command_reference.search_vector")
+    # Weight labels follow migration 0023: A command, B description, C syntax.
+    query = func.to_tsquery("simple", _tsquery(tokens, "" if include_syntax else "AB"))
+    return (
+        db.query(CommandReference)
+        .filter(vector.op("@@")(query))
+        .order_by(func.ts_rank(vector, query).desc(), CommandReference.command.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _search_commands_like(db: Session, term: str, limit: int, include_syntax: bool):
+    like = f"%{term}%"
+    fields = [CommandReference.command, CommandReference.description] + ([CommandReference.syntax] if include_syntax else [])
+    return (
+        db.query(CommandReference)
+        .filter(or_(*(field.ilike(like) for field in fields)))
+        .order_by(CommandReference.command.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+_LESSON_SEARCH = {"sqlite": _search_lessons_sqlite, "postgresql": _search_lessons_postgres}
+_COMMAND_SEARCH = {"sqlite": _search_commands_sqlite, "postgresql": _search_commands_postgres}
+
+
+def search_lessons(db: Session, term: str, limit: int = 10) -> list[Lesson]:
+    """Lessons matching every word of term as a prefix, best match first."""
+    tokens = _tokens(term)
+    if not tokens:
+        return []
+    search = _LESSON_SEARCH.get(db.get_bind().dialect.name)
+    if search is None:
+        return _search_lessons_like(db, term, limit)
+    return search(db, tokens, limit)
+
+
+def search_commands(db: Session, term: str, limit: int = 25, include_syntax: bool = True) -> list[CommandReference]:
+    """Commands matching every word of term as a prefix, best match first; syntax is searched only if asked."""
+    tokens = _tokens(term)
+    if not tokens:
+        return []
+    search = _COMMAND_SEARCH.get(db.get_bind().dialect.name)
+    if search is None:
+        return _search_commands_like(db, term, limit, include_syntax)
+    return search(db, tokens, limit, include_syntax)
@@ -1,13 +1,20 @@
+import logging
+import os
 from datetime import datetime
 
-from sqlalchemy import desc
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.mastery import StudentDomainMastery
 from app.models.student import Student
-from app.models.weekly_lead import WeeklyDomainLead
+from app.models.weekly_lead import WeeklyDomainLead, WeeklyDomainLeadRun
 from app.services.mastery_service import DOMAIN_LABELS
 
+logger = logging.getLogger(__name__)
+
+LEADS_TOP_N = max(1, int(os.getenv("WEEKLY_LEADS_TOP_N", "1")))
+
 
 def _week_key() -> str:
     now = datetime.utcnow()
@@ -15,64 +22,108 @@ def _week_key() -> str:
     return f"{year}-W{week:02d}"
 
 
-def recompute_weekly_domain_leads(db: Session) -> list[dict]:
-    week_key = _week_key()
-    db.query(WeeklyDomainLead).filter(WeeklyDomainLead.week_key == week_key).delete()
-    db.commit()
+def _badge_name(domain_id: str, rank: int) -> str:
+    label = DOMAIN_LABELS.get(domain_id, domain_id)
+    return f"Lead {label} Admin" if rank == 1 else f"#{rank} {label} Admin"
 
-    domains = list(DOMAIN_LABELS.keys())
-    created = []
 
-    for domain_id in domains:
-        top = (
-            db.query(StudentDomainMastery)
-            .filter(StudentDomainMastery.domain_id == domain_id)
-            .order_by(desc(StudentDomainMastery.mastery_percent))
-            .first()
-        )
-        if not top:
-            continue
+def ranked_domain_leads(db: Session, top_n: int = LEADS_TOP_N) -> list:
+    """Top students per domain from one windowed query.
 
-        lead = WeeklyDomainLead(
-            week_key=week_key,
-            domain_id=domain_id,
-            student_id=top.student_id,
-            xp_value=int(top.mastery_percent),
-            badge_name=f"Lead {DOMAIN_LABELS.get(domain_id, domain_id)} Admin",
+    ROW_NUMBER() picks at most top_n per domain, breaking mastery ties by who
+    reached the score first, then by student id; RANK() is reported alongside
+    so tied students share a rank (and badge) rather than an arbitrary order.
+    """
+    mastery = StudentDomainMastery.mastery_percent.desc()
+    ranked = (
+        select(
+            StudentDomainMastery.domain_id,
+            StudentDomainMastery.student_id,
+            StudentDomainMastery.mastery_percent,
+            func.rank().over(partition_by=StudentDomainMastery.domain_id, order_by=mastery).label("rank"),
+            func.row_number()
+            .over(
+                partition_by=StudentDomainMastery.domain_id,
+                order_by=(mastery, StudentDomainMastery.updated_at.asc(), StudentDomainMastery.student_id.asc()),
+            )
+            .label("position"),
         )
-        db.add(lead)
-        db.flush()
+        .where(StudentDomainMastery.domain_id.in_(list(DOMAIN_LABELS)))
+        .subquery()
+    )
+    return db.execute(
+        select(ranked, Student.name)
+        .outerjoin(Student, Student.id == ranked.c.student_id)
+        .where(ranked.c.position <= top_n)
+        .order_by(ranked.c.domain_id.asc(), ranked.c.position.asc())
+    ).all()
 
-        student = db.query(Student).filter(Student.id == top.student_id).first()
-        created.append(
-            {
-                "week_key": week_key,
-                "domain_id": domain_id,
-                "domain_name": DOMAIN_LABELS.get(domain_id, domain_id),
-                "student_id": top.student_id,
-                "student_name": student.name if student else f"Student {top.student_id}",
-                "badge_name": lead.badge_name,
-                "mastery_percent": round(float(top.mastery_percent or 0), 1),
-            }
-        )
 
-    db.commit()
-    return created
+def weekly_leads_computed(db: Session, week_key: str | None = None) -> bool:
+    wk = week_key or _week_key()
+    return db.query(WeeklyDomainLeadRun.week_key).filter(WeeklyDomainLeadRun.week_key == wk).first() is not None
+
+
+def recompute_weekly_domain_leads(db: Session, top_n: int = LEADS_TOP_N) -> list[dict]:
+    """Replace this week's leads and commit.
+
+    The weekly_domain_lead_runs row is written even when nobody has mastery
+    yet, so the scheduler does not recompute an empty week on every poll.
+    """
+    week_key = _week_key()
+    rows = ranked_domain_leads(db, top_n)
+    db.query(WeeklyDomainLead).filter(WeeklyDomainLead.week_key == week_key).delete()
+    db.query(WeeklyDomainLeadRun).filter(WeeklyDomainLeadRun.week_key == week_key).delete()
+    db.add_all(
+        WeeklyDomainLead(
+            week_key=week_key,
+            domain_id=row.domain_id,
+            student_id=row.student_id,
+            xp_value=int(row.mastery_percent or 0),
+            badge_name=_badge_name(row.domain_id, row.rank),
+        )
+        for row in rows
+    )
+    db.add(WeeklyDomainLeadRun(week_key=week_key, leads=len(rows)))
+    try:
+        db.commit()
+        logger.info("weekly_domain_leads_recomputed week=%s leads=%s", week_key, len(rows))
+    except IntegrityError:
+        # Another worker recomputed the same week at the same moment from the same mastery; its rows stand.
+        db.rollback()
+    return [
+        {
+            "week_key": week_key,
+            "domain_id": row.domain_id,
+            "domain_name": DOMAIN_LABELS.get(row.domain_id, row.domain_id),
+            "student_id": row.student_id,
+            "student_name": row.name or f"Student {row.student_id}",
+            "badge_name": _badge_name(row.domain_id, row.rank),
+            "rank": row.rank,
+            "mastery_percent": round(float(row.mastery_percent or 0), 1),
+        }
+        for row in rows
+    ]
 
 
 def get_weekly_domain_leads(db: Session, week_key: str | None = None) -> list[dict]:
     wk = week_key or _week_key()
-    rows = db.query(WeeklyDomainLead).filter(WeeklyDomainLead.week_key == wk).all()
+    rows = (
+        db.query(WeeklyDomainLead, Student.name)
+        .outerjoin(Student, Student.id == WeeklyDomainLead.student_id)
+        .filter(WeeklyDomainLead.week_key == wk)
+        .order_by(WeeklyDomainLead.domain_id.asc(), WeeklyDomainLead.id.asc())
+        .all()
+    )
     out = []
-    for row in rows:
-        student = db.query(Student).filter(Student.id == row.student_id).first()
+    for row, student_name in rows:
         out.append(
             {
                 "week_key": row.week_key,
                 "domain_id": row.domain_id,
                 "domain_name": DOMAIN_LABELS.get(row.domain_id, row.domain_id),
                 "student_id": row.student_id,
-                "student_name": student.name if student else f"Student {row.student_id}",
+                "student_name": student_name or f"Student {row.student_id}",
                 "badge_name": row.badge_name,
                 "xp_value": row.xp_value,
             }
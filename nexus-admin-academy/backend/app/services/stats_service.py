@@ -0,0 +1,305 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models.comptia import StudentDomainReadiness
+from app.models.login_streak import LoginStreak
+from app.models.quiz import Quiz, QuizAttempt
+from app.models.student import Student
+from app.models.student_stats import StudentStats
+from app.models.ticket import Ticket, TicketSubmission
+from app.services.cohort_service import cohort_comparison
+from app.services.objective_service import objective_index
+from app.services.presence_service import presence
+from app.services.xp_calculator import level_from_xp
+
+CURRENT_WEEK = 1
+RECENT_ACTIVITY_LIMIT = 5
+WEAK_AREA_THRESHOLD = 6
+
+
+def _scoped(query, column, student_ids: list[int] | None):
+    return query.filter(column.in_(student_ids)) if student_ids is not None else query
+
+
+def _collect(db: Session, student_ids: list[int] | None) -> dict[int, dict]:
+    """Projection fields for the given students (all students when None), one grouped query per field."""
+    readiness, empty_readiness = _cert_readiness(db, student_ids)
+    data: dict[int, dict] = defaultdict(
+        lambda: {
+            "quizzes_completed": 0,
+            "quiz_score_total": 0,
+            "tickets_completed": 0,
+            "ticket_score_total": 0,
+            "week_progress": {},
+            "weak_areas": [],
+            "recent_activity": [],
+            "cert_readiness": empty_readiness(),
+        }
+    )
+    passed = TicketSubmission.status == "passed"
+
+    quiz_rows = _scoped(
+        db.query(QuizAttempt.student_id, func.count(QuizAttempt.id), func.coalesce(func.sum(QuizAttempt.score), 0)),
+        QuizAttempt.student_id,
+        student_ids,
+    ).group_by(QuizAttempt.student_id)
+    for sid, count, total in quiz_rows:
+        data[sid]["quizzes_completed"] = int(count)
+        data[sid]["quiz_score_total"] = int(total)
+
+    ticket_rows = _scoped(
+        db.query(TicketSubmission.student_id, func.count(TicketSubmission.id), func.coalesce(func.sum(TicketSubmission.ai_score), 0)),
+        TicketSubmission.student_id,
+        student_ids,
+    ).filter(passed).group_by(TicketSubmission.student_id)
+    for sid, count, total in ticket_rows:
+        data[sid]["tickets_completed"] = int(count)
+        data[sid]["ticket_score_total"] = int(total)
+
+    week_quiz_rows = _scoped(
+        db.query(QuizAttempt.student_id, Quiz.week_number, func.count(QuizAttempt.id)).join(Quiz, Quiz.id == QuizAttempt.quiz_id),
+        QuizAttempt.student_id,
+        student_ids,
+    ).group_by(QuizAttempt.student_id, Quiz.week_number)
+    week_ticket_rows = _scoped(
+        db.query(TicketSubmission.student_id, Ticket.week_number, func.count(TicketSubmission.id)).join(
+            Ticket, Ticket.id == TicketSubmission.ticket_id
+        ),
+        TicketSubmission.student_id,
+        student_ids,
+    ).filter(passed).group_by(TicketSubmission.student_id, Ticket.week_number)
+    for sid, week, count in [*week_quiz_rows, *week_ticket_rows]:
+        progress = data[sid]["week_progress"]
+        progress[str(week)] = progress.get(str(week), 0) + int(count)
+
+    weak_rows = (
+        _scoped(
+            db.query(
+                TicketSubmission.student_id,
+                Ticket.category,
+                func.count(TicketSubmission.id),
+                func.avg(TicketSubmission.ai_score),
+            ).join(Ticket, Ticket.id == TicketSubmission.ticket_id),
+            TicketSubmission.student_id,
+            student_ids,
+        )
+        .filter(passed)
+        .group_by(TicketSubmission.student_id, Ticket.category)
+        .having(func.avg(TicketSubmission.ai_score) < WEAK_AREA_THRESHOLD)
+        .order_by(func.avg(TicketSubmission.ai_score).asc())
+    )
+    for sid, category, attempts, avg_score in weak_rows:
+        data[sid]["weak_areas"].append(
+            {"topic": category or "general", "avg_score": round(float(avg_score or 0), 1), "attempts": int(attempts or 0)}
+        )
+
+    for sid, entry in _recent_activity(db, student_ids):
+        data[sid]["recent_activity"].append(entry)
+    for entry in data.values():
+        entry["recent_activity"].sort(key=lambda item: item["timestamp"] or "", reverse=True)
+        del entry["recent_activity"][RECENT_ACTIVITY_LIMIT:]
+
+    for sid, summary in readiness.items():
+        data[sid]["cert_readiness"] = summary
+    return data
+
+
+def _recent_activity(db: Session, student_ids: list[int] | None):
+    """Latest quizzes and passed tickets per student, RECENT_ACTIVITY_LIMIT of each via ROW_NUMBER."""
+    quiz_rank = func.row_number().over(partition_by=QuizAttempt.student_id, order_by=QuizAttempt.completed_at.desc())
+    quizzes = _scoped(
+        db.query(
+            QuizAttempt.student_id.label("student_id"),
+            QuizAttempt.completed_at.label("timestamp"),
+            Quiz.title.label("title"),
+            QuizAttempt.score.label("score"),
+            QuizAttempt.xp_awarded.label("xp"),
+            quiz_rank.label("rank"),
+        ).join(Quiz, Quiz.id == QuizAttempt.quiz_id),
+        QuizAttempt.student_id,
+        student_ids,
+    ).subquery()
+    ticket_rank = func.row_number().over(partition_by=TicketSubmission.student_id, order_by=TicketSubmission.submitted_at.desc())
+    tickets = (
+        _scoped(
+            db.query(
+                TicketSubmission.student_id.label("student_id"),
+                TicketSubmission.submitted_at.label("timestamp"),
+                Ticket.title.label("title"),
+                TicketSubmission.ai_score.label("score"),
+                TicketSubmission.xp_awarded.label("xp"),
+                ticket_rank.label("rank"),
+            ).join(Ticket, Ticket.id == TicketSubmission.ticket_id),
+            TicketSubmission.student_id,
+            student_ids,
+        )
+        .filter(TicketSubmission.status == "passed")
+        .subquery()
+    )
+    for kind, source in (("quiz", quizzes), ("ticket", tickets)):
+        for row in db.query(source).filter(source.c.rank <= RECENT_ACTIVITY_LIMIT):
+            timestamp = row.timestamp.isoformat() if isinstance(row.timestamp, datetime) else row.timestamp
+            yield row.student_id, {"type": kind, "title": row.title, "score": row.score, "xp": row.xp, "timestamp": timestamp}
+
+
+def _cert_readiness(db: Session, student_ids: list[int] | None):
+    """Per-student readiness summaries, plus a factory for students with no objective progress yet.
+
+    Reads the student_domain_readiness sums kept by objective_service; the
+    objective catalog comes from its in-process index, so this is one query.
+    """
+    catalog = objective_index.catalog(db)
+    totals: dict[int, dict[str, tuple[int, int]]] = defaultdict(dict)
+    rows = _scoped(db.query(StudentDomainReadiness), StudentDomainReadiness.student_id, student_ids)
+    for row in rows.filter(StudentDomainReadiness.objectives_practiced > 0):
+        totals[row.student_id][row.domain] = (row.mastery_total, row.objectives_practiced)
+
+    def summary(levels: dict[str, tuple[int, int]]) -> dict:
+        practiced = sum(count for _, count in levels.values())
+        overall = sum(total for total, _ in levels.values()) / practiced if practiced else 0.0
+        return {
+            "overall_readiness": round(overall, 1),
+            "by_domain": [
+                {"domain": domain, "readiness": round(levels[domain][0] / levels[domain][1], 1) if domain in levels else 0.0}
+                for domain in catalog.domains
+            ],
+            "total_objectives": len(catalog.domain_of),
+        }
+
+    readiness = {sid: summary(levels) for sid, levels in totals.items()}
+    return readiness, lambda: summary({})
+
+
+def _get_or_create(db: Session, student_id: int) -> StudentStats:
+    row = db.query(StudentStats).filter(StudentStats.student_id == student_id).first()
+    if row:
+        return row
+    row = StudentStats(student_id=student_id)
+    db.add(row)
+    db.flush()
+    return row
+
+
+def _apply(row: StudentStats, total_xp: int, fields: dict) -> None:
+    row.total_xp = total_xp
+    for key, value in fields.items():
+        setattr(row, key, value)
+
+
+def refresh_student_stats(db: Session, student_ids: list[int]) -> None:
+    """Recompute the projection rows for these students; the caller commits with its own changes.
+
+    Called from quiz submission, ticket verification and grade overrides. Scores
+    can change in place (retakes, overrides), so the affected students' rows are
+    recomputed from source tables rather than patched by deltas.
+    """
+    student_ids = sorted(set(student_ids))
+    if not student_ids:
+        return
+    # The session does not autoflush; make the caller's pending writes visible to the queries below.
+    db.flush()
+    collected = _collect(db, student_ids)
+    totals = dict(db.query(Student.id, Student.total_xp).filter(Student.id.in_(student_ids)).all())
+    for sid in student_ids:
+        if sid in totals:
+            _apply(_get_or_create(db, sid), totals[sid], collected[sid])
+
+
+def apply_xp_awards(db: Session, totals: dict[int, int]) -> None:
+    """XP award event: only XP totals move, so existing rows get one bulk UPDATE; missing rows are built."""
+    if not totals:
+        return
+    existing = {
+        row.student_id
+        for row in db.query(StudentStats.student_id).filter(StudentStats.student_id.in_(list(totals))).all()
+    }
+    if existing:
+        db.execute(update(StudentStats), [{"student_id": sid, "total_xp": totals[sid]} for sid in existing])
+    missing = [sid for sid in totals if sid not in existing]
+    if missing:
+        refresh_student_stats(db, missing)
+
+
+def rebuild_student_stats(db: Session) -> int:
+    """Recompute every student's projection row from source tables. Returns the number of rows written."""
+    collected = _collect(db, None)
+    existing = {row.student_id: row for row in db.query(StudentStats).all()}
+    students = db.query(Student.id, Student.total_xp).all()
+    for student in students:
+        row = existing.get(student.id)
+        if row is None:
+            row = StudentStats(student_id=student.id)
+            db.add(row)
+        _apply(row, student.total_xp, collected[student.id])
+    return len(students)
+
+
+def get_cert_readiness_summary(db: Session, student_id: int) -> dict:
+    readiness, empty_readiness = _cert_readiness(db, [student_id])
+    return readiness.get(student_id) or empty_readiness()
+
+
+def _stats_query(db: Session, student_id: int):
+    """One statement: the student, its projection row (None if missing), streak, and catalog totals as scalar subqueries."""
+    return (
+        db.query(
+            Student.name,
+            Student.total_xp,
+            StudentStats,
+            LoginStreak.current_streak,
+            LoginStreak.longest_streak,
+            db.query(func.count(Quiz.id)).scalar_subquery().label("total_quizzes"),
+            db.query(func.count(Ticket.id)).scalar_subquery().label("total_tickets"),
+            db.query(func.count(Quiz.id)).filter(Quiz.week_number == CURRENT_WEEK).scalar_subquery().label("week_quizzes"),
+            db.query(func.count(Ticket.id)).filter(Ticket.week_number == CURRENT_WEEK).scalar_subquery().label("week_tickets"),
+        )
+        .select_from(Student)
+        .outerjoin(StudentStats, StudentStats.student_id == Student.id)
+        .outerjoin(LoginStreak, LoginStreak.student_id == Student.id)
+        .filter(Student.id == student_id)
+        .first()
+    )
+
+
+def get_student_stats_view(db: Session, student_id: int) -> dict | None:
+    """Stats payload for one student, or None if the student does not exist."""
+    result = _stats_query(db, student_id)
+    if result is None:
+        return None
+
+    stats = result.StudentStats
+    if stats is None:
+        # No projection row yet (a student from before the last rebuild): build
+        # one from the live aggregates for this response without persisting it.
+        stats = StudentStats(student_id=student_id)
+        _apply(stats, result.total_xp, _collect(db, [student_id])[student_id])
+    level, level_name = level_from_xp(stats.total_xp)
+    avg_quiz = round(stats.quiz_score_total / stats.quizzes_completed, 1) if stats.quizzes_completed else 0.0
+    avg_ticket = round(stats.ticket_score_total / stats.tickets_completed, 1) if stats.tickets_completed else 0.0
+    week_total = int(result.week_quizzes or 0) + int(result.week_tickets or 0)
+    week_done = int((stats.week_progress or {}).get(str(CURRENT_WEEK), 0))
+    streak = presence.streak(student_id)
+
+    return {
+        "name": result.name,
+        "total_xp": stats.total_xp,
+        "level": level,
+        "level_name": level_name,
+        "quizzes_completed": stats.quizzes_completed,
+        "total_quizzes": int(result.total_quizzes or 0),
+        "avg_quiz_score": avg_quiz,
+        "tickets_completed": stats.tickets_completed,
+        "total_tickets": int(result.total_tickets or 0),
+        "avg_ticket_score": avg_ticket,
+        "current_week": CURRENT_WEEK,
+        "week_completion": round((week_done / week_total) * 100, 1) if week_total else 0,
+        "recent_activity": stats.recent_activity or [],
+        "weak_areas": stats.weak_areas or [],
+        "streak": streak.current_streak if streak else result.current_streak or 0,
+        "longest_streak": streak.longest_streak if streak else result.longest_streak or 0,
+        "cohort_comparison": cohort_comparison(db, student_id, stats.total_xp, avg_quiz),
+        "cert_readiness": stats.cert_readiness,
+    }
@@ -0,0 +1,154 @@
+from collections import Counter
+
+from sqlalchemy import event, func, inspect, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.submission_counter import SubmissionCounter
+from app.models.ticket import TicketSubmission
+
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+_PENDING_KEY = "submission_counter_deltas"
+
+CounterKey = tuple[str, bool, bool]
+
+
+def _key(status: str | None, admin_reviewed: bool | None, ai_score: int | None) -> CounterKey:
+    return (status or "pending", bool(admin_reviewed), ai_score is not None)
+
+
+def _previous(obj: TicketSubmission, attr: str):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None if history.added else getattr(obj, attr)
+
+
+def _previous_key(obj: TicketSubmission) -> CounterKey:
+    return _key(_previous(obj, "status"), _previous(obj, "admin_reviewed"), _previous(obj, "ai_score"))
+
+
+def _current_key(obj: TicketSubmission) -> CounterKey:
+    return _key(obj.status, obj.admin_reviewed, obj.ai_score)
+
+
+def submission_counts(db: Session) -> dict[CounterKey, int]:
+    return {
+        (row.status, bool(row.admin_reviewed), bool(row.graded)): row.count
+        for row in db.query(SubmissionCounter).filter(SubmissionCounter.count != 0).all()
+    }
+
+
+def count_submissions(
+    counts: dict[CounterKey, int],
+    *,
+    status: str | None = None,
+    reviewed: bool | None = None,
+    graded: bool | None = None,
+) -> int:
+    return sum(
+        count
+        for (row_status, row_reviewed, row_graded), count in counts.items()
+        if (status is None or row_status == status)
+        and (reviewed is None or row_reviewed == reviewed)
+        and (graded is None or row_graded == graded)
+    )
+
+
+def summarize_counts(counts: dict[CounterKey, int], *, graded: bool | None = None) -> dict:
+    by_status: Counter = Counter()
+    for (status, _, row_graded), count in counts.items():
+        if graded is None or row_graded == graded:
+            by_status[status] += count
+    return {
+        "total": count_submissions(counts, graded=graded),
+        "reviewed": count_submissions(counts, reviewed=True, graded=graded),
+        "unreviewed": count_submissions(counts, reviewed=False, graded=graded),
+        "by_status": dict(sorted(by_status.items())),
+    }
+
+
+def rebuild_submission_counters(db: Session) -> int:
+    """Recount every (status, admin_reviewed, graded) bucket from ticket_submissions. Returns the bucket count."""
+    graded = TicketSubmission.ai_score.isnot(None)
+    status = func.coalesce(TicketSubmission.status, "pending")
+    rows = (
+        db.query(status.label("status"), TicketSubmission.admin_reviewed, graded.label("graded"), func.count(TicketSubmission.id))
+        .group_by(status, TicketSubmission.admin_reviewed, graded)
+        .all()
+    )
+    db.query(SubmissionCounter).delete()
+    db.add_all(
+        SubmissionCounter(status=row[0], admin_reviewed=bool(row[1]), graded=bool(row[2]), count=int(row[3]))
+        for row in rows
+    )
+    return len(rows)
+
+
+def _write_deltas(connection, deltas: dict[CounterKey, int]) -> None:
+    rows = [
+        {"status": status, "admin_reviewed": reviewed, "graded": graded, "count": delta}
+        for (status, reviewed, graded), delta in deltas.items()
+    ]
+    insert = _UPSERTS.get(connection.dialect.name)
+    if insert is not None:
+        stmt = insert(SubmissionCounter)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SubmissionCounter.status, SubmissionCounter.admin_reviewed, SubmissionCounter.graded],
+            set_={"count": SubmissionCounter.count + stmt.excluded.count},
+        )
+        connection.execute(stmt, rows)
+        return
+
+    table = SubmissionCounter.__table__
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(
+                table.c.status == row["status"],
+                table.c.admin_reviewed == row["admin_reviewed"],
+                table.c.graded == row["graded"],
+            )
+            .values(count=table.c.count + row["count"])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deltas(session: Session, flush_context, instances) -> None:
+    # Old values are read before the flush, while deleted rows can still load
+    # and attribute history has not been reset.
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, TicketSubmission):
+            deltas[_current_key(obj)] += 1
+    for obj in session.dirty:
+        if isinstance(obj, TicketSubmission):
+            before, after = _previous_key(obj), _current_key(obj)
+            if before != after:
+                deltas[before] -= 1
+                deltas[after] += 1
+    for obj in session.deleted:
+        if isinstance(obj, TicketSubmission):
+            deltas[_previous_key(obj)] -= 1
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        pending = session.info.setdefault(_PENDING_KEY, Counter())
+        pending.update(deltas)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_deltas(session: Session, flush_context) -> None:
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        # Same connection and transaction as the submission rows themselves.
+        _write_deltas(session.connection(), {key: delta for key, delta in deltas.items() if delta})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deltas(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+
+from app.services.blob_store import commit_blob
+
+logger = logging.getLogger(__name__)
+
+MAX_FILE_SIZE = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# kind -> (mime type, extensions that may carry it, extension used in the blob store)
+FILE_KINDS = {
+    "jpeg": ("image/jpeg", {"jpg", "jpeg"}, "jpg"),
+    "png": ("image/png", {"png"}, "png"),
+    "webp": ("image/webp", {"webp"}, "webp"),
+    "text": ("text/plain", {"txt", "log"}, "txt"),
+}
+IMAGE_KINDS = {"jpeg", "png", "webp"}
+
+
+def get_upload_dir() -> Path:
+    configured = os.getenv("UPLOAD_DIR")
+    path = Path(configured) if configured else Path(__file__).resolve().parents[2] / "uploads" / "screenshots"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_staging_dir(upload_dir: Path) -> Path:
+    """Where uploads are written before they are accepted; never a served directory.
+
+    UPLOAD_STAGING_DIR if set, otherwise a `.<name>-staging` sibling of the
+    upload directory. When the upload directory is a mount point its parent
+    may not be writable, so an unconfigured sibling that cannot be created
+    falls back to the system temp directory. Staging may sit on a different
+    filesystem from the store; commit_blob then copies instead of renaming.
+    """
+    configured = os.getenv("UPLOAD_STAGING_DIR")
+    path = Path(configured) if configured else upload_dir.parent / f".{upload_dir.name}-staging"
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError as exc:
+        if configured:
+            raise
+        logger.warning("upload_staging_unavailable path=%s error=%s", path, exc)
+        return Path(tempfile.gettempdir())
+    return path
+
+
+def file_extension(filename: str | None) -> str:
+    return filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else ""
+
+
+def sniff_kind(head: bytes) -> str | None:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if b"\x00" not in head:
+        # UTF-16 exports (e.g. Event Viewer) carry NULs, so only accept them with a BOM.
+        return "text"
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "text"
+    return None
+
+
+async def save_upload(file: UploadFile, *, allowed_kinds: set[str], max_size: int = MAX_FILE_SIZE) -> dict:
+    """Copy an upload into the blob store, checking its type and size as it is copied.
+
+    Starlette has already spooled the request body by the time this runs, so
+    the checks bound what is copied and stored, not what the client may send.
+    The file is read in CHUNK_SIZE pieces, hashed in the same pass and written
+    to a temp file in the staging directory. Once accepted it is renamed to its
+    content-addressed key, or discarded if an identical blob is already stored,
+    so readers never see a partial file.
+    """
+    ext = file_extension(file.filename)
+    allowed_exts = set().union(*(FILE_KINDS[kind][1] for kind in allowed_kinds))
+    if ext not in allowed_exts:
+        raise HTTPException(status_code=400, detail=f"Invalid file type ({', '.join(sorted(allowed_exts))} only)")
+
+    upload_dir = get_upload_dir()
+    hasher = hashlib.sha256()
+    size = 0
+    kind = None
+    fd, tmp_name = tempfile.mkstemp(dir=get_staging_dir(upload_dir), prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            while chunk := await file.read(CHUNK_SIZE):
+                if kind is None:
+                    kind = sniff_kind(chunk)
+                    if kind not in allowed_kinds or ext not in FILE_KINDS[kind][1]:
+                        raise HTTPException(status_code=400, detail="File content does not match its extension")
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(status_code=400, detail=f"File too large (max {max_size // (1024 * 1024)}MB)")
+                hasher.update(chunk)
+                handle.write(chunk)
+        if kind is None:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        checksum = hasher.hexdigest()
+        storage_key, created = commit_blob(upload_dir, tmp_path, checksum, FILE_KINDS[kind][2])
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        await file.close()
+
+    logger.info("upload_saved key=%s size=%s deduplicated=%s", storage_key, size, not created)
+    return {
+        "storage_key": storage_key,
+        "path": str(upload_dir / storage_key),
+        "size": size,
+        "checksum": checksum,
+        "mime_type": FILE_KINDS[kind][0],
+        "deduplicated": not created,
+    }
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.services.squad_service import recompute_weekly_domain_leads, weekly_leads_computed
+from app.services.xp_rollup_service import freeze_closed_weeks
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = max(60.0, float(os.getenv("WEEKLY_JOBS_POLL_SECONDS", "3600")))
+
+
+def seconds_until_next_week(now: datetime | None = None) -> float:
+    """Seconds until the next ISO week starts (Monday 00:00 UTC)."""
+    now = now or datetime.utcnow()
+    monday = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (monday + timedelta(days=7) - now).total_seconds()
+
+
+def run_weekly_jobs() -> None:
+    """Close out every unfrozen past week and compute this week's domain leads, each only if not done yet."""
+    db = SessionLocal()
+    try:
+        if not weekly_leads_computed(db):
+            recompute_weekly_domain_leads(db)
+        freeze_closed_weeks(db)
+    finally:
+        db.close()
+
+
+class WeeklyScheduler:
+    """Runs the weekly jobs from a lifespan task instead of blocking startup.
+
+    The jobs run once shortly after start (catching up weeks that turned
+    while the process was down) and then at every ISO week boundary. The task
+    also wakes every POLL_SECONDS, so clock jumps or a suspended host cannot
+    skip a week; the jobs are idempotent, so extra wakes cost one lookup.
+    """
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(run_weekly_jobs)
+            except Exception:
+                logger.exception("weekly_jobs_failed")
+            # A second past the boundary, so the new week's key is current.
+            await asyncio.sleep(min(self.poll_seconds, seconds_until_next_week() + 1))
+
+
+weekly_scheduler = WeeklyScheduler()
@@ -0,0 +1,196 @@
+import logging
+from datetime import date, datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.student import Student
+from app.models.xp_ledger import XPLedger
+from app.models.xp_rollup import WeeklyXPFreeze, WeeklyXPSnapshot, XPDailyRollup
+
+logger = logging.getLogger(__name__)
+
+MAX_RANGE_DAYS = 92
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+def utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+def week_key_for(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def week_bounds(week_key: str) -> tuple[date, date]:
+    try:
+        year, week = week_key.split("-W")
+        monday = date.fromisocalendar(int(year), int(week), 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid week (expected YYYY-Www)")
+    return monday, monday + timedelta(days=6)
+
+
+def month_bounds(month: str) -> tuple[date, date]:
+    try:
+        first = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month (expected YYYY-MM)")
+    next_month = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, next_month - timedelta(days=1)
+
+
+def record_daily_xp_many(db: Session, student_ids: list[int], delta: int, day: date | None = None) -> None:
+    """Add delta to each student's rollup row for the day, as one batched upsert where the dialect supports it."""
+    day = day or utc_today()
+    insert = _UPSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(XPDailyRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[XPDailyRollup.student_id, XPDailyRollup.day],
+            set_={"xp": XPDailyRollup.xp + stmt.excluded.xp},
+        )
+        db.execute(stmt, [{"student_id": sid, "day": day, "xp": delta} for sid in student_ids])
+        return
+
+    for student_id in student_ids:
+        row = db.query(XPDailyRollup).filter(XPDailyRollup.student_id == student_id, XPDailyRollup.day == day).first()
+        if row:
+            row.xp += delta
+        else:
+            db.add(XPDailyRollup(student_id=student_id, day=day, xp=delta))
+            db.flush()
+
+
+def ranked_xp(db: Session, start: date, end: date, page: int, per_page: int) -> tuple[list[dict], int]:
+    """Students ranked by XP earned between start and end (inclusive), from at most one rollup row per day."""
+    earned = func.sum(XPDailyRollup.xp)
+    offset = (page - 1) * per_page
+    total = db.query(XPDailyRollup.student_id).filter(XPDailyRollup.day >= start, XPDailyRollup.day <= end).distinct().count()
+    rows = (
+        db.query(XPDailyRollup.student_id, Student.name, earned.label("xp"))
+        .join(Student, Student.id == XPDailyRollup.student_id)
+        .filter(XPDailyRollup.day >= start, XPDailyRollup.day <= end)
+        .group_by(XPDailyRollup.student_id, Student.name)
+        .order_by(earned.desc(), XPDailyRollup.student_id.asc())
+        .offset(offset)
+        .limit(per_page)
+        .all()
+    )
+    entries = [
+        {"rank": offset + index, "student_id": row.student_id, "name": row.name, "xp": int(row.xp or 0)}
+        for index, row in enumerate(rows, start=1)
+    ]
+    return entries, total
+
+
+def is_week_frozen(db: Session, week_key: str) -> bool:
+    return db.query(WeeklyXPFreeze.week_key).filter(WeeklyXPFreeze.week_key == week_key).first() is not None
+
+
+def freeze_week(db: Session, week_key: str) -> int:
+    """Snapshot a closed week's ranking once and commit; later reads come straight from the snapshot rows.
+
+    The weekly_xp_freezes row is written even when nobody earned XP, so an
+    empty week is not aggregated again on the next run.
+    """
+    if is_week_frozen(db, week_key):
+        return 0
+    start, end = week_bounds(week_key)
+    earned = func.sum(XPDailyRollup.xp)
+    rows = (
+        db.query(XPDailyRollup.student_id, earned.label("xp"))
+        .filter(XPDailyRollup.day >= start, XPDailyRollup.day <= end)
+        .group_by(XPDailyRollup.student_id)
+        .order_by(earned.desc(), XPDailyRollup.student_id.asc())
+        .all()
+    )
+    db.add_all(
+        WeeklyXPSnapshot(week_key=week_key, rank=rank, student_id=row.student_id, xp=int(row.xp or 0))
+        for rank, row in enumerate(rows, start=1)
+    )
+    db.add(WeeklyXPFreeze(week_key=week_key, students=len(rows)))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker froze the same week first.
+        db.rollback()
+        return 0
+    logger.info("weekly_xp_frozen week=%s students=%s", week_key, len(rows))
+    return len(rows)
+
+
+def weekly_leaderboard(db: Session, week_key: str | None, page: int, per_page: int) -> tuple[list[dict], int, str]:
+    today = utc_today()
+    week_key = week_key or week_key_for(today)
+    start, end = week_bounds(week_key)
+    # Weeks are frozen by the weekly scheduler; until then (or for the current
+    # week) the ranking comes from the rollups, without writing on a read.
+    if end >= today or not is_week_frozen(db, week_key):
+        entries, total = ranked_xp(db, start, end, page, per_page)
+        return entries, total, week_key
+
+    query = db.query(WeeklyXPSnapshot).filter(WeeklyXPSnapshot.week_key == week_key)
+    total = query.count()
+    rows = (
+        query.join(Student, Student.id == WeeklyXPSnapshot.student_id)
+        .with_entities(WeeklyXPSnapshot.rank, WeeklyXPSnapshot.student_id, Student.name, WeeklyXPSnapshot.xp)
+        .order_by(WeeklyXPSnapshot.rank.asc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    entries = [{"rank": row.rank, "student_id": row.student_id, "name": row.name, "xp": row.xp} for row in rows]
+    return entries, total, week_key
+
+
+def freeze_closed_weeks(db: Session) -> int:
+    """Freeze every closed week after the latest freeze marker. Returns the number of weeks frozen.
+
+    Walking from the last marker, rather than freezing only last week, catches
+    up weeks that closed while the process was down. With no marker yet the
+    walk starts at the first week with rollups.
+    """
+    last_closed = week_bounds(week_key_for(utc_today()))[0] - timedelta(days=7)
+    latest = db.query(func.max(WeeklyXPFreeze.week_key)).scalar()
+    if latest is not None:
+        monday = week_bounds(latest)[0] + timedelta(days=7)
+    else:
+        first_day = db.query(func.min(XPDailyRollup.day)).scalar()
+        monday = week_bounds(week_key_for(first_day))[0] if first_day else last_closed
+    frozen = 0
+    while monday <= last_closed:
+        week_key = week_key_for(monday)
+        if not is_week_frozen(db, week_key):
+            freeze_week(db, week_key)
+            frozen += 1
+        monday += timedelta(days=7)
+    return frozen
+
+
+def validate_range(start: date, end: date) -> None:
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too long (max {MAX_RANGE_DAYS} days)")
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute all daily rollups from the XP ledger. Returns the number of rows written."""
+    day = func.date(XPLedger.created_at)
+    rows = db.query(XPLedger.student_id, day.label("day"), func.sum(XPLedger.delta).label("xp")).group_by(XPLedger.student_id, day).all()
+    db.query(XPDailyRollup).delete()
+    db.add_all(
+        XPDailyRollup(
+            student_id=row.student_id,
+            day=row.day if isinstance(row.day, date) else date.fromisoformat(row.day),
+            xp=int(row.xp or 0),
+        )
+        for row in rows
+    )
+    return len(rows)
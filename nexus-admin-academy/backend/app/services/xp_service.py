@@ -1,8 +1,18 @@
+import logging
+
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 
 from app.models.student import Student
 from app.models.xp_ledger import XPLedger
 from app.services.discord_service import check_and_post_milestones
+from app.services.leaderboard_service import stage_xp
+from app.services.stats_service import apply_xp_awards
+from app.services.xp_rollup_service import record_daily_xp_many
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_CHUNK_SIZE = 500
 
 
 def award_xp(
@@ -14,20 +24,83 @@ def award_xp(
     source_id: int | None,
     description: str,
 ) -> None:
-    if delta == 0:
+    award_xp_many(db, [student_id], delta=delta, source_type=source_type, source_id=source_id, description=description)
+
+
+def award_xp_many(
+    db: Session,
+    student_ids: list[int],
+    *,
+    delta: int,
+    source_type: str,
+    source_id: int | None,
+    description: str,
+) -> None:
+    """Add delta to each student's XP with one atomic UPDATE ... RETURNING plus their ledger rows.
+
+    total_xp is incremented in the database rather than read-modify-written
+    here, so concurrent awards to the same student cannot lose updates.
+    Duplicate ids are awarded once.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    if delta == 0 or not student_ids:
         return
 
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
+    rows = db.execute(
+        update(Student)
+        .where(Student.id.in_(student_ids))
+        .values(total_xp=Student.total_xp + delta)
+        .returning(Student.id, Student.name, Student.total_xp)
+    ).all()
+    if len(rows) != len(student_ids):
         raise ValueError("Student not found")
 
-    entry = XPLedger(
-        student_id=student_id,
-        source_type=source_type,
-        source_id=source_id,
-        delta=delta,
-        description=description,
+    db.add_all(
+        XPLedger(student_id=sid, source_type=source_type, source_id=source_id, delta=delta, description=description)
+        for sid in student_ids
     )
-    db.add(entry)
-    student.total_xp += delta
-    check_and_post_milestones(db, student_id, delta)
+    record_daily_xp_many(db, student_ids, delta)
+    apply_xp_awards(db, {row.id: row.total_xp for row in rows})
+    for row in rows:
+        stage_xp(db, row.id, row.total_xp, row.name)
+        check_and_post_milestones(db, row.name, row.total_xp, delta)
+
+
+def reconcile_xp(db: Session, *, fix: bool = False, chunk_size: int = RECONCILE_CHUNK_SIZE):
+    """Compare students.total_xp with SUM(xp_ledger.delta), one id range at a time.
+
+    Yields {"student_id", "total_xp", "ledger_xp"} for each mismatch. With
+    fix=True each chunk's mismatches are set to the ledger sum and committed
+    before the next chunk is read, so memory and lock time stay bounded.
+    """
+    last_id = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(Student.id).filter(Student.id > last_id).order_by(Student.id.asc()).limit(chunk_size).all()
+        ]
+        if not ids:
+            return
+        ledger = (
+            db.query(XPLedger.student_id, func.sum(XPLedger.delta).label("xp"))
+            .filter(XPLedger.student_id >= ids[0], XPLedger.student_id <= ids[-1])
+            .group_by(XPLedger.student_id)
+            .subquery()
+        )
+        rows = (
+            db.query(Student.id, Student.name, Student.total_xp, func.coalesce(ledger.c.xp, 0).label("ledger_xp"))
+            .outerjoin(ledger, ledger.c.student_id == Student.id)
+            .filter(Student.id.in_(ids))
+            .filter(Student.total_xp != func.coalesce(ledger.c.xp, 0))
+            .all()
+        )
+        for row in rows:
+            yield {"student_id": row.id, "total_xp": row.total_xp, "ledger_xp": int(row.ledger_xp)}
+        if fix and rows:
+            for row in rows:
+                db.execute(update(Student).where(Student.id == row.id).values(total_xp=int(row.ledger_xp)))
+                stage_xp(db, row.id, int(row.ledger_xp), row.name)
+            apply_xp_awards(db, {row.id: int(row.ledger_xp) for row in rows})
+            db.commit()
+            logger.info("xp_reconciled students=%s", len(rows))
+        last_id = ids[-1]
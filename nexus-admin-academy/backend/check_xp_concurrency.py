@@ -0,0 +1,97 @@
+import argparse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from app.config import load_env
+from app.database import SessionLocal
+from app.models.student import Student
+from app.models.student_stats import StudentStats
+from app.models.xp_ledger import XPLedger
+from app.models.xp_rollup import XPDailyRollup
+from app.services.discord_service import MILESTONES
+from app.services.stats_service import refresh_student_stats
+from app.services.xp_service import award_xp
+
+load_env()
+
+SOURCE_TYPE = "concurrency_check"
+
+
+def _create_student() -> tuple[int, int]:
+    # Starting above the last milestone keeps the check from queueing Discord posts.
+    start_xp = max(MILESTONES)
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:12]
+        student = Student(name=f"xp-check-{tag}", email=f"xp-check-{tag}@example.invalid", total_xp=start_xp)
+        db.add(student)
+        db.flush()
+        refresh_student_stats(db, [student.id])
+        db.commit()
+        return student.id, start_xp
+    finally:
+        db.close()
+
+
+def _award(student_id: int, awards: int) -> None:
+    db = SessionLocal()
+    try:
+        for n in range(awards):
+            award_xp(db, student_id=student_id, delta=1, source_type=SOURCE_TYPE, source_id=None, description=f"check {n}")
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _totals(student_id: int, start_xp: int) -> dict[str, int]:
+    db = SessionLocal()
+    try:
+        return {
+            "total": db.query(Student.total_xp).filter(Student.id == student_id).scalar() - start_xp,
+            "ledger": db.query(func.coalesce(func.sum(XPLedger.delta), 0)).filter(XPLedger.student_id == student_id).scalar(),
+            "rollup": db.query(func.coalesce(func.sum(XPDailyRollup.xp), 0)).filter(XPDailyRollup.student_id == student_id).scalar(),
+            "stats": db.query(StudentStats.total_xp).filter(StudentStats.student_id == student_id).scalar() - start_xp,
+        }
+    finally:
+        db.close()
+
+
+def _delete_student(student_id: int) -> None:
+    db = SessionLocal()
+    try:
+        for model in (XPLedger, XPDailyRollup, StudentStats):
+            db.query(model).filter(model.student_id == student_id).delete()
+        db.query(Student).filter(Student.id == student_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_check(threads: int, awards: int) -> bool:
+    student_id, start_xp = _create_student()
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for future in [pool.submit(_award, student_id, awards) for _ in range(threads)]:
+                future.result()
+        totals = _totals(student_id, start_xp)
+    finally:
+        _delete_student(student_id)
+
+    expected = threads * awards
+    ok = all(value == expected for value in totals.values())
+    print(f"expected {expected} XP: " + " ".join(f"{key}={value}" for key, value in totals.items()))
+    print("OK" if ok else "MISMATCH")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Award XP to a throwaway student from several threads and compare every XP total")
+    parser.add_argument("--threads", type=int, default=6)
+    parser.add_argument("--awards", type=int, default=20, help="awards per thread")
+    args = parser.parse_args()
+    raise SystemExit(0 if run_check(args.threads, args.awards) else 1)
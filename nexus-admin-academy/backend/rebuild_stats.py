@@ -0,0 +1,34 @@
+from app.config import load_env
+from app.database import SessionLocal
+from app.services.mastery_service import backfill_mastery_events, recompute_all_mastery
+from app.services.objective_service import rebuild_objective_progress, tag_untagged_content
+from app.services.stats_service import rebuild_student_stats
+from app.services.submission_count_service import rebuild_submission_counters
+from app.services.xp_rollup_service import rebuild_rollups
+
+load_env()
+
+
+def run_rebuild() -> None:
+    db = SessionLocal()
+    try:
+        tagged = tag_untagged_content(db)
+        objectives = rebuild_objective_progress(db)
+        count = rebuild_student_stats(db)
+        rollups = rebuild_rollups(db)
+        buckets = rebuild_submission_counters(db)
+        seeded = backfill_mastery_events(db)
+        mastery = recompute_all_mastery(db)
+        db.commit()
+        print(f"Rebuilt student_stats for {count} students, {rollups} daily XP rollups and {buckets} submission counters")
+        print(f"Rebuilt {mastery} domain mastery rows ({seeded} mastery events backfilled)")
+        print(f"Rebuilt {objectives} objective progress rows ({tagged} quizzes, questions and tickets tagged)")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_rebuild()
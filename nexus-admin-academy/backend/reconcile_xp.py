@@ -0,0 +1,29 @@
+import argparse
+
+from app.config import load_env
+from app.database import SessionLocal
+from app.services.xp_service import reconcile_xp
+
+load_env()
+
+
+def run_reconcile(fix: bool) -> None:
+    db = SessionLocal()
+    try:
+        mismatches = 0
+        for row in reconcile_xp(db, fix=fix):
+            mismatches += 1
+            print(f"student {row['student_id']}: total_xp={row['total_xp']} ledger={row['ledger_xp']}")
+        action = "fixed" if fix else "found"
+        print(f"{action} {mismatches} XP mismatches")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check students.total_xp against the XP ledger")
+    parser.add_argument("--fix", action="store_true", help="set mismatched totals to the ledger sum")
+    run_reconcile(parser.parse_args().fix)
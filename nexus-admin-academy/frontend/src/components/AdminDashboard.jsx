@@ -1,10 +1,12 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import toast from "react-hot-toast";
 import EmptyState from "./EmptyState";
 import { bulkGenerateTickets, bulkPublishTickets, createResource, createTicket, generateQuiz, getSubmissions } from "../services/api";
 
 export default function AdminDashboard() {
   const [submissions, setSubmissions] = useState([]);
+  const [submissionTotal, setSubmissionTotal] = useState(0);
+  const [summary, setSummary] = useState(null);
   const [quizForm, setQuizForm] = useState({ source_url: "", week_number: 1, title: "", domain_id: "1.0" });
   const [ticketForm, setTicketForm] = useState({ title: "", description: "", difficulty: 1, week_number: 1, domain_id: "1.0" });
   const [resourceForm, setResourceForm] = useState({ title: "", url: "", resource_type: "Video", week_number: 1, category: "" });
@@ -16,24 +18,24 @@ export default function AdminDashboard() {
   const load = async () => {
     const res = await getSubmissions();
     setSubmissions(res.data || []);
+    setSubmissionTotal(res.total ?? (res.data || []).length);
+    setSummary(res.summary || null);
   };
 
   useEffect(() => {
     load();
   }, []);
 
-  const avgScore = useMemo(() => {
-    if (!submissions.length) return 0;
-    const total = submissions.reduce((sum, item) => sum + (item.ai_score || 0), 0);
-    return (total / submissions.length).toFixed(1);
-  }, [submissions]);
+  // Cohort figures come from the backend; the list below is only the newest page.
+  const avgScore = (summary?.average_score ?? 0).toFixed(1);
+  const completionRate = summary?.student_count ? Math.min(100, Math.round((summary.students_submitted / summary.student_count) * 100)) : 0;
 
   return (
     <div className="space-y-4">
       <section className="grid gap-3 md:grid-cols-3">
-        <article className="panel dark:border-slate-700 dark:bg-slate-900"><p className="text-sm">Submissions</p><p className="text-2xl font-bold">{submissions.length}</p></article>
+        <article className="panel dark:border-slate-700 dark:bg-slate-900"><p className="text-sm">Submissions</p><p className="text-2xl font-bold">{submissionTotal}</p></article>
         <article className="panel dark:border-slate-700 dark:bg-slate-900"><p className="text-sm">Average score</p><p className="text-2xl font-bold">{avgScore}/10</p></article>
-        <article className="panel dark:border-slate-700 dark:bg-slate-900"><p className="text-sm">Completion rate</p><p className="text-2xl font-bold">{Math.min(100, Math.round((new Set(submissions.map((x) => x.student_name)).size / 5) * 100))}%</p></article>
+        <article className="panel dark:border-slate-700 dark:bg-slate-900"><p className="text-sm">Completion rate</p><p className="text-2xl font-bold">{completionRate}%</p></article>
       </section>
 
       <section className="grid gap-4 xl:grid-cols-2">
@@ -1,13 +1,27 @@
 import { useMemo, useState } from "react";
 import { AlertCircle, CheckCircle, Upload } from "lucide-react";
-import { uploadEvidence } from "../services/api";
+import { getEvidenceStatus, uploadEvidence } from "../services/api";
+
+const POLL_INTERVAL_MS = 1000;
+const POLL_ATTEMPTS = 30;
+
+// Validation runs in a background worker; poll until the artifact leaves "pending".
+async function waitForValidation(artifactId, initial) {
+  let data = initial;
+  for (let attempt = 0; data?.validation_status === "pending" && attempt < POLL_ATTEMPTS; attempt += 1) {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    const res = await getEvidenceStatus(artifactId);
+    data = res.data;
+  }
+  return data;
+}
 
 function UploadPreview({ upload }) {
   const isValid = upload.validation?.valid;
   return (
     <div className={`rounded border p-3 ${isValid ? "border-green-200 bg-green-50" : upload.status === "error" ? "border-red-200 bg-red-50" : "border-slate-200 bg-slate-50"}`}>
       <div className="flex items-center gap-2">
-        {upload.status === "uploading" ? <span>⏳</span> : null}
+        {upload.status === "uploading" || upload.status === "validating" ? <span>⏳</span> : null}
         {isValid ? <CheckCircle className="text-green-600" size={18} /> : null}
         {upload.status === "validated" && !isValid ? <AlertCircle className="text-amber-600" size={18} /> : null}
         <div className="flex-1">
@@ -35,14 +49,17 @@ export default function EvidenceUploader({ ticketId, requiredEvidence = [], onCo
       setUploads((prev) => [...prev, preview]);
       try {
         const res = await uploadEvidence({ file, ticketId, artifactType: evidenceType });
+        const artifactId = res.data?.artifact_id;
+        setUploads((prev) => prev.map((u) => (u.id === preview.id ? { ...u, status: "validating", artifact_id: artifactId } : u)));
+        const result = await waitForValidation(artifactId, res.data);
         setUploads((prev) =>
           prev.map((u) =>
             u.id === preview.id
               ? {
                   ...u,
-                  status: "validated",
-                  artifact_id: res.data?.artifact_id,
-                  validation: res.data?.validation,
+                  status: result?.validation ? "validated" : "error",
+                  error: result?.validation ? undefined : "Validation timed out",
+                  validation: result?.validation,
                 }
               : u
           )
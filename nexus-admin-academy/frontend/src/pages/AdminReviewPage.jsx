@@ -1,21 +1,56 @@
 import { useEffect, useState } from "react";
 import EmptyState from "../components/EmptyState";
-import { getReviewQueue, overrideSubmission, rejectProof, verifyProof } from "../services/api";
+import { bulkReview, getReviewQueue, overrideSubmission, rejectProof, verifyProof } from "../services/api";
+
+const PER_PAGE = 50;
+const REVIEW_FILTERS = { all: "All", false: "Unreviewed", true: "Reviewed" };
 
 export default function AdminReviewPage() {
   const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(0);
+  const [counts, setCounts] = useState(null);
+  const [reviewed, setReviewed] = useState("all");
   const [loading, setLoading] = useState(true);
   const [score, setScore] = useState(10);
   const [comment, setComment] = useState("");
+  const [selected, setSelected] = useState([]);
+  const [bulkMessage, setBulkMessage] = useState("");
+
+  const params = (cursor) => ({
+    per_page: PER_PAGE,
+    ...(reviewed === "all" ? {} : { reviewed }),
+    ...(cursor ? { cursor } : {}),
+  });
 
   const load = async () => {
     setLoading(true);
-    const res = await getReviewQueue();
+    const res = await getReviewQueue(params());
     setItems(res.data || []);
+    setNextCursor(res.next_cursor || null);
+    setTotal(res.total || 0);
+    setCounts(res.counts || null);
+    setSelected([]);
     setLoading(false);
   };
 
-  useEffect(() => { load(); }, []);
+  const loadMore = async () => {
+    const res = await getReviewQueue(params(nextCursor));
+    setItems((prev) => [...prev, ...(res.data || [])]);
+    setNextCursor(res.next_cursor || null);
+  };
+
+  const toggle = (id) => setSelected((prev) => (prev.includes(id) ? prev.filter((x) => x !== id) : [...prev, id]));
+
+  const runBulk = async (action) => {
+    const res = await bulkReview(selected, action, comment);
+    const results = res.data || [];
+    const done = results.filter((item) => item.outcome === "verified" || item.outcome === "rejected").length;
+    setBulkMessage(`${done} of ${results.length} submissions ${action === "verify" ? "verified" : "rejected"}`);
+    await load();
+  };
+
+  useEffect(() => { load(); }, [reviewed]);
 
   if (loading) {
     return (
@@ -34,25 +69,57 @@ export default function AdminReviewPage() {
     );
   }
 
-  if (!items.length) {
+  if (!items.length && reviewed === "all") {
     return <main className="mx-auto max-w-6xl p-6"><EmptyState icon="📝" title="No submissions yet" message="Student work will appear here after they complete tickets" /></main>;
   }
 
   return (
     <main className="mx-auto max-w-6xl space-y-4 p-6">
-      <h1 className="text-2xl font-bold text-slate-900 dark:text-slate-100">Manual Review Queue</h1>
+      <div className="flex flex-wrap items-center justify-between gap-2">
+        <h1 className="text-2xl font-bold text-slate-900 dark:text-slate-100">Manual Review Queue</h1>
+        {counts ? (
+          <p className="text-sm text-slate-500 dark:text-slate-400">
+            {counts.unreviewed} unreviewed / {counts.total} graded
+          </p>
+        ) : null}
+      </div>
+      <div className="flex gap-2">
+        {Object.entries(REVIEW_FILTERS).map(([key, label]) => (
+          <button key={key} className={reviewed === key ? "btn-primary" : "btn-secondary"} onClick={() => setReviewed(key)}>
+            {label}
+          </button>
+        ))}
+      </div>
       <div className="panel dark:bg-slate-900 dark:border-slate-700">
         <div className="mb-3 flex flex-wrap items-center gap-2">
           <label className="text-sm">Override Score</label>
           <input className="input-field w-24" type="number" min={0} max={10} value={score} onChange={(e) => setScore(Number(e.target.value || 0))} />
           <input className="input-field min-w-64 flex-1" placeholder="Admin comment (optional)" value={comment} onChange={(e) => setComment(e.target.value)} />
         </div>
+        <div className="mb-3 flex flex-wrap items-center gap-2">
+          <label className="flex items-center gap-2 text-sm">
+            <input
+              type="checkbox"
+              checked={items.length > 0 && selected.length === items.length}
+              onChange={(e) => setSelected(e.target.checked ? items.map((item) => item.submission_id) : [])}
+            />
+            Select all
+          </label>
+          <button className="btn-primary" disabled={!selected.length} onClick={() => runBulk("verify")}>
+            Verify Selected ({selected.length})
+          </button>
+          <button className="btn-secondary" disabled={!selected.length} onClick={() => runBulk("reject")}>
+            Reject Selected
+          </button>
+          {bulkMessage ? <span className="text-sm text-slate-500 dark:text-slate-400">{bulkMessage}</span> : null}
+        </div>
         <div className="space-y-2">
           {items.map((item) => (
             <div key={item.submission_id} className="flex flex-wrap items-center justify-between gap-2 rounded border border-slate-200 p-3 dark:border-slate-700">
-              <p className="text-sm text-slate-700 dark:text-slate-200">
+              <label className="flex items-center gap-2 text-sm text-slate-700 dark:text-slate-200">
+                <input type="checkbox" checked={selected.includes(item.submission_id)} onChange={() => toggle(item.submission_id)} />
                 {item.student_name} - {item.ticket_title} - AI {item.ai_score}/10 - {item.status}
-              </p>
+              </label>
               <div className="flex gap-2">
                 <button className="btn-secondary" onClick={async () => { await overrideSubmission(item.submission_id, { new_score: score, comment: comment || "Manual review adjustment" }); await load(); }}>
                   Override
@@ -67,6 +134,10 @@ export default function AdminReviewPage() {
             </div>
           ))}
         </div>
+        <div className="mt-3 flex items-center justify-between text-sm text-slate-500 dark:text-slate-400">
+          <span>Showing {items.length} of {total}</span>
+          {nextCursor ? <button className="btn-secondary" onClick={loadMore}>Load more</button> : null}
+        </div>
       </div>
     </main>
   );
@@ -1,8 +1,14 @@
 ﻿import { useEffect, useState } from "react";
-import { createStudent, deleteStudent, getStudentsOverview, updateStudent } from "../services/api";
+import { createStudent, deleteStudent, getStudentsOverview, studentsOverviewExportUrl, updateStudent } from "../services/api";
+
+const PER_PAGE = 50;
+const SORTABLE = { rank: "#", name: "Name", xp: "XP", quiz_done: "Quiz", avg_quiz: "Avg Quiz", ticket_done: "Tickets", avg_ticket: "Avg Ticket" };
 
 export default function AdminStudentsPage() {
   const [rows, setRows] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [sort, setSort] = useState({ sort: "rank", order: "asc" });
   const [loading, setLoading] = useState(true);
   const [creating, setCreating] = useState(false);
   const [newName, setNewName] = useState("");
@@ -14,14 +20,28 @@ export default function AdminStudentsPage() {
 
   const load = async () => {
     setLoading(true);
-    const res = await getStudentsOverview();
+    const res = await getStudentsOverview({ page, per_page: PER_PAGE, ...sort });
     setRows(res.data || []);
+    setTotal(res.total || 0);
     setLoading(false);
   };
 
   useEffect(() => {
     load();
-  }, []);
+  }, [page, sort]);
+
+  const onSort = (key) => {
+    setPage(1);
+    setSort((prev) => ({ sort: key, order: prev.sort === key && prev.order === "asc" ? "desc" : "asc" }));
+  };
+
+  const header = (key) => (
+    <th className="cursor-pointer px-2 py-2" onClick={() => onSort(key)}>
+      {SORTABLE[key]}
+      {sort.sort === key ? (sort.order === "asc" ? " \u25B2" : " \u25BC") : ""}
+    </th>
+  );
+  const pageCount = Math.max(1, Math.ceil(total / PER_PAGE));
 
   const onCreate = async () => {
     await createStudent({ name: newName, email: newEmail });
@@ -54,9 +74,14 @@ export default function AdminStudentsPage() {
     <main className="mx-auto max-w-7xl p-6">
       <div className="mb-4 flex items-center justify-between">
         <h1 className="text-2xl font-bold text-slate-900 dark:text-slate-100">Student Activity Overview</h1>
-        <button className="btn-primary" onClick={() => setCreating((v) => !v)}>
-          {creating ? "Cancel" : "New Student"}
-        </button>
+        <div className="flex gap-2">
+          <a className="btn-secondary" href={studentsOverviewExportUrl("csv", sort)}>
+            Export CSV
+          </a>
+          <button className="btn-primary" onClick={() => setCreating((v) => !v)}>
+            {creating ? "Cancel" : "New Student"}
+          </button>
+        </div>
       </div>
 
       {creating ? (
@@ -87,15 +112,15 @@ export default function AdminStudentsPage() {
         <table className="min-w-full text-left text-sm">
           <thead>
             <tr className="border-b border-slate-200 dark:border-slate-700">
-              <th className="px-2 py-2">#</th>
-              <th className="px-2 py-2">Name</th>
+              {header("rank")}
+              {header("name")}
               <th className="px-2 py-2">Email</th>
               <th className="px-2 py-2">Notes</th>
-              <th className="px-2 py-2">XP</th>
-              <th className="px-2 py-2">Quiz</th>
-              <th className="px-2 py-2">Avg Quiz</th>
-              <th className="px-2 py-2">Tickets</th>
-              <th className="px-2 py-2">Avg Ticket</th>
+              {header("xp")}
+              {header("quiz_done")}
+              {header("avg_quiz")}
+              {header("ticket_done")}
+              {header("avg_ticket")}
               <th className="px-2 py-2">Actions</th>
             </tr>
           </thead>
@@ -141,6 +166,17 @@ export default function AdminStudentsPage() {
             })}
           </tbody>
         </table>
+        <div className="mt-3 flex items-center justify-end gap-2 text-sm">
+          <button className="btn-secondary" disabled={page <= 1} onClick={() => setPage((p) => p - 1)}>
+            Prev
+          </button>
+          <span>
+            Page {page} of {pageCount}
+          </span>
+          <button className="btn-secondary" disabled={page >= pageCount} onClick={() => setPage((p) => p + 1)}>
+            Next
+          </button>
+        </div>
       </div>
       ) : null}
     </main>
@@ -88,6 +88,7 @@ export const uploadEvidence = ({ file, ticketId, artifactType }) => {
   formData.append("artifact_type", artifactType);
   return request(() => api.post("/api/evidence/upload", formData, { headers: { "Content-Type": "multipart/form-data" } }));
 };
+export const getEvidenceStatus = (artifactId) => request(() => api.get(`/api/evidence/${artifactId}`));
 
 export const searchCommands = (q) => request(() => api.get("/api/commands/search", { params: { q } }));
 export const globalSearch = (q) => request(() => api.get("/api/search/global", { params: { q } }));
@@ -105,16 +106,20 @@ export const bookmarkletImport = (payload) => request(() => adminApi.post("/api/
 export const getQuizQuestions = (quizId) => request(() => adminApi.get(`/api/admin/quizzes/${quizId}/questions`));
 export const updateQuestion = (questionId, payload) => request(() => adminApi.put(`/api/admin/questions/${questionId}`, payload));
 export const createTicket = (payload) => request(() => adminApi.post("/api/admin/tickets", payload));
-export const getSubmissions = () => request(() => adminApi.get("/api/admin/submissions"));
+export const getSubmissions = (params = {}) => request(() => adminApi.get("/api/admin/submissions", { params }));
 export const getSubmissionDetail = (id) => request(() => adminApi.get(`/api/admin/submissions/${id}`));
 export const overrideSubmission = (id, payload) => request(() => adminApi.put(`/api/admin/submissions/${id}/override`, payload));
 export const verifyProof = (id, comment = "") => request(() => adminApi.put(`/api/admin/submissions/${id}/verify-proof`, null, { params: { comment } }));
 export const rejectProof = (id, comment = "") => request(() => adminApi.put(`/api/admin/submissions/${id}/reject-proof`, null, { params: { comment } }));
+export const bulkReview = (submissionIds, action, comment = "") =>
+  request(() => adminApi.post("/api/admin/submissions/bulk-review", { submission_ids: submissionIds, action, comment: comment || null }));
 
 export const createResource = (payload) => request(() => adminApi.post("/api/admin/resources", payload));
 export const deleteResource = (id) => request(() => adminApi.delete(`/api/admin/resources/${id}`));
-export const getReviewQueue = () => request(() => adminApi.get("/api/admin/review"));
-export const getStudentsOverview = () => request(() => adminApi.get("/api/admin/students/overview"));
+export const getReviewQueue = (params = {}) => request(() => adminApi.get("/api/admin/review", { params }));
+export const getStudentsOverview = (params = {}) => request(() => adminApi.get("/api/admin/students/overview", { params }));
+export const studentsOverviewExportUrl = (format = "csv", params = {}) =>
+  `${adminApi.defaults.baseURL}/api/admin/students/overview/export?${new URLSearchParams({ format, ...params })}`;
 export const getStudentActivity = (id) => request(() => adminApi.get(`/api/admin/students/${id}/activity`));
 export const createStudent = (payload) => request(() => adminApi.post("/api/admin/students", payload));
 export const updateStudent = (id, payload) => request(() => adminApi.put(`/api/admin/students/${id}`, payload));